@@ -1,12 +1,13 @@
-import requests
+import argparse
+from copysku import categorias, client, espelho, marcas, perfis
+from copysku.batch import WORKERS_PADRAO, clonar_lote
+from copysku.preflight import para_lote
 import json
 from dotenv import load_dotenv
 import os
 
 load_dotenv()
 # Configurações da API
-API_URL_GET = "https://api.anymarket.com.br/v2/products/{id}"
-API_URL_POST = "https://api.anymarket.com.br/v2/products"
 
 TOKEN_ANY1 = os.getenv("ANY_1")  # ou ANY_2
 TOKEN_ANY2 = os.getenv("ANY_2")  # ou ANY_1
@@ -22,70 +23,72 @@ HEADERS_DESTINO = {
     "gumgaToken": TOKEN_ANY2
 }
 
-# Categoria padrão da conta destino
-CATEGORIA_PADRAO_ID = 1465880
+# Perfil de destino (categoria, campos removidos, stockLocalId...): ver copysku/perfis.py
+TRANSFORMAR = perfis.compilar("ANY_2")
 ESTOQUE_ANY_2 = 26730
 
-def clonar_produto(id_prod_hub, novo_sku, novo_ean, estoque):
+def clonar_produto(id_prod_hub, novo_sku, novo_ean, estoque, mostrar_json=True):
     # 1. Buscar produto pelo ID
-    url_get = API_URL_GET.format(id=id_prod_hub)
-    response = requests.get(url_get, headers=HEADERS_ORIGEM)
-
-    if response.status_code != 200:
-        print("❌ Erro ao buscar produto:", response.status_code, response.text)
-        return
-
-    produto = response.json()
-
-    # 2. Remover campos que não podem ser enviados : marca, atributos, etc
-    for campo in ['id', 'creationDate', 'modificationDate', 'dataSource', 'stockLocalId' ]:
-        produto.pop(campo, None)
-        produto.pop('brand', None)
-        #produto.pop('stockLocalId', None)
-          
-
-    # 2.2 Substituir categoria SEMPRE pela padrão (antes do POST)
-    produto['category'] = {"id": CATEGORIA_PADRAO_ID}    
-    #produto['stockLocalId'] = {"id" : ESTOQUE_ANY_2}
-
-    # 3. Atualizar o sku principal
-    if 'sku' in produto and isinstance(produto['sku'], dict):
-        produto['sku']['partnerId'] = novo_sku
-        produto['sku']['ean'] = novo_ean
-        produto['sku']['stockLocalId'] = estoque
-        
-    else:
-        produto['sku'] = {
-            'partnerId': novo_sku,
-            'ean': novo_ean
-        }
-
-    # 4. Atualizar todos os SKUs dentro da lista 'skus', se existir
-    if 'skus' in produto and isinstance(produto['skus'], list):
-        for sku_item in produto['skus']:
-            sku_item['partnerId'] = novo_sku
-            sku_item['ean'] = novo_ean
-            sku_item['stockLocalId'] = estoque
+    code, origem = espelho.buscar_produto(TOKEN_ANY1, id_prod_hub)  # espelho local com --espelho, senão GET
+
+    if code != 200:
+        print("❌ Erro ao buscar produto:", code, origem)
+        return code, origem
+
+    # 2-4. Payload do destino (categoria padrão, sku principal e skus com novo SKU/EAN/estoque)
+    # categoria e marca de origem traduzidas para as do destino (copysku/categorias.py e copysku/marcas.py)
+    categoria = categorias.mapear(TOKEN_ANY1, TOKEN_ANY2, origem.get("category"))
+    marca = marcas.resolver(TOKEN_ANY1, TOKEN_ANY2, origem.get("brand"))
+    produto = TRANSFORMAR(origem, novo_sku=novo_sku, novo_ean=novo_ean, estoque=estoque,
+                          categoria=categoria, marca=marca)
 
     # 5. Mostrar o JSON final para conferência
-    print("\n✅ JSON FINAL ENVIADO:")
-    print(json.dumps(produto, indent=2, ensure_ascii=False))
+    if mostrar_json:
+        print("\n✅ JSON FINAL ENVIADO:")
+        print(json.dumps(produto, indent=2, ensure_ascii=False))
 
-    # 6. Enviar POST para criar novo produto
-    post = requests.post(API_URL_POST, headers=HEADERS_DESTINO, data=json.dumps(produto)) #HEADERS_DESTINO para any 2
+    # 6. Enviar POST para criar novo produto (retries; resposta perdida é conciliada pelo novo SKU)
+    code, resposta = client.criar_produto(HEADERS_DESTINO, json.dumps(produto), novo_sku)
 
-    if post.status_code == 201:
+    if code in (200, 201):
         print(f"✅ Produto {novo_sku} criado com sucesso!")
     else:
-        print("❌ Erro ao criar novo produto:", post.status_code, post.text)
+        print("❌ Erro ao criar novo produto:", code, resposta)
+    return code, resposta
 
 
-# Execução via terminal
+# Execução via terminal (interativa) ou em lote (--lote planilha.csv / .xlsx / -)
 if __name__ == "__main__":
-    print("=== Clonador de Produto AnyMarket ===")
-    id_origem = input("Informe o ID do produto origem (id_prod_hub): ").strip()
-    novo_sku = input("Informe o novo SKU: ").strip()
-    novo_ean = input("Informe o novo EAN: ").strip()
-    estoque = input("informe o id do estoque").strip()
+    parser = argparse.ArgumentParser(description="Clonador de Produto AnyMarket")
+    parser.add_argument("--lote", help="CSV/XLSX com as colunas id_prod_hub,novo_sku,novo_ean,estoque ('-' lê da entrada padrão)")
+    parser.add_argument("--workers", type=int, default=WORKERS_PADRAO,
+                        help="produtos clonados ao mesmo tempo no modo lote (padrão: %(default)s)")
+    parser.add_argument("--resultado", default="resultado_clonagem.jsonl", help="arquivo JSONL com o resultado de cada linha")
+    parser.add_argument("--corpos", metavar="PASTA",
+                        help="guarda o corpo completo de cada resposta (gzip, endereçado por hash) nesta pasta")
+    parser.add_argument("--preflight", action="store_true",
+                        help="antes de qualquer POST, rejeita linhas cujo SKU/EAN já existe no destino ou se repete na planilha "
+                             "(índice local; atualize com python -m copysku.sku_index --conta <CONTA>)")
+    parser.add_argument("--espelho", action="store_true",
+                        help="lê o produto de origem do espelho local do catálogo "
+                             "(atualize com python -m copysku.espelho --conta ANY_1)")
+    args = parser.parse_args()
+    if args.espelho:
+        espelho.configurar()
+
+    if args.lote:
+        print("=== Clonador de Produto AnyMarket (lote) ===")
+        try:
+            clonar_lote(args.lote, lambda l: clonar_produto(l['id_prod_hub'], l['novo_sku'], l['novo_ean'], l['estoque'], mostrar_json=False),
+                        ['id_prod_hub', 'novo_sku', 'novo_ean', 'estoque'], workers=args.workers, caminho_resultado=args.resultado, pasta_corpos=args.corpos,
+                        preflight=para_lote([TOKEN_ANY2]) if args.preflight else None)
+        except (OSError, ValueError) as e:
+            print("❌ Erro ao ler lote:", e)
+    else:
+        print("=== Clonador de Produto AnyMarket ===")
+        id_origem = input("Informe o ID do produto origem (id_prod_hub): ").strip()
+        novo_sku = input("Informe o novo SKU: ").strip()
+        novo_ean = input("Informe o novo EAN: ").strip()
+        estoque = input("informe o id do estoque").strip()
 
-    clonar_produto(id_origem, novo_sku, novo_ean, estoque)
+        clonar_produto(id_origem, novo_sku, novo_ean, estoque)
@@ -0,0 +1,67 @@
+import argparse
+from copysku import espelho, fanout
+from copysku.batch import WORKERS_PADRAO, clonar_lote
+from copysku.preflight import para_lote
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+# Conta de origem; os destinos (token, perfil e estoque padrão) ficam em copysku/fanout.py
+TOKEN_ANY1 = os.getenv("ANY_1")
+
+
+def clonar_produto(id_prod_hub, novo_sku, novo_ean, destinos, estoques=None, mostrar_json=True):
+    # GET uma vez no ANY_1 e POST em paralelo em cada destino
+    return fanout.clonar_para_destinos(TOKEN_ANY1, id_prod_hub, destinos, novo_sku, novo_ean,
+                                       estoques=estoques, mostrar_json=mostrar_json)
+
+
+# Execução via terminal (interativa) ou em lote (--lote planilha.csv / .xlsx / -)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Clonador de Produto AnyMarket para várias contas")
+    parser.add_argument("--destinos", nargs="+", choices=sorted(fanout.DESTINOS), default=sorted(fanout.DESTINOS),
+                        help="contas de destino (padrão: todas)")
+    parser.add_argument("--lote", help="CSV/XLSX com as colunas id_prod_hub,novo_sku,novo_ean e opcionalmente "
+                                       "estoque_<destino> (ex.: estoque_repleta) ('-' lê da entrada padrão)")
+    parser.add_argument("--workers", type=int, default=WORKERS_PADRAO,
+                        help="produtos clonados ao mesmo tempo no modo lote (padrão: %(default)s)")
+    parser.add_argument("--resultado", default="resultado_clonagem.jsonl",
+                        help="arquivo JSONL com o resultado de cada linha e destino")
+    parser.add_argument("--corpos", metavar="PASTA",
+                        help="guarda o corpo completo de cada resposta (gzip, endereçado por hash) nesta pasta")
+    parser.add_argument("--preflight", action="store_true",
+                        help="antes de qualquer POST, rejeita linhas cujo SKU/EAN já existe no destino ou se repete na planilha "
+                             "(índice local; atualize com python -m copysku.sku_index --conta <CONTA>)")
+    parser.add_argument("--espelho", action="store_true",
+                        help="lê o produto de origem do espelho local do catálogo "
+                             "(atualize com python -m copysku.espelho --conta ANY_1)")
+    args = parser.parse_args()
+    if args.espelho:
+        espelho.configurar()
+
+    if args.lote:
+        print(f"=== Clonador de Produto AnyMarket (lote → {', '.join(args.destinos)}) ===")
+
+        def _clonar(l):
+            estoques = {d: l.get(f"estoque_{d}") for d in args.destinos}
+            return clonar_produto(l['id_prod_hub'], l['novo_sku'], l['novo_ean'], args.destinos, estoques, mostrar_json=False)
+
+        # com --preflight uma linha em conflito em qualquer destino não vai para nenhum
+        tokens_destino = [os.getenv(fanout.DESTINOS[d]['token']) for d in args.destinos]
+        try:
+            clonar_lote(args.lote, _clonar, ['id_prod_hub', 'novo_sku', 'novo_ean'], workers=args.workers,
+                        caminho_resultado=args.resultado, pasta_corpos=args.corpos,
+                        preflight=para_lote(tokens_destino) if args.preflight else None)
+        except (OSError, ValueError) as e:
+            print("❌ Erro ao ler lote:", e)
+    else:
+        print(f"=== Clonador de Produto AnyMarket ({', '.join(args.destinos)}) ===")
+        id_origem = input("Informe o ID do produto origem (id_prod_hub): ").strip()
+        novo_sku = input("Informe o novo SKU: ").strip()
+        novo_ean = input("Informe o novo EAN: ").strip()
+        estoques = {}
+        for destino in args.destinos:
+            padrao = fanout.DESTINOS[destino]["estoque"]
+            estoques[destino] = input(f"Informe o id do estoque em {destino} (Enter = {padrao}): ").strip()
+
+        clonar_produto(id_origem, novo_sku, novo_ean, args.destinos, estoques)
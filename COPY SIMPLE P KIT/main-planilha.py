@@ -1,14 +1,21 @@
-import requests
+import argparse
 import json
-import pandas as pd
 import os
-import time
+import sys
+
+# Pasta raiz do repositório (onde fica o pacote copysku)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from copysku import cache, client, eans, espelho, journal, metrics, perfis, preflight, validacao
+from copysku.batch import WORKERS_PADRAO, executar_em_paralelo, ler_linhas
+from copysku.cache import conta_do_token
+from copysku.client import get_json_with_retries
+from copysku.sku_index import get_indice
+from copysku.stocks import obter_snapshot
 
 # ===================== CONFIGURAÇÕES =====================
-API_URL_GET = "https://api.anymarket.com.br/v2/products/{id}"
-API_URL_GET_BY_SKU = "https://api.anymarket.com.br/v2/products"
-API_URL_POST = "https://api.anymarket.com.br/v2/products"
-API_URL_STOCKS = "https://api.anymarket.com.br/v2/stocks"
+API_URL_GET = "/v2/products/{id}"
+API_URL_GET_BY_SKU = "/v2/products"
+API_URL_STOCKS = "/v2/stocks"
 
 TOKEN_ANY = "MjU5MDYzNTc1Lg==.MUfqIGh9hJCl8gZ0ji+YXHX7aX1SucmOJntr/d0/QjNRjd8WVDk1nXie3s2dX4yf99em09OD7rCS1OYo8Ek+Mw=="
 
@@ -17,63 +24,30 @@ HEADERS = {
     "gumgaToken": TOKEN_ANY
 }
 
-REQUEST_DELAY = 1.2
+PLANILHA = r"C:\__AUTOMAÇÕES\Copy-SKU-Any\Copy-SKU-ANY\COPY SIMPLE P KIT\kits.xlsx"
 STOCK_LOCAL_ID = 45479
-MAX_RETRIES = 4
-BACKOFF_BASE_SEC = 1.5
+
+# Snapshot de estoque/preço do STOCK_LOCAL_ID (carregado com --snapshot-estoque)
+SNAPSHOT_ESTOQUE = None
 
 
 # ===================== FUNÇÕES AUXILIARES =====================
 
-#essa função remove os dados que não podem ser enviados no POST
+#essa função monta o payload sem os dados que não podem ser enviados no POST (perfil KIT, copysku/perfis.py)
+#o produto de origem não é alterado (ele pode estar no cache)
 def sanitize_product_for_post(prod):
-    for campo in ['id', 'creationDate', 'modificationDate', 'dataSource', 'stockLocalId',
-                  'partnerId', 'allowAutomaticSkuMarketplaceCreation', 'calculatedPrice',
-                  'isProductActive', 'additionalStocks']:
-        prod.pop(campo, None)
-    prod.pop('brand', None)
-    prod.pop('kitItens', None)
-    prod.pop('kitComponents', None)
-    return prod
-
-# Executa requisições HTTP com repetição automática em caso de erro (429, 500, 502, etc)
-# Caso a execução seja negada e faz uma nova tentativa
-def get_json_with_retries(url, params=None, headers=None, method="GET", data=None, timeout=30):
-    attempt = 0
-    while attempt < MAX_RETRIES:
-        try:
-            if method == "GET":
-                r = requests.get(url, headers=headers, params=params, timeout=timeout)
-            else:
-                r = requests.request(method, url, headers=headers, params=params, data=data, timeout=timeout)
-
-            if r.status_code < 400:
-                try:
-                    return r.status_code, r.json()
-                except Exception:
-                    return r.status_code, r.text
-
-            if r.status_code in (429, 500, 502, 503, 504):
-                wait = r.headers.get("Retry-After")
-                sleep_s = float(wait) if wait else BACKOFF_BASE_SEC * (2 ** attempt)
-                print(f"⚠️  {r.status_code} em {url} — retry em {sleep_s:.1f}s (tentativa {attempt+1}/{MAX_RETRIES})")
-                time.sleep(sleep_s)
-                attempt += 1
-                continue
-
-            return r.status_code, r.text
-
-        except Exception as e:
-            sleep_s = BACKOFF_BASE_SEC * (2 ** attempt)
-            print(f"⚠️  Erro '{e}' em {url} — retry em {sleep_s:.1f}s (tentativa {attempt+1}/{MAX_RETRIES})")
-            time.sleep(sleep_s)
-            attempt += 1
-
-    return 599, "Erro após múltiplas tentativas"
+    return perfis.transformar("KIT", prod)
 
 # Pega o idSku interno a partir do partnerId (SKU externo).
+# Consulta primeiro o índice local (copysku.sku_index) e só vai à API se não achar.
 def resolve_sku_id_from_partner(partner_id):
     """Resolve o idSku (necessário para kitComponents)"""
+    indice = get_indice()
+    conta = conta_do_token(TOKEN_ANY)
+    local = indice.buscar(conta, partner_id)
+    if local and local.get("idSku"):
+        return local["idSku"]
+
     code, data = get_json_with_retries(API_URL_GET_BY_SKU, params={"sku": str(partner_id)}, headers=HEADERS)
     if code != 200 or not isinstance(data, dict):
         print(f"⚠️  Falha ao buscar SKU {partner_id}: HTTP {code}")
@@ -83,6 +57,7 @@ def resolve_sku_id_from_partner(partner_id):
     for prod in items:
         for sku in prod.get("skus", []):
             if str(sku.get("partnerId")) == str(partner_id):
+                indice.gravar_produto(conta, prod)
                 return sku.get("id")
 
     if items and items[0].get("skus"):
@@ -93,6 +68,9 @@ def resolve_sku_id_from_partner(partner_id):
 # Busca o preço de um SKU no estoque definido
 def fetch_price_from_stocks(sku_partner):
     """Busca o preço do SKU no estoque definido"""
+    if SNAPSHOT_ESTOQUE is not None:
+        return float(SNAPSHOT_ESTOQUE.preco(sku_partner) or 1.0)
+
     code, data = get_json_with_retries(API_URL_STOCKS, params={"sku": sku_partner, "stockLocalId": STOCK_LOCAL_ID}, headers=HEADERS)
     if code != 200 or not isinstance(data, (dict, list)):
         print(f"⚠️  Falha ao buscar preço do SKU {sku_partner}: HTTP {code}")
@@ -111,34 +89,52 @@ def fetch_price_from_stocks(sku_partner):
     return 1.0
 
 
+# Busca o produto de origem (espelho do catálogo com --espelho, cache local, depois GET)
+def get_source_product(id_prod_hub):
+    produto_data = espelho.obter(TOKEN_ANY, id_prod_hub)
+    if produto_data is not None:
+        return produto_data
+
+    def _buscar():
+        url_get = API_URL_GET.format(id=id_prod_hub)
+        code, produto_data = get_json_with_retries(url_get, headers=HEADERS)
+        if code != 200 or not isinstance(produto_data, dict):
+            print(f"❌ Erro ao buscar produto {id_prod_hub}: HTTP {code}")
+            return None
+        espelho.guardar(TOKEN_ANY, produto_data)
+        return produto_data
+
+    return cache.obter_produto(TOKEN_ANY, id_prod_hub, _buscar)
+
+
 # ===================== PRINCIPAL =====================
 def clonar_produto_como_kit(id_prod_hub, novo_sku, novo_ean, sku_composicao):
-    url_get = API_URL_GET.format(id=id_prod_hub)
-    code, produto_data = get_json_with_retries(url_get, headers=HEADERS)
-
-    if code != 200 or not isinstance(produto_data, dict):
-        print(f"❌ Erro ao buscar produto {id_prod_hub}: HTTP {code}")
+    with metrics.etapa("get_produto"):
+        produto_data = get_source_product(id_prod_hub)
+    if not produto_data:
         return False
 
-    produto = sanitize_product_for_post(produto_data.copy())
-    produto['type'] = "KIT"
+    produto = sanitize_product_for_post(produto_data)
     produto['hasVariations'] = False
 
     # Preço base a partir do SKU de composição
-    preco_base = fetch_price_from_stocks(sku_composicao)
+    with metrics.etapa("preco"):
+        preco_base = fetch_price_from_stocks(sku_composicao)
     if preco_base <= 0:
         preco_base = 1.0
 
     # Resolve idSku do componente
-    id_sku_comp = resolve_sku_id_from_partner(sku_composicao)
+    with metrics.etapa("resolver_sku"):
+        id_sku_comp = resolve_sku_id_from_partner(sku_composicao)
     if not id_sku_comp:
         print(f"⚠️  Não foi possível resolver idSku para {sku_composicao}")
         return False
 
-    # Define o SKU principal
+    # Define o SKU principal (sem EAN na planilha: um da faixa reservada, se configurada)
+    novo_ean = eans.completar([str(novo_sku)], [novo_ean], origem=id_prod_hub)[0]
     produto['skus'] = [{
         "partnerId": str(novo_sku),
-        "ean": str(novo_ean or ""),
+        "ean": novo_ean,
         "title": (produto.get("title") or "") + " - KIT",
         "active": True,
         "amount": 1,
@@ -161,7 +157,14 @@ def clonar_produto_como_kit(id_prod_hub, novo_sku, novo_ean, sku_composicao):
     }]
 
     # Envio para criação
-    code_post, data_post = get_json_with_retries(API_URL_POST, headers=HEADERS, method="POST", data=json.dumps(produto))
+    # POST interrompido numa execução anterior (--resume): confere pelo novo_sku antes de reenviar
+    conferir_antes = journal.post_interrompido(novo_sku)
+    journal.registrar(novo_sku, "POST")
+    with metrics.etapa("payload"):
+        corpo = json.dumps(produto)
+    with metrics.etapa("post"):
+        # um timeout depois de gravado é conciliado pelo novo_sku em vez de reenviar o POST
+        code_post, data_post = client.criar_produto(HEADERS, corpo, novo_sku, conferir_antes=conferir_antes)
     if code_post in (200, 201):
         print(f"✅ KIT criado com sucesso: {novo_sku}")
         return True
@@ -172,38 +175,139 @@ def clonar_produto_como_kit(id_prod_hub, novo_sku, novo_ean, sku_composicao):
 
 # ===================== EXECUÇÃO VIA PLANILHA =====================
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Criador de kits AnyMarket a partir de planilha")
+    parser.add_argument("planilha", nargs="?", default=PLANILHA, help="caminho da planilha (.xlsx/.csv)")
+    parser.add_argument("--workers", type=int, default=WORKERS_PADRAO,
+                        help="linhas processadas ao mesmo tempo (padrão: %(default)s)")
+    parser.add_argument("--cache", action="store_true",
+                        help="reaproveita produtos de origem buscados há pouco (cache local, validade ANY_CACHE_TTL)")
+    parser.add_argument("--somente-cache", action="store_true",
+                        help="lê produtos de origem só do cache (nenhum GET de produto)")
+    parser.add_argument("--construir-indice", action="store_true",
+                        help="pagina o catálogo da conta e monta o índice local de SKUs antes de começar")
+    parser.add_argument("--snapshot-estoque", action="store_true",
+                        help="baixa todo o estoque do STOCK_LOCAL_ID de uma vez e precifica localmente")
+    parser.add_argument("--atualizar-snapshot", action="store_true",
+                        help="ignora o snapshot de estoque gravado e baixa de novo")
+    parser.add_argument("--resume", action="store_true",
+                        help="retoma a execução anterior desta planilha: pula linhas já concluídas")
+    parser.add_argument("--metricas-json", metavar="ARQUIVO", help="grava o resumo de latências/status em JSON")
+    parser.add_argument("--preflight", action="store_true",
+                        help="antes de qualquer POST, rejeita linhas cujo SKU/EAN já existe na conta ou se repete na planilha")
+    parser.add_argument("--espelho", action="store_true",
+                        help="lê os produtos de origem do espelho local do catálogo (python -m copysku.espelho)")
+    parser.add_argument("--validar", action="store_true",
+                        help="valida a planilha inteira antes de começar e pula as linhas com erro (copysku.validacao)")
+    parser.add_argument("--so-validar", action="store_true", help="só valida a planilha e sai (nenhuma requisição)")
+    parser.add_argument("--relatorio-validacao", metavar="CSV", help="grava o relatório completo da validação")
+    args = parser.parse_args()
+    if args.cache or args.somente_cache:
+        cache.configurar(somente_cache=args.somente_cache)
+    if args.espelho:
+        espelho.configurar()
+
     print("=== CRIADOR DE KITS ANYMARKET ===")
 
-    planilha = r"C:\__AUTOMAÇÕES\Copy-SKU-Any\Copy-SKU-ANY\COPY SIMPLE P KIT\kits.xlsx"
+    planilha = args.planilha
 
+    # validação local da planilha inteira, antes de qualquer requisição
+    invalidas = {}
+    if args.validar or args.so_validar:
+        if planilha == "-":
+            print("❌ A validação precisa do arquivo da planilha (não funciona com a entrada padrão)")
+            exit(1)
+        try:
+            invalidas = validacao.conferir(planilha, "planilha", args.relatorio_validacao)
+        except ValueError as e:
+            print(f"❌ {e}")
+            exit(1)
+        except Exception as e:
+            print("❌ Erro ao abrir planilha:", e)
+            exit(1)
+        if args.so_validar:
+            exit(1 if invalidas else 0)
+
+    if args.construir_indice:
+        print("🔎 Montando índice local de SKUs...")
+        print(f"✅ {get_indice().construir(TOKEN_ANY)} SKUs indexados")
+
+    if args.snapshot_estoque or args.atualizar_snapshot:
+        SNAPSHOT_ESTOQUE = obter_snapshot(TOKEN_ANY, STOCK_LOCAL_ID, forcar=args.atualizar_snapshot)
+        print(f"📦 Snapshot de estoque {STOCK_LOCAL_ID}: {len(SNAPSHOT_ESTOQUE)} SKUs "
+              f"(gerado há {SNAPSHOT_ESTOQUE.idade_segundos() / 60:.0f} min)")
+
+    obrigatorias = ['id_prod_hub', 'novo_sku', 'novo_ean', 'sku_composicao']
     try:
-        if planilha.lower().endswith((".xlsx", ".xls")):
-            df = pd.read_excel(planilha, dtype=str)
-        else:
-            df = pd.read_csv(planilha, dtype=str)
+        # leitura em streaming: as linhas vão para o processamento conforme são lidas
+        linhas = ler_linhas(planilha, obrigatorias)
+    except ValueError as e:
+        print(f"❌ {e}")
+        exit(1)
     except Exception as e:
         print("❌ Erro ao abrir planilha:", e)
         exit(1)
 
-    obrigatorias = ['id_prod_hub', 'novo_sku', 'novo_ean', 'sku_composicao']
-    for col in obrigatorias:
-        if col not in df.columns:
-            print(f"❌ Coluna obrigatória ausente: {col}")
-            exit(1)
+    anteriores = journal.abrir(planilha, retomar=args.resume)
+    if args.resume:
+        print(f"🔁 Retomando: {anteriores.get('SUCCESS', 0)} linhas já concluídas serão puladas")
 
-    total = len(df)
-    sucesso = 0
-
-    for i, row in df.iterrows():
+    def _processar(item):
+        i, row = item
         id_prod = row['id_prod_hub']
         novo_sku = row['novo_sku']
         novo_ean = row['novo_ean']
         sku_comp = row['sku_composicao']
 
-        print(f"\n➡️ [{i+1}/{total}] Criando KIT {novo_sku} com base em {id_prod} (composição: {sku_comp})")
-        if clonar_produto_como_kit(id_prod, novo_sku, novo_ean, sku_comp):
-            sucesso += 1
-
-        time.sleep(REQUEST_DELAY)
+        with journal.linha(i):
+            if journal.concluido(novo_sku):
+                return True
+            print(f"\n➡️ [{i}] Criando KIT {novo_sku} com base em {id_prod} (composição: {sku_comp})")
+            journal.registrar(novo_sku, "INICIADO")
+            try:
+                with metrics.etapa("linha"):
+                    ok = clonar_produto_como_kit(id_prod, novo_sku, novo_ean, sku_comp)
+            except Exception as e:
+                print(f"❌ Erro inesperado em {novo_sku}: {e}")
+                ok = False
+            journal.registrar(novo_sku, "FIM", "SUCCESS" if ok else "ERROR")
+        return ok
+
+    itens = enumerate(linhas, start=1)
+    rejeitadas = set()
+    if invalidas:
+        validos = []
+        for i, row in itens:
+            if i not in invalidas:
+                validos.append((i, row))
+                continue
+            with journal.linha(i):
+                if not journal.concluido(row['novo_sku']):
+                    print(f"❌ [{i}] {row['novo_sku']} fora do lote: {invalidas[i]}")
+                    rejeitadas.add(i)
+                    journal.registrar(row['novo_sku'], "FIM", "INVALID")
+        itens = validos
+    if args.preflight:
+        # confere o lote inteiro antes de qualquer POST (linhas já concluídas no --resume não entram)
+        itens = list(itens)
+        pendentes = []
+        for i, row in itens:
+            with journal.linha(i):
+                if not journal.concluido(row['novo_sku']):
+                    pendentes.append((i, row))
+
+        def _rejeitar(i, row, motivo):
+            rejeitadas.add(i)
+            with journal.linha(i):
+                journal.registrar(row['novo_sku'], "FIM", "REJECTED")
+
+        preflight.aplicar(pendentes, [TOKEN_ANY], ao_rejeitar=_rejeitar)
+        itens = [(i, row) for i, row in itens if i not in rejeitadas]
+
+    resultados = executar_em_paralelo(itens, _processar, workers=args.workers)
+    sucesso = sum(1 for ok in resultados if ok)
+    total = len(resultados) + len(rejeitadas)
 
     print(f"\n✅ Finalizado! {sucesso}/{total} kits criados com sucesso.")
+    metrics.imprimir_resumo()
+    if args.metricas_json:
+        metrics.salvar_json(args.metricas_json)
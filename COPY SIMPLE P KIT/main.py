@@ -1,13 +1,16 @@
-import requests
 import json
 from dotenv import load_dotenv
 import os
+import sys
+
+# Pasta raiz do repositório (onde fica o pacote copysku)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from copysku import client, perfis
 
 load_dotenv()
 
 # Configurações da API
-API_URL_GET = "https://api.anymarket.com.br/v2/products/{id}"
-API_URL_POST = "https://api.anymarket.com.br/v2/products"
+API_URL_GET = "/v2/products/{id}"
 
 TOKEN_ANY = "MjU5MDYzNTc1Lg==.MUfqIGh9hJCl8gZ0ji+YXHX7aX1SucmOJntr/d0/QjNRjd8WVDk1nXie3s2dX4yf99em09OD7rCS1OYo8Ek+Mw=="  # pode trocar para ANY_2 se quiser
 
@@ -19,37 +22,22 @@ HEADERS = {
 def clonar_produto_como_kit(id_prod_hub, novo_sku, novo_ean, sku_composicao, preco_kit=None):
     # 1. Buscar produto pelo ID
     url_get = API_URL_GET.format(id=id_prod_hub)
-    response = requests.get(url_get, headers=HEADERS)
+    response = client.get(url_get, headers=HEADERS)
 
     if response.status_code != 200:
         print("❌ Erro ao buscar produto:", response.status_code, response.text)
         return
 
-    produto = response.json()
-
-    # 2. Remover campos que não podem ser enviados
-    for campo in ['id', 'creationDate', 'modificationDate', 'dataSource', 'stockLocalId']:
-        produto.pop(campo, None)
-        produto.pop('brand', None)
-
-    # 3. Forçar que seja KIT
-    produto['type'] = "KIT"
+    origem = response.json()
 
-    # 4. Atualizar SKU principal
-    if 'sku' in produto and isinstance(produto['sku'], dict):
-        produto['sku']['partnerId'] = novo_sku
-        produto['sku']['ean'] = novo_ean
-    else:
-        produto['sku'] = {
-            'partnerId': novo_sku,
-            'ean': novo_ean
-        }
+    # 2-4. Payload KIT: campos removidos, type KIT e SKU principal novo (ver copysku/perfis.py)
+    produto = perfis.transformar("KIT_SIMPLES", origem, novo_sku=novo_sku, novo_ean=novo_ean)
 
     # 5. Substituir lista de SKUs por apenas o SKU novo do kit
     # Herdamos preço do primeiro SKU original, se existir
     preco_base = 0
-    if 'skus' in produto and isinstance(produto['skus'], list) and len(produto['skus']) > 0:
-        preco_base = produto['skus'][0].get("sellPrice") or produto['skus'][0].get("price") or 0
+    if 'skus' in origem and isinstance(origem['skus'], list) and len(origem['skus']) > 0:
+        preco_base = origem['skus'][0].get("sellPrice") or origem['skus'][0].get("price") or 0
 
     produto['skus'] = [
         {
@@ -83,12 +71,12 @@ def clonar_produto_como_kit(id_prod_hub, novo_sku, novo_ean, sku_composicao, pre
     print("\n✅ JSON FINAL ENVIADO (KIT):")
     print(json.dumps(produto, indent=2, ensure_ascii=False))
 
-    # 9. POST para criar produto como kit
-    post = requests.post(API_URL_POST, headers=HEADERS, data=json.dumps(produto))
-    if post.status_code == 201:
+    # 9. POST para criar produto como kit (retries; resposta perdida é conciliada pelo novo SKU)
+    code, resposta = client.criar_produto(HEADERS, json.dumps(produto), novo_sku)
+    if code in (200, 201):
         print(f"✅ Produto KIT {novo_sku} criado com sucesso!")
     else:
-        print("❌ Erro ao criar KIT:", post.status_code, post.text)
+        print("❌ Erro ao criar KIT:", code, resposta)
 
 
 # Execução via terminal
@@ -1,14 +1,19 @@
 # copy_kit_from_excel.py
-import requests
+import argparse
 import json
-import pandas as pd
-import time
-import csv
 import os
+import sys
+import time
+
+# Pasta raiz do repositório (onde fica o pacote copysku)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from copysku import cache, client, eans, espelho, journal, metrics, perfis, preflight, validacao
+from copysku.batch import WORKERS_PADRAO, executar_em_paralelo, ler_linhas
+from copysku.resultlog import LogCompacto
+from copysku.variacoes import achatar_variacoes, letter_suffix
 
 # ========== CONFIGURAÇÕES ==========
-API_URL_GET = "https://api.anymarket.com.br/v2/products/{id}"
-API_URL_POST = "https://api.anymarket.com.br/v2/products"
+API_URL_GET = "/v2/products/{id}"
 
 # Token fixo (troque se necessário)
 TOKEN_ANY = "MjU5MDYzNTc1Lg==.MUfqIGh9hJCl8gZ0ji+YXHX7aX1SucmOJntr/d0/QjNRjd8WVDk1nXie3s2dX4yf99em09OD7rCS1OYo8Ek+Mw=="
@@ -18,8 +23,10 @@ HEADERS = {
     "gumgaToken": TOKEN_ANY
 }
 
-LOG_FILE = "log_resultados.csv"
-REQUEST_DELAY = 1.2
+LOG_FILE = "log_resultados.jsonl"
+# Pasta para os corpos completos das respostas (opcional, --corpos)
+CORPOS_DIR = None
+PLANILHA = r"C:\__AUTOMAÇÕES\Copy-SKU-Any\Copy-SKU-ANY\COPY SIMPLE P KIT\kits.xlsx"
 # ===================================
 
 
@@ -55,32 +62,36 @@ def parse_list_field(cell_value):
 
 
 def sanitize_product_for_post(prod):
-    """Remove campos que geralmente quebram a criação (ID, datas, stockLocalId, additionalStocks...)."""
-    keys_to_remove = [
-        "id", "creationDate", "modificationDate", "dataSource",
-        "stockLocalId", "partnerId", "allowAutomaticSkuMarketplaceCreation",
-        "calculatedPrice", "isProductActive", "additionalStocks"
-    ]
-    for k in keys_to_remove:
-        prod.pop(k, None)
-    # Marca/brand costuma precisar ser um objeto válido; removendo evita 422
-    prod.pop("brand", None)
-    return prod
+    """
+    Payload base do KIT: sem ID, datas, stockLocalId, additionalStocks, kitItens...
+    (perfil KIT em copysku/perfis.py). Devolve um dict novo; 'prod' não é alterado.
+    """
+    return perfis.transformar("KIT", prod)
 
 
 def get_product_by_id(product_id):
     """
     Busca o produto pelo ID (ou SKU, se for apenas numérico e não existir como ID).
+    Usa o espelho do catálogo (--espelho) e o cache local de produtos antes de ir à API.
     """
+    produto = espelho.obter(TOKEN_ANY, product_id)
+    if produto is not None:
+        return produto
+    return cache.obter_produto(TOKEN_ANY, product_id, lambda: _fetch_product_by_id(product_id))
+
+
+def _fetch_product_by_id(product_id):
     url = API_URL_GET.format(id=product_id)
-    r = requests.get(url, headers=HEADERS)
+    r = client.get(url, headers=HEADERS)
     if r.status_code == 200:
-        return r.json()
+        produto = r.json()
+        espelho.guardar(TOKEN_ANY, produto)
+        return produto
     elif r.status_code == 404:
         # tentar buscar pelo partnerId (sku)
         print(f"⚠️ Produto {product_id} não encontrado por ID, tentando buscar por partnerId...")
-        url_sku = f"https://api.anymarket.com.br/v2/products?sku={product_id}"
-        r2 = requests.get(url_sku, headers=HEADERS)
+        url_sku = f"/v2/products?sku={product_id}"
+        r2 = client.get(url_sku, headers=HEADERS)
         if r2.status_code == 200:
             data = r2.json()
             if 'content' in data and len(data['content']) > 0:
@@ -89,20 +100,9 @@ def get_product_by_id(product_id):
     return None
 
 
-def letter_suffix(idx):
-    """Gera sufixos A, B, C..."""
-    s = ""
-    n = idx + 1
-    while n > 0:
-        n, rem = divmod(n - 1, 26)
-        s = chr(65 + rem) + s
-    return s
-
-
 def create_kit_from_simple(produto, novo_sku, novo_ean, comp_list):
     """Cria KIT simples baseado no produto original."""
-    p = sanitize_product_for_post(produto.copy())
-    p['type'] = "KIT"
+    p = sanitize_product_for_post(produto)
 
     preco_base = produto['skus'][0].get('cost') or produto['skus'][0].get('sellPrice') or produto['skus'][0].get('price') or 0
     if not preco_base or preco_base <= 0:
@@ -130,8 +130,7 @@ def create_kit_from_variation(produto, novos_skus, novos_eans):
     Cria KIT VARIATION: um SKU por variação do produto original.
     'novos_skus' e 'novos_eans' são listas (podem ser menores que o nº de variações).
     """
-    p = sanitize_product_for_post(produto.copy())
-    p['type'] = "KIT"
+    p = sanitize_product_for_post(produto)
     p['hasVariations'] = True
 
     # Captura tipos de variação (ex.: Cor, Tamanho)
@@ -148,33 +147,29 @@ def create_kit_from_variation(produto, novos_skus, novos_eans):
     if variations_types:
         p['variations'] = variations_types
 
-    new_skus = []
+    # partnerId exclusivo por variação
+    partners = []
     for i, orig_sku in enumerate(produto.get('skus', [])):
-        # partnerId/ ean exclusivos por variação
         if i < len(novos_skus) and novos_skus[i]:
-            partner_new = str(novos_skus[i])
+            partners.append(str(novos_skus[i]))
         elif novos_skus:
             # usa o primeiro + sufixo A,B,C... para garantir unicidade
-            partner_new = str(novos_skus[0]) + letter_suffix(i)
+            partners.append(str(novos_skus[0]) + letter_suffix(i))
         else:
             # fallback: base no original + sufixo
-            partner_new = str(orig_sku.get('partnerId') or orig_sku.get('id')) + letter_suffix(i)
+            partners.append(str(orig_sku.get('partnerId') or orig_sku.get('id')) + letter_suffix(i))
+    # EAN exclusivo por variação: o da planilha ou um da faixa reservada (nunca o da 1ª variação repetido)
+    eans_novos = eans.completar(partners, novos_eans, origem=produto.get('id'))
 
-        if i < len(novos_eans) and novos_eans[i]:
-            ean_new = str(novos_eans[i])
-        else:
-            ean_new = (str(novos_eans[0]) if novos_eans else "")
+    new_skus = []
+    for i, orig_sku in enumerate(produto.get('skus', [])):
+        partner_new = partners[i]
+        ean_new = eans_novos[i]
 
         preco_base = orig_sku.get('cost') or orig_sku.get('price') or orig_sku.get('sellPrice') or 1
 
         # Normaliza variações no formato exigido
-        sku_variations = {}
-        if 'variations' in orig_sku:
-            for var in orig_sku['variations']:
-                if 'type' in var and 'description' in var:
-                    variation_name = var['type']['name']
-                    variation_value = var['description']
-                    sku_variations[variation_name] = variation_value
+        sku_variations = achatar_variacoes(orig_sku.get('variations'))
 
         new_sku_obj = {
             "partnerId": partner_new,
@@ -194,27 +189,44 @@ def create_kit_from_variation(produto, novos_skus, novos_eans):
     return p
 
 
-def post_product(payload):
-    r = requests.post(API_URL_POST, headers=HEADERS, data=json.dumps(payload))
-    return r.status_code, r.text
+def post_product(payload, conferir_antes=False):
+    """
+    POST com retries; depois de um timeout/5xx confere pelo partnerId do
+    primeiro SKU se o produto já foi criado antes de reenviar.
+    conferir_antes=True (POST interrompido no --resume): confere já antes do primeiro envio.
+    """
+    # todo SKU do payload tem partnerId (create_kit_from_*), então sempre há por onde conciliar
+    partner_id = payload['skus'][0]['partnerId']
+    return client.criar_produto(HEADERS, json.dumps(payload), partner_id, conferir_antes=conferir_antes)
+
+
+_logs = {}
+
 
+def write_log_row(log_path, row, latencia=None):
+    """row = [id_prod_hub, novo_sku, status, http_code, message] -> linha compacta no JSONL."""
+    log = _logs.get(log_path)
+    if log is None:
+        log = _logs.setdefault(log_path, LogCompacto(log_path, pasta_corpos=CORPOS_DIR))
+    id_prod_hub, novo_sku, status, http_code, message = row
+    log.escrever({"id_prod_hub": id_prod_hub, "novo_sku": novo_sku, "status": status, "http_code": http_code},
+                 corpo=message, latencia=latencia)
 
-def write_log_row(log_path, row):
-    file_exists = os.path.isfile(log_path)
-    with open(log_path, mode='a', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        if not file_exists:
-            writer.writerow(["id_prod_hub", "novo_sku", "status", "http_code", "message"])
-        writer.writerow(row)
+
+def close_logs():
+    for log in _logs.values():
+        log.close()
 
 
 def process_row(id_prod_hub, novo_sku_cell, novo_ean_cell, sku_composicao_cell):
-    produto = get_product_by_id(id_prod_hub)
+    with metrics.etapa("get_produto"):
+        produto = get_product_by_id(id_prod_hub)
     if not produto:
         msg = f"Falha ao buscar produto id {id_prod_hub}"
         print(msg)
         write_log_row(LOG_FILE, [id_prod_hub, novo_sku_cell, "ERROR_GET_PRODUCT", "", msg])
-        return
+        journal.registrar(novo_sku_cell, "GET", "ERROR_GET_PRODUCT")
+        return False
 
     has_variations = produto.get("hasVariations") or produto.get("type") == "VARIATION"
 
@@ -225,21 +237,31 @@ def process_row(id_prod_hub, novo_sku_cell, novo_ean_cell, sku_composicao_cell):
 
     if has_variations:
         print(f"Produto {id_prod_hub} é VARIATION -> criando produto VARIATION com variações replicadas.")
-        payload = create_kit_from_variation(produto, novos_skus, novos_eans)
+        with metrics.etapa("payload"):
+            payload = create_kit_from_variation(produto, novos_skus, novos_eans)
 
         print("Payload resumido para envio:")
         debug_keys = {k: payload.get(k) for k in ["title", "type", "skus", "kitItens", "variations"] if k in payload}
         print(json.dumps(debug_keys, indent=2, ensure_ascii=False))
 
-        code, text = post_product(payload)
+        conferir_antes = journal.post_interrompido(novo_sku_cell)
+        journal.registrar(novo_sku_cell, "POST")
+        inicio = time.perf_counter()
+        code, text = post_product(payload, conferir_antes)
+        latencia = time.perf_counter() - inicio
+        metrics.registrar_latencia("post", latencia)
         if code in (200, 201):
             ok_sku = ",".join(novos_skus) if novos_skus else "(auto)"
             print(f"✅ Sucesso criando {ok_sku} (HTTP {code})")
-            write_log_row(LOG_FILE, [id_prod_hub, ok_sku, "SUCCESS", code, text])
+            write_log_row(LOG_FILE, [id_prod_hub, ok_sku, "SUCCESS", code, text], latencia)
+            journal.registrar(novo_sku_cell, "FIM", "SUCCESS", code)
+            return True
         else:
             err_sku = ",".join(novos_skus) if novos_skus else "(auto)"
             print(f"❌ Erro criando {err_sku}: HTTP {code} -> {text}")
-            write_log_row(LOG_FILE, [id_prod_hub, err_sku, "ERROR", code, text])
+            write_log_row(LOG_FILE, [id_prod_hub, err_sku, "ERROR", code, text], latencia)
+            journal.registrar(novo_sku_cell, "FIM", "ERROR", code)
+            return False
 
     else:
         print(f"Produto {id_prod_hub} é SIMPLE -> criando KIT(s) simples.")
@@ -253,68 +275,188 @@ def process_row(id_prod_hub, novo_sku_cell, novo_ean_cell, sku_composicao_cell):
 
         # Se vierem vários novos SKUs, cria um produto por SKU
         target_skus = novos_skus if novos_skus else [str(novo_sku_cell)]
+        target_eans = eans.completar(target_skus, novos_eans, origem=id_prod_hub)
+        todos_ok = True
         for i, ns in enumerate(target_skus):
-            ne = novos_eans[i] if i < len(novos_eans) else (novos_eans[0] if novos_eans else "")
-            payload = create_kit_from_simple(produto, ns, ne, comp_list)
+            if journal.concluido(ns):
+                print(f"⏭️  {ns} já criado em execução anterior")
+                continue
+            ne = target_eans[i]
+            with metrics.etapa("payload"):
+                payload = create_kit_from_simple(produto, ns, ne, comp_list)
 
             print("Payload resumido para envio:")
             debug_keys = {k: payload.get(k) for k in ["title", "type", "skus", "kitItens", "variations"] if k in payload}
             print(json.dumps(debug_keys, indent=2, ensure_ascii=False))
 
-            code, text = post_product(payload)
+            conferir_antes = journal.post_interrompido(ns)
+            journal.registrar(ns, "POST")
+            inicio = time.perf_counter()
+            code, text = post_product(payload, conferir_antes)
+            latencia = time.perf_counter() - inicio
+            metrics.registrar_latencia("post", latencia)
             if code in (200, 201):
                 print(f"✅ Sucesso criando {ns} (HTTP {code})")
-                write_log_row(LOG_FILE, [id_prod_hub, ns, "SUCCESS", code, text])
+                write_log_row(LOG_FILE, [id_prod_hub, ns, "SUCCESS", code, text], latencia)
+                journal.registrar(ns, "FIM", "SUCCESS", code)
             else:
                 print(f"❌ Erro criando {ns}: HTTP {code} -> {text}")
-                write_log_row(LOG_FILE, [id_prod_hub, ns, "ERROR", code, text])
-            time.sleep(REQUEST_DELAY)
+                write_log_row(LOG_FILE, [id_prod_hub, ns, "ERROR", code, text], latencia)
+                journal.registrar(ns, "FIM", "ERROR", code)
+                todos_ok = False
+        return todos_ok
+
+
+def planejados(row):
+    """SKUs/EANs que a linha vai criar (listas separadas por vírgula ou '/')."""
+    return parse_list_field(row['novo_sku']), parse_list_field(row.get('novo_ean', ""))
+
+
+def preflight_linhas(itens):
+    """
+    Confere o lote inteiro antes de qualquer POST e devolve os itens sem as
+    linhas rejeitadas, que vão para o log como REJECTED. Linhas já concluídas
+    (--resume) não são conferidas.
+    """
+    pendentes = []
+    for idx, row in itens:
+        with journal.linha(idx):
+            if not journal.concluido(row['novo_sku']):
+                pendentes.append((idx, row))
+
+    rejeitadas = set()
+
+    def _rejeitar(idx, row, motivo):
+        rejeitadas.add(idx)
+        with journal.linha(idx):
+            write_log_row(LOG_FILE, [row['id_prod_hub'], row['novo_sku'], "REJECTED", "", motivo])
+            journal.registrar(row['novo_sku'], "FIM", "REJECTED")
+
+    preflight.aplicar(pendentes, [TOKEN_ANY], planejados, ao_rejeitar=_rejeitar)
+    return [(idx, row) for idx, row in itens if idx not in rejeitadas]
+
+
+def descartar_invalidas(itens, invalidas):
+    """
+    Tira do lote as linhas com erro na validação (copysku.validacao), que vão
+    para o log como INVALID. Linhas já concluídas (--resume) seguem como estão.
+    """
+    validos = []
+    for idx, row in itens:
+        if idx not in invalidas:
+            validos.append((idx, row))
+            continue
+        with journal.linha(idx):
+            if journal.concluido(row['novo_sku']):
+                continue
+            write_log_row(LOG_FILE, [row['id_prod_hub'], row['novo_sku'], "INVALID", "", invalidas[idx]])
+            journal.registrar(row['novo_sku'], "FIM", "INVALID")
+    return validos
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Copy KIT from Excel (AnyMarket)")
+    parser.add_argument("planilha", nargs="?", default=PLANILHA, help="caminho da planilha (.xlsx/.csv)")
+    parser.add_argument("--workers", type=int, default=WORKERS_PADRAO,
+                        help="linhas processadas ao mesmo tempo (padrão: %(default)s)")
+    parser.add_argument("--cache", action="store_true",
+                        help="reaproveita produtos de origem buscados há pouco (cache local, validade ANY_CACHE_TTL)")
+    parser.add_argument("--somente-cache", action="store_true",
+                        help="lê produtos de origem só do cache (nenhum GET de produto)")
+    parser.add_argument("--resume", action="store_true",
+                        help="retoma a execução anterior desta planilha: pula linhas já concluídas e mantém o log")
+    parser.add_argument("--metricas-json", metavar="ARQUIVO", help="grava o resumo de latências/status em JSON")
+    parser.add_argument("--corpos", metavar="PASTA",
+                        help="guarda o corpo completo de cada resposta (gzip, endereçado por hash) nesta pasta")
+    parser.add_argument("--preflight", action="store_true",
+                        help="antes de qualquer POST, rejeita linhas cujo SKU/EAN já existe na conta ou se repete na planilha")
+    parser.add_argument("--espelho", action="store_true",
+                        help="lê os produtos de origem do espelho local do catálogo (python -m copysku.espelho)")
+    parser.add_argument("--validar", action="store_true",
+                        help="valida a planilha inteira antes de começar e pula as linhas com erro (copysku.validacao)")
+    parser.add_argument("--so-validar", action="store_true", help="só valida a planilha e sai (nenhuma requisição)")
+    parser.add_argument("--relatorio-validacao", metavar="CSV", help="grava o relatório completo da validação")
+    args = parser.parse_args()
+    global CORPOS_DIR
+    CORPOS_DIR = args.corpos
+    if args.cache or args.somente_cache:
+        cache.configurar(somente_cache=args.somente_cache)
+    if args.espelho:
+        espelho.configurar()
+
     print("=== COPY KIT FROM EXCEL (AnyMarket) ===")
-    # ajuste o caminho da sua planilha aqui:
-    planilha = r"C:\__AUTOMAÇÕES\Copy-SKU-Any\Copy-SKU-ANY\COPY SIMPLE P KIT\kits.xlsx"
+    planilha = args.planilha
+    expected = ['id_prod_hub', 'novo_sku', 'novo_ean', 'sku_composicao']
     try:
-        if planilha.lower().endswith((".xlsx", ".xls")):
-            df = pd.read_excel(planilha, dtype=str)
-        else:
-            try:
-                df = pd.read_csv(planilha, dtype=str)
-            except Exception:
-                df = pd.read_csv(planilha, sep=";", dtype=str)
+        # leitura em streaming: as linhas vão para o processamento conforme são lidas
+        linhas = ler_linhas(planilha, expected)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return
     except Exception as e:
         print("❌ Erro ao abrir planilha:", e)
         return
 
-    expected = ['id_prod_hub', 'novo_sku', 'novo_ean', 'sku_composicao']
-    for col in expected:
-        if col not in df.columns:
-            print(f"❌ Coluna obrigatória ausente: {col}")
+    invalidas = None
+    if args.validar or args.so_validar:
+        if planilha == "-":
+            print("❌ A validação precisa do arquivo da planilha (não funciona com a entrada padrão)")
+            return
+        try:
+            invalidas = validacao.conferir(planilha, "variations", args.relatorio_validacao)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return
+        except Exception as e:
+            print("❌ Erro ao abrir planilha:", e)
             return
+        if args.so_validar:
+            sys.exit(1 if invalidas else 0)
 
-    if os.path.exists(LOG_FILE):
+    anteriores = journal.abrir(planilha, retomar=args.resume)
+    if args.resume:
+        print(f"🔁 Retomando: {anteriores.get('SUCCESS', 0)} linhas já concluídas serão puladas")
+    elif os.path.exists(LOG_FILE):
         os.remove(LOG_FILE)
 
-    total = len(df)
-    print(f"Iniciando processamento de {total} linhas...")
-    for idx, row in df.iterrows():
+    print(f"Iniciando processamento de {planilha} (workers={args.workers})...")
+
+    def _processar(item):
+        idx, row = item
         id_prod = row['id_prod_hub']
         novo_sku_cell = row['novo_sku']
-        novo_ean_cell = row['novo_ean'] if 'novo_ean' in row and not pd.isna(row['novo_ean']) else ""
-        sku_comp_cell = row['sku_composicao'] if 'sku_composicao' in row else ""
-
-        print(f"\n[{idx+1}/{total}] id_prod_hub={id_prod} novo_sku={novo_sku_cell} novo_ean={novo_ean_cell} sku_composicao={sku_comp_cell}")
-        try:
-            process_row(id_prod, novo_sku_cell, novo_ean_cell, sku_comp_cell)
-        except Exception as ex:
-            print("❌ Erro inesperado:", ex)
-            write_log_row(LOG_FILE, [id_prod, novo_sku_cell, "EXCEPTION", "", str(ex)])
+        novo_ean_cell = row.get('novo_ean', "")
+        sku_comp_cell = row.get('sku_composicao', "")
+
+        with journal.linha(idx):
+            if journal.concluido(novo_sku_cell):
+                return
+            print(f"\n[{idx}] id_prod_hub={id_prod} novo_sku={novo_sku_cell} novo_ean={novo_ean_cell} sku_composicao={sku_comp_cell}")
+            journal.registrar(novo_sku_cell, "INICIADO")
+            try:
+                with metrics.etapa("linha"):
+                    ok = process_row(id_prod, novo_sku_cell, novo_ean_cell, sku_comp_cell)
+                journal.registrar(novo_sku_cell, "FIM", "SUCCESS" if ok else "ERROR")
+            except Exception as ex:
+                print("❌ Erro inesperado:", ex)
+                write_log_row(LOG_FILE, [id_prod, novo_sku_cell, "EXCEPTION", "", str(ex)])
+                journal.registrar(novo_sku_cell, "FIM", "EXCEPTION")
+
+    itens = enumerate(linhas, start=1)
+    if invalidas:
+        itens = descartar_invalidas(itens, invalidas)
+    if args.preflight:
+        itens = preflight_linhas(list(itens))
 
-        time.sleep(REQUEST_DELAY)
+    try:
+        executar_em_paralelo(itens, _processar, workers=args.workers)
+    finally:
+        close_logs()
 
     print("\nProcessamento finalizado. Verifique", LOG_FILE)
-
+    metrics.imprimir_resumo()
+    if args.metricas_json:
+        metrics.salvar_json(args.metricas_json)
 
 if __name__ == "__main__":
     main()
@@ -1,9 +1,9 @@
-import requests
+import argparse
+from copysku import categorias, client, espelho, marcas, perfis, variacoes
+from copysku.batch import WORKERS_PADRAO, clonar_lote
 import json
 
 # Configurações da API
-API_URL_GET = "https://api.anymarket.com.br/v2/products/{id}"
-API_URL_POST = "https://api.anymarket.com.br/v2/products"
 ANY_1 = "MjU5MDI2OTI0Lg==.asoTJuVGMrSd0RgmE9g0t6/dr59T9NtemzSF5huGWX1FsZJJgrrsadK1JI41YmTeTswenQ7VaHd93r0Q52q7AQ=="  # Substitua pelo seu token real
 ANY_2 = "MjU5MDQ3MzU2Lg==.ANGIbLEHFMmZlfjZZY80eE+J9sf38bUsHEEVDEFV+GTo0ElgRgiK7hlMXu0n6SjiGY+J7RjJvXu9PagjZNNrnQ=="
 
@@ -18,93 +18,93 @@ HEADERS_DESTINO = {
     "gumgaToken": ANY_2
 }
 
-# Categoria padrão da conta destino
-CATEGORIA_PADRAO_ID = 1465880
+# Perfil de destino (categoria, campos removidos, variações): ver copysku/perfis.py
+TRANSFORMAR = perfis.compilar("ANY_2_VARIACOES")
 
-# Função para limpar campos que causam erro
-def limpar_campos(produto):
-    for campo in ['id', 'creationDate', 'modificationDate', 'dataSource']:
-        produto.pop(campo, None)
-    return produto
 
+def clonar_produto_com_variacoes(id_prod_hub, novo_sku_pai, novo_ean_pai, novos_por_variacao=None, mostrar_json=True):
+    # novos_por_variacao(i, sku_item) -> (novo_sku, novo_ean); padrão: pergunta no terminal
+    if novos_por_variacao is None:
+        novos_por_variacao = variacoes.pedir_no_terminal()
 
-
-def clonar_produto_com_variacoes(id_prod_hub, novo_sku_pai, novo_ean_pai):
     # 1. Buscar produto original
-    url_get = API_URL_GET.format(id=id_prod_hub)
-    response = requests.get(url_get, headers=HEADERS_ORIGEM)
+    code, origem = espelho.buscar_produto(ANY_1, id_prod_hub)  # espelho local com --espelho, senão GET
 
-    if response.status_code != 200:
-        print("\u274c Erro ao buscar produto:", response.status_code, response.text)
-        return
+    if code != 200:
+        print("\u274c Erro ao buscar produto:", code, origem)
+        return code, origem
 
-    produto = response.json()
-    produto = limpar_campos(produto)
+    # 2-4. Payload do destino: SKU pai, campos removidos e cada variação com seu novo SKU/EAN
+    if isinstance(origem.get('skus'), list):
+        print(f"\n🔁 Produto tem {len(origem['skus'])} variação(oes):")
 
-   
+    def _variacao(i, sku_item):
+        print(f"\n🔠 Variação {i + 1}/{len(origem['skus'])}")
+        novo_sku, novo_ean = novos_por_variacao(i, sku_item)
+        return {'partnerId': novo_sku, 'ean': novo_ean}
 
-    # 2. Substituir SKU pai
-    if 'sku' in produto and isinstance(produto['sku'], dict):
-        produto['sku']['partnerId'] = novo_sku_pai
-        produto['sku']['ean'] = novo_ean_pai
-    else:
-        produto['sku'] = {
-            'partnerId': novo_sku_pai,
-            'ean': novo_ean_pai
-        }
-
-    # 3. Processar SKUs de variação
-    if 'skus' in produto and isinstance(produto['skus'], list):
-        print(f"\n🔁 Produto tem {len(produto['skus'])} variação(oes):")
-        for i, sku_item in enumerate(produto['skus'], start=1):
-            print(f"\n🔠 Variação {i}/{len(produto['skus'])}")
-            novo_sku = input("Digite o novo SKU: ").strip()
-            novo_ean = input("Digite o novo EAN: ").strip()
-
-            # Remover campos problemáticos
-            for campo in ['id', 'idVariation', 'stockLocalId']:
-                sku_item.pop(campo, None)
-                produto.pop('brand', None)
-
-
-             # 2.2 Substituir categoria SEMPRE pela padrão (antes do POST)
-            produto['category'] = {"id": CATEGORIA_PADRAO_ID}
-
-            # Corrigir estrutura de variations
-            nova_variations = {}
-            if 'variations' in sku_item:
-                for var in sku_item['variations']:
-                    if 'type' in var and 'description' in var:
-                        variation_name = var['type']['name']
-                        variation_value = var['description']
-                        nova_variations[variation_name] = variation_value
-                if nova_variations:
-                    sku_item['variations'] = nova_variations
-
-            # Atualizar SKU e EAN
-            sku_item['partnerId'] = novo_sku
-            sku_item['ean'] = novo_ean
-
-    # 4. Marcar produto como com variações
-    produto['hasVariations'] = True
+    categoria = categorias.mapear(ANY_1, ANY_2, origem.get("category"))
+    marca = marcas.resolver(ANY_1, ANY_2, origem.get("brand"))
+    produto = TRANSFORMAR(origem, por_sku=_variacao, novo_sku=novo_sku_pai, novo_ean=novo_ean_pai,
+                          categoria=categoria, marca=marca)
 
     # 5. Mostrar JSON final para conferência
-    print("\n📆 JSON FINAL ENVIADO:")
-    print(json.dumps(produto, indent=2, ensure_ascii=False))
+    if mostrar_json:
+        print("\n📆 JSON FINAL ENVIADO:")
+        print(json.dumps(produto, indent=2, ensure_ascii=False))
 
-    # 6. Enviar POST para criar novo produto
-    post = requests.post(API_URL_POST, headers=HEADERS_DESTINO, data=json.dumps(produto))
+    # 6. Enviar POST para criar novo produto (retries; resposta perdida é conciliada
+    #    pelo partnerId da primeira variação)
+    partner_id = (produto.get('skus') or [{}])[0].get('partnerId') or novo_sku_pai
+    code, resposta = client.criar_produto(HEADERS_DESTINO, json.dumps(produto), partner_id)
 
-    if post.status_code == 201:
+    if code in (200, 201):
         print(f"\n✅ Produto com variações criado com sucesso!")
     else:
-        print("\u274c Erro ao criar produto:", post.status_code, post.text)
+        print("\u274c Erro ao criar produto:", code, resposta)
+    return code, resposta
 
-# Execução via terminal
+# Execução via terminal (interativa) ou em lote, sem perguntas por variação:
+#   --lote pais.csv (id_prod_hub, novo_sku, novo_ean) com --mapa mapa.csv
+#   (partnerId_origem, novo_sku, novo_ean) ou --regra-sufixo (novo_sku + A, B, C...)
 if __name__ == "__main__":
-    print("=== CLONAR PRODUTO COM VARIAÇÕES ===")
-    id_origem = input("Informe o ID do produto origem (id_prod_hub): ").strip()
-    novo_sku_pai = input("Digite o novo SKU para o produto pai: ").strip()
-    novo_ean_pai = input("Digite o novo EAN para o produto pai: ").strip()
+    parser = argparse.ArgumentParser(description="Clonar produto com variações (AnyMarket)")
+    parser.add_argument("--lote", help="CSV/XLSX de produtos pai: id_prod_hub,novo_sku,novo_ean ('-' lê da entrada padrão)")
+    parser.add_argument("--mapa", help="CSV/XLSX partnerId_origem,novo_sku,novo_ean com o SKU/EAN de cada variação")
+    parser.add_argument("--regra-sufixo", action="store_true",
+                        help="gera o SKU de cada variação como SKU do pai + A, B, C...")
+    parser.add_argument("--workers", type=int, default=WORKERS_PADRAO,
+                        help="produtos pai clonados ao mesmo tempo no modo lote (padrão: %(default)s)")
+    parser.add_argument("--resultado", default="resultado_variacoes.jsonl", help="arquivo JSONL com o resultado de cada produto")
+    parser.add_argument("--corpos", metavar="PASTA",
+                        help="guarda o corpo completo de cada resposta (gzip, endereçado por hash) nesta pasta")
+    parser.add_argument("--espelho", action="store_true",
+                        help="lê o produto de origem do espelho local do catálogo "
+                             "(atualize com python -m copysku.espelho --conta ANY_1)")
+    args = parser.parse_args()
+    if args.espelho:
+        espelho.configurar()
+
+    if args.lote:
+        if not args.mapa and not args.regra_sufixo:
+            parser.error("--lote exige --mapa ou --regra-sufixo")
+        print("=== CLONAR PRODUTOS COM VARIAÇÕES (lote) ===")
+        try:
+            mapa = variacoes.carregar_mapeamento(args.mapa) if args.mapa else None
+
+            def _clonar(l):
+                regra = variacoes.por_mapeamento(mapa) if mapa is not None else variacoes.por_sufixo(l['novo_sku'])
+                return clonar_produto_com_variacoes(l['id_prod_hub'], l['novo_sku'], l.get('novo_ean', ''),
+                                                    novos_por_variacao=regra, mostrar_json=False)
+
+            clonar_lote(args.lote, _clonar, ['id_prod_hub', 'novo_sku'], workers=args.workers,
+                        caminho_resultado=args.resultado, pasta_corpos=args.corpos)
+        except (OSError, ValueError) as e:
+            print("❌ Erro ao ler lote/mapeamento:", e)
+    else:
+        print("=== CLONAR PRODUTO COM VARIAÇÕES ===")
+        id_origem = input("Informe o ID do produto origem (id_prod_hub): ").strip()
+        novo_sku_pai = input("Digite o novo SKU para o produto pai: ").strip()
+        novo_ean_pai = input("Digite o novo EAN para o produto pai: ").strip()
 
-    clonar_produto_com_variacoes(id_origem, novo_sku_pai, novo_ean_pai)
+        clonar_produto_com_variacoes(id_origem, novo_sku_pai, novo_ean_pai)
@@ -0,0 +1,49 @@
+"""
+Benchmark de inicialização a frio do CLI (python -m copysku).
+
+Mede, em processos novos, o tempo até o script do subcomando estar pronto
+(--help), comparado com o custo de importar só o pandas.
+
+Uso: python benchmarks/startup.py [--repeticoes 10]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CASOS = [
+    ("copysku --help", ["-m", "copysku", "--help"]),
+    ("copysku simple --help", ["-m", "copysku", "simple", "--help"]),
+    ("copysku variations --help", ["-m", "copysku", "variations", "--help"]),
+    ("copysku kit-sheet --help", ["-m", "copysku", "kit-sheet", "--help"]),
+    ("import pandas (referência)", ["-c", "import pandas"]),
+]
+
+
+def medir(argumentos, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        subprocess.run([sys.executable] + argumentos, cwd=RAIZ, stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL, check=False)
+        tempos.append(time.perf_counter() - inicio)
+    return tempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeticoes", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'caso':32} {'mediana':>9} {'mínimo':>9}")
+    for nome, argumentos in CASOS:
+        tempos = medir(argumentos, args.repeticoes)
+        print(f"{nome:32} {statistics.median(tempos) * 1000:7.0f}ms {min(tempos) * 1000:7.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
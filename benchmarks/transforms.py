@@ -0,0 +1,152 @@
+"""
+Benchmark das transformações de payload em catálogos grandes.
+
+Gera produtos sintéticos (1 a 500 SKUs, descrição HTML grande, muitas
+imagens e características) e mede vazão (produtos/s) e pico de memória de:
+sanitize_product_for_post, create_kit_from_simple, create_kit_from_variation,
+achatar_variacoes (o loop de variações de clonar_produto_com_variacoes) e os
+perfis de destino de copysku/perfis.py.
+
+Os resultados vão para benchmarks/resultados/transforms-<versão>.json e são
+comparados com o arquivo anterior, para que regressões apareçam.
+
+Uso: python benchmarks/transforms.py [--skus 1 10 100 500] [--segundos 1.0]
+"""
+import argparse
+import copy
+import glob
+import json
+import os
+import random
+import runpy
+import subprocess
+import sys
+import time
+import tracemalloc
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASTA_RESULTADOS = os.path.join(RAIZ, "benchmarks", "resultados")
+sys.path.insert(0, RAIZ)
+
+from copysku import eans, perfis  # noqa: E402
+from copysku.variacoes import achatar_variacoes  # noqa: E402
+
+
+def produto_sintetico(n_skus, tamanho_html=200_000, n_imagens=20, n_caracteristicas=50, semente=1):
+    rnd = random.Random(semente)
+    skus = []
+    for j in range(n_skus):
+        skus.append({
+            "id": 900000 + j, "idVariation": 800000 + j, "partnerId": f"SKU{j:05d}", "ean": f"789{j:010d}",
+            "title": f"Variação {j}", "price": round(rnd.uniform(10, 500), 2), "sellPrice": 0, "cost": 0,
+            "amount": rnd.randint(0, 50), "stockLocalId": 45479,
+            "variations": [{"type": {"id": 1, "name": "Cor"}, "description": f"Cor {j}"},
+                           {"type": {"id": 2, "name": "Tamanho"}, "description": str(j % 5)}],
+        })
+    return {
+        "id": 347869103, "title": "Produto de benchmark", "creationDate": "2024-01-01T00:00:00Z",
+        "modificationDate": "2024-01-02T00:00:00Z", "dataSource": "API", "partnerId": "PAI",
+        "description": ("<p>" + "x" * 90 + "</p>") * (tamanho_html // 97),
+        "category": {"id": 1465880, "name": "Categoria", "path": "A/B/C"},
+        "brand": {"id": 1, "name": "Marca"}, "hasVariations": n_skus > 1,
+        "type": "VARIATION" if n_skus > 1 else "SIMPLE",
+        "images": [{"url": f"https://img.example/{k}.jpg", "main": k == 0, "index": k} for k in range(n_imagens)],
+        "characteristics": [{"name": f"Atributo {k}", "value": "v" * 40} for k in range(n_caracteristicas)],
+        "skus": skus,
+    }
+
+
+def carregar_transformacoes():
+    kit = runpy.run_path(os.path.join(RAIZ, "COPY SIMPLE P KIT", "variations.py"))
+    planilha = runpy.run_path(os.path.join(RAIZ, "COPY SIMPLE P KIT", "main-planilha.py"))
+
+    def achatar(produto):
+        return [achatar_variacoes(s.get("variations")) for s in produto["skus"]]
+
+    return {
+        "sanitize (kit)": lambda p: kit["sanitize_product_for_post"](p),
+        "sanitize (planilha)": lambda p: planilha["sanitize_product_for_post"](p),
+        "perfil ANY_2": lambda p: perfis.transformar("ANY_2", p, novo_sku="N", novo_ean="789", estoque=26730),
+        "perfil REPLETA_VARIACOES": lambda p: perfis.transformar(
+            "REPLETA_VARIACOES", p, por_sku=lambda i, s: {"partnerId": f"N{i}"}, novo_sku="N", novo_ean="789"),
+        "create_kit_from_simple": lambda p: kit["create_kit_from_simple"](p, "NOVO", "7890000000000", ["SKU00000"]),
+        "create_kit_from_variation": lambda p: kit["create_kit_from_variation"](
+            p, [f"N{j}" for j in range(len(p["skus"]))],
+            [eans.ean13(789000000000 + j) for j in range(len(p["skus"]))]),
+        "achatar_variacoes": achatar,
+    }
+
+
+def medir(func, produto, segundos):
+    # cópias novas de tempos em tempos: uma transformação que altere a origem não distorce a medida
+    copias = [copy.deepcopy(produto) for _ in range(8)]
+    n, inicio = 0, time.perf_counter()
+    gasto = 0.0
+    while gasto < segundos:
+        p = copias[n % len(copias)]
+        t0 = time.perf_counter()
+        func(p)
+        gasto += time.perf_counter() - t0
+        n += 1
+        if n % len(copias) == 0:
+            copias = [copy.deepcopy(produto) for _ in range(8)]
+        if time.perf_counter() - inicio > segundos * 20:
+            break
+
+    alvo = copy.deepcopy(produto)
+    tracemalloc.start()
+    func(alvo)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"produtos_por_s": round(n / gasto, 1), "pico_kb": round(pico / 1024, 1)}
+
+
+def versao():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return time.strftime("%Y%m%d%H%M%S")
+
+
+def anterior(exceto):
+    arquivos = sorted(glob.glob(os.path.join(PASTA_RESULTADOS, "transforms-*.json")), key=os.path.getmtime)
+    arquivos = [a for a in arquivos if os.path.abspath(a) != os.path.abspath(exceto)]
+    if not arquivos:
+        return None
+    with open(arquivos[-1], encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--skus", type=int, nargs="+", default=[1, 10, 100, 500])
+    parser.add_argument("--segundos", type=float, default=1.0, help="tempo de medição por caso")
+    args = parser.parse_args()
+
+    transformacoes = carregar_transformacoes()
+    resultados = {"versao": versao(), "python": sys.version.split()[0], "casos": {}}
+    caminho = os.path.join(PASTA_RESULTADOS, f"transforms-{resultados['versao']}.json")
+    base = anterior(caminho)
+
+    print(f"{'transformação':28} {'skus':>5} {'produtos/s':>12} {'pico KB':>10} {'vs anterior':>12}")
+    for n_skus in args.skus:
+        produto = produto_sintetico(n_skus)
+        for nome, func in transformacoes.items():
+            chave = f"{nome}|{n_skus}"
+            r = medir(func, produto, args.segundos)
+            resultados["casos"][chave] = r
+            delta = ""
+            if base and chave in base["casos"]:
+                antes = base["casos"][chave]["produtos_por_s"]
+                delta = f"{(r['produtos_por_s'] / antes - 1) * 100:+.0f}%" if antes else ""
+            print(f"{nome:28} {n_skus:>5} {r['produtos_por_s']:>12} {r['pico_kb']:>10} {delta:>12}")
+
+    os.makedirs(PASTA_RESULTADOS, exist_ok=True)
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(resultados, f, indent=2, ensure_ascii=False)
+    print(f"\nResultados gravados em {os.path.relpath(caminho, RAIZ)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Benchmark da validação da planilha de kits (copysku/validacao.py).
+
+Gera uma planilha CSV sintética (2 SKUs/EANs por linha, algumas linhas com
+erro) e mede o tempo de leitura (ler_planilha) e de validação (validar).
+
+Uso: python benchmarks/validacao.py [--linhas 10000 100000] [--modo variations]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from copysku import eans, validacao  # noqa: E402
+
+
+def planilha_sintetica(caminho, n_linhas, modo):
+    listas = bool(validacao.MODOS[modo][0])
+    with open(caminho, "w", encoding="utf-8") as f:
+        f.write("id_prod_hub,novo_sku,novo_ean,sku_composicao\n")
+        for i in range(n_linhas):
+            if listas:
+                skus = f"K{i}A,K{i}B"
+                codigos = f"{eans.ean13(789000000000 + 2 * i)},{eans.ean13(789000000001 + 2 * i)}"
+            else:
+                skus, codigos = f"K{i}", eans.ean13(789000000000 + i)
+            if i % 1000 == 999:
+                codigos = codigos[:-1] + str((int(codigos[-1]) + 1) % 10)  # dígito verificador errado
+            f.write(f'{347869103 + i},"{skus}","{codigos}",C{i}\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--linhas", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--modo", choices=sorted(validacao.MODOS), default="variations")
+    args = parser.parse_args()
+
+    print(f"{'linhas':>8} {'leitura s':>10} {'validação s':>12} {'linhas/s':>10} {'ocorrências':>12}")
+    with tempfile.TemporaryDirectory() as pasta:
+        for n_linhas in args.linhas:
+            caminho = os.path.join(pasta, f"kits-{n_linhas}.csv")
+            planilha_sintetica(caminho, n_linhas, args.modo)
+            t0 = time.perf_counter()
+            df = validacao.ler_planilha(caminho)
+            t1 = time.perf_counter()
+            relatorio = validacao.validar(df, args.modo)
+            t2 = time.perf_counter()
+            print(f"{n_linhas:>8} {t1 - t0:>10.2f} {t2 - t1:>12.2f} {n_linhas / (t2 - t0):>10.0f} {len(relatorio):>12}")
+
+
+if __name__ == "__main__":
+    main()
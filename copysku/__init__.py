@@ -0,0 +1 @@
+"""Módulos compartilhados pelos scripts de clonagem AnyMarket."""
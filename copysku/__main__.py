@@ -0,0 +1,3 @@
+from copysku.cli import main
+
+main()
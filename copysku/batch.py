@@ -0,0 +1,212 @@
+import collections
+import csv
+import io
+import itertools
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# ========== CONFIGURAÇÕES ==========
+WORKERS_PADRAO = 1
+# Teto do pool de linhas simultâneas (acima disso o AnyMarket devolve 429 em cascata). Cada linha
+# fala com uma conta por vez, ou com cada destino uma vez no fan-out, então nenhuma conta recebe
+# mais que isso ao mesmo tempo; o ritmo por conta fica com copysku.ratelimit
+MAX_WORKERS = 8
+# ===================================
+
+_local = threading.local()
+
+
+class _SaidaPorLinha:
+    """
+    Substitui o sys.stdout durante a execução paralela: cada thread escreve
+    no buffer da linha que está processando, e o bloco inteiro é impresso de
+    uma vez ao terminar a linha (os prints de linhas diferentes não se misturam).
+    """
+
+    def __init__(self, original):
+        self.original = original
+
+    def write(self, texto):
+        buffer = getattr(_local, "buffer", None)
+        if buffer is None:
+            return self.original.write(texto)
+        return buffer.write(texto)
+
+    def flush(self):
+        if getattr(_local, "buffer", None) is None:
+            self.original.flush()
+
+
+def executar_em_paralelo(itens, func, workers=WORKERS_PADRAO):
+    """
+    Executa func(item) para cada item usando um pool de threads.
+    Retorna a lista de resultados na mesma ordem dos itens.
+    Com workers=1 o comportamento é igual ao loop sequencial.
+    """
+    workers = max(1, min(int(workers), MAX_WORKERS))
+    if workers == 1:
+        return [func(item) for item in itens]
+
+    saida_original = sys.stdout
+    proxy = _SaidaPorLinha(saida_original)
+    lock_saida = threading.Lock()
+
+    def _rodar(item):
+        _local.buffer = io.StringIO()
+        try:
+            return func(item)
+        finally:
+            texto = _local.buffer.getvalue()
+            _local.buffer = None
+            with lock_saida:
+                saida_original.write(texto)
+                saida_original.flush()
+
+    # no máximo workers * 2 itens em voo: uma planilha enorme não é lida
+    # inteira para a fila antes de as primeiras linhas terminarem
+    sys.stdout = proxy
+    try:
+        resultados = []
+        pendentes = collections.deque()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for item in itens:
+                pendentes.append(pool.submit(_rodar, item))
+                if len(pendentes) >= workers * 2:
+                    resultados.append(pendentes.popleft().result())
+            while pendentes:
+                resultados.append(pendentes.popleft().result())
+        return resultados
+    finally:
+        sys.stdout = saida_original
+
+
+def _texto(valor):
+    """Normaliza o conteúdo de uma célula para texto (EANs numéricos sem '.0')."""
+    if valor is None:
+        return ""
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor).strip()
+
+
+def _linhas_csv(arquivo):
+    cabecalho = arquivo.readline()
+    delimitador = ";" if cabecalho.count(";") > cabecalho.count(",") else ","
+    leitor = csv.reader(itertools.chain([cabecalho], arquivo), delimiter=delimitador)
+    for valores in leitor:
+        yield valores
+
+
+def _linhas_arquivo_csv(caminho):
+    with open(caminho, newline="", encoding="utf-8-sig") as arquivo:
+        for valores in _linhas_csv(arquivo):
+            yield valores
+
+
+def _linhas_xlsx(caminho):
+    from openpyxl import load_workbook
+
+    wb = load_workbook(caminho, read_only=True, data_only=True)
+    try:
+        for valores in wb.active.iter_rows(values_only=True):
+            yield valores
+    finally:
+        wb.close()
+
+
+def _linhas_xls(caminho):
+    # formato antigo (.xls) não tem leitura em streaming; usa o pandas
+    import pandas as pd
+
+    df = pd.read_excel(caminho, dtype=str, header=None).fillna("")
+    for valores in df.itertuples(index=False, name=None):
+        yield valores
+
+
+def ler_linhas(origem, obrigatorias=()):
+    """
+    Lê um CSV, XLSX ou a entrada padrão ('-') linha a linha, gerando dicts
+    coluna -> texto, sem carregar a planilha inteira em memória. As colunas
+    obrigatórias são conferidas pelo cabeçalho já na chamada (ValueError).
+    """
+    if origem == "-":
+        brutas = _linhas_csv(sys.stdin)
+    elif origem.lower().endswith((".xlsx", ".xlsm")):
+        brutas = _linhas_xlsx(origem)
+    elif origem.lower().endswith(".xls"):
+        brutas = _linhas_xls(origem)
+    else:
+        brutas = _linhas_arquivo_csv(origem)
+
+    cabecalho = [_texto(c) for c in next(brutas, [])]
+    faltando = [c for c in obrigatorias if c not in cabecalho]
+    if faltando:
+        brutas.close()
+        raise ValueError(f"Coluna obrigatória ausente: {', '.join(faltando)}")
+    return _dicts(cabecalho, brutas)
+
+
+def _dicts(cabecalho, brutas):
+    for valores in brutas:
+        linha = {col: _texto(v) for col, v in zip(cabecalho, valores) if col}
+        if any(linha.values()):
+            yield linha
+
+
+def clonar_lote(origem, clonar, obrigatorias, workers=WORKERS_PADRAO, caminho_resultado="resultado_clonagem.jsonl",
+                pasta_corpos=None, preflight=None):
+    """
+    Executa clonar(linha) para cada linha de origem. clonar deve retornar
+    (http_code, texto) do POST, ou um dict destino -> (http_code, texto)
+    quando publica em várias contas (uma linha de resultado por destino);
+    200/201 conta como sucesso.
+
+    preflight(itens) -> {n: motivo}, se informado, recebe todas as linhas
+    (n, linha) antes do primeiro POST; as rejeitadas vão para o resultado
+    como REJECTED e não são clonadas.
+    """
+    from copysku.resultlog import LogCompacto
+
+    resultados = LogCompacto(caminho_resultado, pasta_corpos=pasta_corpos)
+
+    def _registrar(n, linha, destino, code, texto, status, latencia):
+        registro = {"linha": n, "id_prod_hub": linha.get("id_prod_hub"), "novo_sku": linha.get("novo_sku")}
+        if destino is not None:
+            registro["destino"] = destino
+        registro.update({"status": status, "http_code": code})
+        resultados.escrever(registro, corpo=texto, latencia=latencia)
+        return status == "SUCCESS"
+
+    def _processar(item):
+        n, linha = item
+        print(f"\n[{n}] id_prod_hub={linha.get('id_prod_hub')} novo_sku={linha.get('novo_sku')}")
+        inicio = time.perf_counter()
+        try:
+            retorno = clonar(linha)
+        except Exception as ex:
+            print("❌ Erro inesperado:", ex)
+            return [_registrar(n, linha, None, "", str(ex), "EXCEPTION", time.perf_counter() - inicio)]
+        latencia = time.perf_counter() - inicio
+        por_destino = retorno if isinstance(retorno, dict) else {None: retorno}
+        return [_registrar(n, linha, destino, code, texto, "SUCCESS" if code in (200, 201) else "ERROR", latencia)
+                for destino, (code, texto) in por_destino.items()]
+
+    try:
+        itens = enumerate(ler_linhas(origem, obrigatorias), start=1)
+        rejeitadas = []
+        if preflight is not None:
+            # o pre-flight precisa do lote inteiro antes de qualquer escrita
+            itens = list(itens)
+            motivos = preflight(itens)
+            for n, linha in itens:
+                if n in motivos:
+                    rejeitadas.append(_registrar(n, linha, None, "", motivos[n], "REJECTED", None))
+            itens = [(n, linha) for n, linha in itens if n not in motivos]
+        ok = executar_em_paralelo(itens, _processar, workers=workers)
+        ok = rejeitadas + list(itertools.chain.from_iterable(ok))
+    finally:
+        resultados.close()
+    print(f"\n✅ Finalizado! {sum(ok)}/{len(ok)} produtos clonados. Resultados em {caminho_resultado}")
+    return ok
@@ -0,0 +1,184 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+# ========== CONFIGURAÇÕES ==========
+# Padrões de ANY_CACHE_* (lidas na hora: o .env dos scripts é carregado depois do import)
+CACHE_PATH_PADRAO = os.path.join("~", ".copysku", "produtos.sqlite")
+# Validade de cada produto em cache (segundos): curta, o produto de origem pode ter mudado
+TTL_PADRAO = 15 * 60
+# Tamanho máximo (bytes comprimidos); acima disso os menos usados são descartados
+TAMANHO_MAX_PADRAO = 200 * 1024 * 1024
+# ===================================
+
+
+def caminho_cache():
+    return os.path.expanduser(os.getenv("ANY_CACHE_PATH", CACHE_PATH_PADRAO))
+
+
+def conta_do_token(token):
+    """Identificador da conta usado como chave (nunca gravamos o token em disco)."""
+    return hashlib.sha256(str(token).encode("utf-8")).hexdigest()[:16]
+
+
+class CacheProdutos:
+    """
+    Cache persistente das respostas de /v2/products/{id}, por conta e id.
+    Entradas vencem pelo TTL (ou são invalidadas pela sincronização do
+    espelho); o excesso sobre o tamanho máximo é descartado do menos usado
+    para o mais usado (LRU).
+    """
+
+    def __init__(self, caminho=None, ttl=None, tamanho_max=None):
+        caminho = caminho or caminho_cache()
+        self.caminho = caminho
+        self.ttl = int(os.getenv("ANY_CACHE_TTL", TTL_PADRAO)) if ttl is None else ttl
+        if tamanho_max is None:
+            tamanho_max = int(os.getenv("ANY_CACHE_MAX_BYTES", TAMANHO_MAX_PADRAO))
+        self.tamanho_max = tamanho_max
+        self._lock = threading.Lock()
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        self._db = sqlite3.connect(caminho, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS produtos (
+                conta TEXT NOT NULL,
+                product_id TEXT NOT NULL,
+                dados BLOB NOT NULL,
+                tamanho INTEGER NOT NULL,
+                modification_date TEXT,
+                gravado_em REAL NOT NULL,
+                acessado_em REAL NOT NULL,
+                PRIMARY KEY (conta, product_id)
+            )""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_produtos_acesso ON produtos (acessado_em)")
+        self._db.commit()
+        # tamanho somado em memória; a soma real só é refeita quando passa do máximo
+        self._tamanho_total = self._somar_tamanho()
+
+    def get(self, conta, product_id):
+        """Retorna o produto (dict novo a cada chamada) ou None se ausente/vencido."""
+        agora = time.time()
+        with self._lock:
+            linha = self._db.execute(
+                "SELECT dados, gravado_em FROM produtos WHERE conta = ? AND product_id = ?",
+                (conta, str(product_id))).fetchone()
+            if linha is None:
+                return None
+            dados, gravado_em = linha
+            if agora - gravado_em > self.ttl:
+                self._apagar(conta, product_id)
+                self._db.commit()
+                return None
+            self._db.execute("UPDATE produtos SET acessado_em = ? WHERE conta = ? AND product_id = ?",
+                             (agora, conta, str(product_id)))
+            self._db.commit()
+        return json.loads(zlib.decompress(dados).decode("utf-8"))
+
+    def put(self, conta, product_id, produto):
+        dados = zlib.compress(json.dumps(produto, ensure_ascii=False).encode("utf-8"))
+        agora = time.time()
+        with self._lock:
+            self._apagar(conta, product_id)
+            self._db.execute(
+                "INSERT INTO produtos VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (conta, str(product_id), dados, len(dados), produto.get("modificationDate"), agora, agora))
+            self._tamanho_total += len(dados)
+            if self._tamanho_total > self.tamanho_max:
+                self._descartar_excesso()
+            self._db.commit()
+
+    def invalidar(self, conta, product_id):
+        with self._lock:
+            self._apagar(conta, product_id)
+            self._db.commit()
+
+    def _apagar(self, conta, product_id):
+        linha = self._db.execute("SELECT tamanho FROM produtos WHERE conta = ? AND product_id = ?",
+                                 (conta, str(product_id))).fetchone()
+        if linha is not None:
+            self._db.execute("DELETE FROM produtos WHERE conta = ? AND product_id = ?", (conta, str(product_id)))
+            self._tamanho_total -= linha[0]
+
+    def _somar_tamanho(self):
+        return self._db.execute("SELECT COALESCE(SUM(tamanho), 0) FROM produtos").fetchone()[0]
+
+    def _descartar_excesso(self):
+        # outro processo pode ter gravado no mesmo arquivo: confere a soma real antes de descartar
+        total = self._somar_tamanho()
+        if total > self.tamanho_max:
+            for product_id, conta, tamanho in self._db.execute(
+                    "SELECT product_id, conta, tamanho FROM produtos ORDER BY acessado_em").fetchall():
+                self._db.execute("DELETE FROM produtos WHERE conta = ? AND product_id = ?", (conta, product_id))
+                total -= tamanho
+                if total <= self.tamanho_max:
+                    break
+        self._tamanho_total = total
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+# None: segue ANY_CACHE=1, que liga o cache sem a opção --cache
+_habilitado = None
+_somente_cache = False
+
+
+def configurar(habilitado=True, somente_cache=False):
+    """
+    Liga o cache (desligado por padrão: o produto de origem vem sempre da API).
+    somente_cache=True: nunca faz GET do produto de origem (reexecuções).
+    """
+    global _habilitado, _somente_cache
+    _habilitado = habilitado or somente_cache
+    _somente_cache = somente_cache
+
+
+def habilitado():
+    if _habilitado is not None:
+        return _habilitado
+    return os.getenv("ANY_CACHE", "") == "1"
+
+
+def get_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = CacheProdutos()
+    return _cache
+
+
+def invalidar(token, product_id):
+    """Descarta o produto do cache da conta, se o arquivo de cache existir (ex.: alterado no espelho)."""
+    if _cache is None and not os.path.exists(caminho_cache()):
+        return
+    get_cache().invalidar(conta_do_token(token), product_id)
+
+
+def obter_produto(token, product_id, buscar):
+    """
+    Busca o produto no cache da conta; em caso de falta chama buscar()
+    (que deve fazer o GET e retornar o dict ou None) e grava o resultado.
+    """
+    if not habilitado():
+        return buscar()
+    cache = get_cache()
+    conta = conta_do_token(token)
+    produto = cache.get(conta, product_id)
+    if produto is not None:
+        return produto
+    if _somente_cache:
+        print(f"⚠️  Produto {product_id} não está no cache (modo somente cache)")
+        return None
+    produto = buscar()
+    if isinstance(produto, dict):
+        cache.put(conta, product_id, produto)
+    return produto
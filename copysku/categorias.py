@@ -0,0 +1,196 @@
+"""
+Árvore de categorias de cada conta e mapeamento categoria de origem -> destino
+(mesmo caminho ou mesmo nome de folha único; sem par vale a categoria padrão do perfil).
+"""
+import argparse
+import os
+import re
+import threading
+
+from copysku import indice_contas
+from copysku.cache import conta_do_token
+
+# ========== CONFIGURAÇÕES ==========
+# Padrões de ANY_CATEGORIAS_PATH / ANY_CATEGORIAS_TTL, lidas ao criar o índice
+CATEGORIAS_PATH_PADRAO = os.path.join("~", ".copysku", "categorias.sqlite")
+API_URL_CATEGORIES = "/v2/categories"
+# Idade máxima da árvore gravada antes de baixar de novo (segundos)
+TTL_PADRAO = 24 * 3600
+# ===================================
+
+
+def normalizar(texto):
+    """'Casa & Decoração > Cozinha' -> 'casa & decoracao/cozinha'."""
+    partes = (indice_contas.normalizar(p) for p in re.split(r"[/>]", str(texto or "")))
+    return "/".join(p for p in partes if p)
+
+
+def achatar(categorias, caminho_pai="", pai=None):
+    """
+    Lista plana (id, nome, pai, caminho) de uma árvore com 'children'.
+    Se a API já trouxer 'path', ele vale mais que o montado pelo pai.
+    """
+    linhas = []
+    for cat in categorias or []:
+        if cat.get("id") is None:
+            continue
+        nome = cat.get("name") or ""
+        caminho = cat.get("path") or (f"{caminho_pai}/{nome}" if caminho_pai else nome)
+        linhas.append((int(cat["id"]), nome, pai, caminho))
+        linhas.extend(achatar(cat.get("children"), caminho, cat["id"]))
+    return linhas
+
+
+class Arvore:
+    """Categorias de uma conta em memória: por id, por caminho e por nome de folha."""
+
+    def __init__(self, linhas):
+        self.por_id = {}
+        self.por_caminho = {}
+        self.por_nome = {}
+        for id_cat, nome, _pai, caminho in linhas:
+            self.por_id[int(id_cat)] = caminho
+            self.por_caminho[normalizar(caminho)] = int(id_cat)
+            self.por_nome.setdefault(normalizar(nome), []).append(int(id_cat))
+
+    def procurar(self, caminho):
+        """(id, critério) da categoria com o mesmo caminho ou, sem isso, com o mesmo nome único."""
+        chave = normalizar(caminho)
+        if chave in self.por_caminho:
+            return self.por_caminho[chave], "caminho"
+        folha = chave.rsplit("/", 1)[-1]
+        candidatos = self.por_nome.get(folha) or []
+        if len(candidatos) == 1:
+            return candidatos[0], "nome"
+        return None, None
+
+
+class IndiceCategorias(indice_contas.IndiceContas):
+    """Árvore de cada conta em categorias(conta, id, nome, pai, caminho) e o mapeamento entre contas."""
+
+    TABELA = "categorias"
+    COLUNAS = "nome TEXT, pai INTEGER, caminho TEXT"
+    API_URL = API_URL_CATEGORIES
+
+    def __init__(self, caminho=None, ttl=None):
+        caminho = caminho or os.path.expanduser(os.getenv("ANY_CATEGORIAS_PATH", CATEGORIAS_PATH_PADRAO))
+        ttl = int(os.getenv("ANY_CATEGORIAS_TTL", TTL_PADRAO)) if ttl is None else ttl
+        super().__init__(caminho, ttl)
+
+    def linhas(self, itens):
+        return achatar(itens)
+
+    def montar(self, linhas):
+        return Arvore(linhas)
+
+    def arvore(self, token):
+        """Árvore da conta em memória (baixada se ainda não existe ou venceu)."""
+        return self.carregar(token)
+
+    def mapear(self, token_origem, token_destino, categoria):
+        """
+        categoria: o objeto 'category' do produto de origem ({id, name, path...}).
+        Retorna o id da categoria correspondente no destino, ou None se não houver par.
+        """
+        if not isinstance(categoria, dict) or categoria.get("id") is None:
+            return None
+        id_origem = int(categoria["id"])
+        conta_origem, conta_destino = conta_do_token(token_origem), conta_do_token(token_destino)
+        if conta_origem == conta_destino:
+            return id_origem
+        id_destino = self.mapeado(conta_origem, conta_destino, id_origem)
+        if id_destino is not None:
+            return id_destino
+
+        caminho = self.arvore(token_origem).por_id.get(id_origem) or categoria.get("path") or categoria.get("name")
+        if not caminho:
+            return None
+        id_destino, criterio = self.arvore(token_destino).procurar(caminho)
+        if id_destino is None:
+            # a categoria pode ter sido criada no destino depois da última carga
+            self.recarregar_uma_vez(token_destino)
+            id_destino, criterio = self.arvore(token_destino).procurar(caminho)
+        if id_destino is None:
+            self.avisar_uma_vez(id_origem, f"⚠️  Categoria {id_origem} ({caminho}) sem par no destino — "
+                                           f"usando a categoria padrão")
+            return None
+        self.gravar_mapeamento(conta_origem, conta_destino, id_origem, id_destino, criterio)
+        return id_destino
+
+
+_indice = None
+_indice_lock = threading.Lock()
+
+
+def get_indice():
+    global _indice
+    with _indice_lock:
+        if _indice is None:
+            _indice = IndiceCategorias()
+    return _indice
+
+
+def mapear(token_origem, token_destino, categoria):
+    """
+    Atalho para get_indice().mapear(...): id da categoria no destino ou None.
+    Falha ao baixar a árvore não derruba a clonagem: vale a categoria padrão.
+    """
+    try:
+        return get_indice().mapear(token_origem, token_destino, categoria)
+    except Exception as ex:
+        print(f"⚠️  Não foi possível mapear a categoria ({ex}) — usando a categoria padrão")
+        return None
+
+
+def main():
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Árvore de categorias e mapeamento entre contas AnyMarket")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    p_atualizar = sub.add_parser("atualizar", help="baixa de novo a árvore de categorias da conta")
+    p_atualizar.add_argument("--conta", default="ANY_2", help="variável de ambiente com o token")
+    p_mapear = sub.add_parser("mapear", help="mapeia todas as categorias da origem e lista as sem par")
+    p_importar = sub.add_parser("importar", help="grava mapeamentos manuais de um CSV/XLSX id_origem,id_destino")
+    p_importar.add_argument("arquivo")
+    for p in (p_mapear, p_importar):
+        p.add_argument("--origem", default="ANY_1", help="variável de ambiente com o token da origem")
+        p.add_argument("--destino", default="ANY_2", help="variável de ambiente com o token do destino")
+    args = parser.parse_args()
+
+    indice = get_indice()
+    if args.comando == "atualizar":
+        token = os.getenv(args.conta)
+        if not token:
+            print(f"❌ Variável {args.conta} não definida")
+            return
+        print(f"✅ {indice.atualizar(token, forcar=True)} categorias da conta {args.conta} em {indice.caminho}")
+        return
+
+    token_origem, token_destino = os.getenv(args.origem), os.getenv(args.destino)
+    if not token_origem or not token_destino:
+        print(f"❌ Variáveis {args.origem}/{args.destino} não definidas")
+        return
+    if args.comando == "importar":
+        from copysku.batch import ler_linhas
+
+        conta_origem, conta_destino = conta_do_token(token_origem), conta_do_token(token_destino)
+        total = 0
+        for linha in ler_linhas(args.arquivo, ["id_origem", "id_destino"]):
+            if not linha.get("id_origem") or not linha.get("id_destino"):
+                continue
+            indice.gravar_mapeamento(conta_origem, conta_destino, linha["id_origem"], linha["id_destino"], "manual")
+            total += 1
+        print(f"✅ {total} mapeamentos importados")
+        return
+
+    sem_par = 0
+    origem = indice.arvore(token_origem)
+    for id_origem in sorted(origem.por_id, key=origem.por_id.get):
+        if indice.mapear(token_origem, token_destino, {"id": id_origem}) is None:
+            sem_par += 1
+    print(f"✅ {len(origem.por_id) - sem_par} de {len(origem.por_id)} categorias mapeadas; {sem_par} sem par")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Ponto de entrada único: python -m copysku <subcomando> [opções do script]
+
+Só argparse/os/runpy são importados aqui. requests, pandas, openpyxl etc.
+são carregados pelo script do subcomando escolhido, e apenas por ele.
+"""
+import argparse
+import os
+import runpy
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASTA_KIT = os.path.join(RAIZ, "COPY SIMPLE P KIT")
+
+# subcomando -> opção de destino/modo -> script executado
+SCRIPTS = {
+    "simple": {
+        "any1": os.path.join(RAIZ, "main.py"),
+        "any2": os.path.join(RAIZ, "ANY1xANY2.py"),
+        "repleta": os.path.join(RAIZ, "ANY1xREPLETA.py"),
+        "multi": os.path.join(RAIZ, "ANY1xMULTI.py"),
+    },
+    "variations": {
+        "any1": os.path.join(RAIZ, "variations.py"),
+        "any2": os.path.join(RAIZ, "Variations ANY1xANY2.py"),
+        "repleta": os.path.join(RAIZ, "Variations ANY1xREPLETA.py"),
+    },
+    "kit": {
+        "any1": os.path.join(PASTA_KIT, "main.py"),
+    },
+    "kit-sheet": {
+        "itens": os.path.join(PASTA_KIT, "variations.py"),
+        "componentes": os.path.join(PASTA_KIT, "main-planilha.py"),
+    },
+    "fila": {
+        "fila": os.path.join(RAIZ, "copysku", "fila.py"),
+    },
+}
+
+AJUDA = {
+    "simple": "clona um produto simples (interativo ou --lote); --destino multi publica em várias contas",
+    "variations": "clona um produto com variações (interativo ou --lote com --mapa/--regra-sufixo)",
+    "kit": "cria um KIT a partir de um produto (interativo)",
+    "kit-sheet": "cria KITs a partir de uma planilha",
+    "fila": "fila local de tarefas: enfileirar, trabalhar (pool de processos), status, reenfileirar",
+}
+
+
+def montar_parser():
+    parser = argparse.ArgumentParser(
+        prog="copysku",
+        description="Clonagem de produtos AnyMarket. Opções após o subcomando são repassadas ao script.")
+    sub = parser.add_subparsers(dest="comando", metavar="{" + ",".join(SCRIPTS) + "}")
+    sub.required = True
+    for nome, opcoes in SCRIPTS.items():
+        p = sub.add_parser(nome, help=AJUDA[nome], add_help=False)
+        if nome == "kit-sheet":
+            p.add_argument("--modo", choices=sorted(opcoes), default="itens",
+                           help="itens: kitItens por linha (variations.py); componentes: kitComponents (main-planilha.py)")
+        elif len(opcoes) > 1:
+            p.add_argument("--destino", choices=sorted(opcoes), default="any1",
+                           help="conta de destino (padrão: %(default)s)")
+    return parser
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    args, resto = montar_parser().parse_known_args(argv)
+    opcoes = SCRIPTS[args.comando]
+    chave = getattr(args, "modo", None) or getattr(args, "destino", None) or next(iter(opcoes))
+    script = opcoes[chave]
+
+    # executa o script como se fosse chamado diretamente (python script.py ...)
+    sys.argv = [script] + resto
+    if RAIZ not in sys.path:
+        sys.path.insert(0, RAIZ)
+    runpy.run_path(script, run_name="__main__")
+
+
+if __name__ == "__main__":
+    main()
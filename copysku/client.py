@@ -0,0 +1,224 @@
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from copysku import metrics
+from copysku.ratelimit import get_limitador
+
+# ========== CONFIGURAÇÕES ==========
+# ANY_BASE_URL pode apontar para o servidor local de testes (python -m copysku.standin)
+BASE_URL_PADRAO = "https://api.anymarket.com.br"
+# URLs relativas: a base é resolvida a cada requisição (api_base_url)
+API_URL_PRODUCTS = "/v2/products"
+# Conexões mantidas abertas (keep-alive) por conta/token
+POOL_MAXSIZE = 16
+MAX_RETRIES = 4
+BACKOFF_BASE_SEC = 1.5
+# Itens por página nas listagens (/v2/products, /v2/stocks...)
+PAGE_SIZE = 100
+# ===================================
+
+_sessions = {}
+_lock = threading.Lock()
+
+
+def api_base_url():
+    """
+    Base da API lida na hora, não no import: o .env dos scripts é carregado
+    depois que copysku já foi importado.
+    """
+    return os.getenv("ANY_BASE_URL", BASE_URL_PADRAO).rstrip("/")
+
+
+def url_completa(url):
+    """'/v2/products' -> '<ANY_BASE_URL>/v2/products' (URLs absolutas ficam como estão)."""
+    if url.startswith(("http://", "https://")):
+        return url
+    return api_base_url() + url
+
+
+def headers_da_conta(token):
+    return {
+        "Content-Type": "application/json",
+        "gumgaToken": token
+    }
+
+
+def get_session(token):
+    """
+    Retorna a Session da conta dona do token (ANY_1, ANY_2, REPLETA...).
+    A mesma Session é reaproveitada durante toda a execução, evitando um
+    novo handshake TCP+TLS a cada GET/POST.
+    """
+    with _lock:
+        session = _sessions.get(token)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions[token] = session
+    return session
+
+
+def request(method, url, headers=None, **kwargs):
+    """
+    Executa a requisição pela Session da conta indicada no header gumgaToken,
+    passando pelo limitador de taxa compartilhado dessa conta.
+    """
+    token = (headers or {}).get("gumgaToken")
+    limitador = get_limitador(token)
+    limitador.adquirir()
+    r = get_session(token).request(method, url_completa(url), headers=headers, **kwargs)
+    limitador.registrar(r.status_code, r.headers)
+    metrics.registrar_status(r.status_code)
+    return r
+
+
+def get(url, headers=None, **kwargs):
+    return request("GET", url, headers=headers, **kwargs)
+
+
+def post(url, headers=None, **kwargs):
+    return request("POST", url, headers=headers, **kwargs)
+
+
+# Executa requisições HTTP com repetição automática em caso de erro (429, 500, 502, etc)
+# Caso a execução seja negada e faz uma nova tentativa
+def get_json_with_retries(url, params=None, headers=None, method="GET", data=None, timeout=30, conferir=None,
+                          conferir_antes=False):
+    """
+    Requisição com retries para 429, 5xx e exceções. Retorna (http_code, json ou texto).
+
+    conferir() -> produto ou None: usado em POSTs. Depois de uma falha ambígua
+    (timeout, conexão caída, 5xx) o POST pode ter sido gravado mesmo sem resposta;
+    antes de reenviar, conferir() procura o resultado no destino. Se achar,
+    retorna (200, produto) sem reenviar; se não achar, o POST é repetido.
+    conferir_antes=True faz essa conferência já antes do primeiro envio
+    (ex.: POST interrompido numa execução anterior).
+    """
+    attempt = 0
+    ambiguo = conferir_antes
+    while attempt < MAX_RETRIES:
+        try:
+            if ambiguo and conferir is not None:
+                existente = conferir()
+                if existente is not None:
+                    print(f"♻️  {method} em {url} foi gravado apesar da falha — conciliado (id {existente.get('id')})")
+                    metrics.registrar_retry("conciliado")
+                    return 200, existente
+                ambiguo = False
+
+            if method == "GET":
+                r = get(url, headers=headers, params=params, timeout=timeout)
+            else:
+                r = request(method, url, headers=headers, params=params, data=data, timeout=timeout)
+
+            if r.status_code < 400:
+                try:
+                    return r.status_code, r.json()
+                except Exception:
+                    return r.status_code, r.text
+
+            if r.status_code == 429:
+                # a espera (Retry-After) e a redução de taxa ficam a cargo do limitador da conta
+                print(f"⚠️  429 em {url} — aguardando limitador (tentativa {attempt+1}/{MAX_RETRIES})")
+                metrics.registrar_retry(429)
+                attempt += 1
+                continue
+
+            if r.status_code in (500, 502, 503, 504):
+                sleep_s = BACKOFF_BASE_SEC * (2 ** attempt)
+                print(f"⚠️  {r.status_code} em {url} — retry em {sleep_s:.1f}s (tentativa {attempt+1}/{MAX_RETRIES})")
+                metrics.registrar_retry(r.status_code)
+                ambiguo = method != "GET"
+                time.sleep(sleep_s)
+                attempt += 1
+                continue
+
+            return r.status_code, r.text
+
+        except Exception as e:
+            sleep_s = BACKOFF_BASE_SEC * (2 ** attempt)
+            print(f"⚠️  Erro '{e}' em {url} — retry em {sleep_s:.1f}s (tentativa {attempt+1}/{MAX_RETRIES})")
+            metrics.registrar_retry(type(e).__name__)
+            ambiguo = ambiguo or method != "GET"
+            time.sleep(sleep_s)
+            attempt += 1
+
+    if ambiguo and conferir is not None:
+        # última chance: o POST pode ter sido gravado na última tentativa
+        try:
+            existente = conferir()
+        except Exception:
+            existente = None
+        if existente is not None:
+            print(f"♻️  {method} em {url} foi gravado apesar da falha — conciliado (id {existente.get('id')})")
+            metrics.registrar_retry("conciliado")
+            return 200, existente
+    return 599, "Erro após múltiplas tentativas"
+
+
+def buscar_por_partner_id(partner_id, headers, timeout=30):
+    """Produto da conta que tem um SKU com esse partnerId, ou None (exceção se a consulta falhar)."""
+    r = get(API_URL_PRODUCTS, headers=headers, params={"sku": partner_id}, timeout=timeout)
+    if r.status_code != 200:
+        raise RuntimeError(f"HTTP {r.status_code} ao consultar partnerId {partner_id}")
+    for produto in (r.json() or {}).get("content") or []:
+        if any(str(sku.get("partnerId")) == str(partner_id) for sku in produto.get("skus") or []):
+            return produto
+    return None
+
+
+def criar_produto(headers, payload, partner_id, timeout=30, conferir_antes=False):
+    """
+    POST /v2/products com retries e conciliação pelo partnerId do SKU novo:
+    uma resposta perdida não vira produto duplicado. Retorna (http_code, json ou texto).
+    conferir_antes=True: procura o partnerId antes do primeiro envio (retomada de um POST interrompido).
+    """
+    code, data = get_json_with_retries(API_URL_PRODUCTS, headers=headers, method="POST", data=payload,
+                                       timeout=timeout,
+                                       conferir=lambda: buscar_por_partner_id(partner_id, headers, timeout=timeout),
+                                       conferir_antes=conferir_antes)
+    if code in (200, 201):
+        # o índice de SKUs da conta (pre-flight) passa a conhecer o produto criado
+        from copysku import sku_index
+
+        sku_index.registrar_criado(headers.get("gumgaToken"), data)
+    return code, data
+
+
+# Percorre uma listagem paginada da API (offset/limit), devolvendo item a item
+def paginar(url, headers, params=None, limite=PAGE_SIZE):
+    offset = 0
+    while True:
+        params_pagina = dict(params or {})
+        params_pagina.update({"offset": offset, "limit": limite})
+        code, data = get_json_with_retries(url, params=params_pagina, headers=headers)
+        if code != 200:
+            raise RuntimeError(f"HTTP {code} ao paginar {url} (offset {offset})")
+
+        if isinstance(data, dict):
+            content = data.get("content") or []
+            total = (data.get("page") or {}).get("totalElements")
+        else:
+            content = data if isinstance(data, list) else []
+            total = None
+
+        for item in content:
+            yield item
+
+        offset += limite
+        if len(content) < limite or (total is not None and offset >= total):
+            break
+
+
+def close_all():
+    """Fecha todas as conexões abertas (chamar ao final de execuções longas)."""
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
@@ -0,0 +1,217 @@
+"""
+Alocador de EAN-13 a partir de uma faixa reservada da empresa.
+
+A faixa é dada pelos 12 primeiros dígitos (sem o dígito verificador), ex.:
+ANY_EAN_FAIXA=789123400000-789123499999. Cada alocação avança o cursor da
+faixa numa transação BEGIN IMMEDIATE e grava cada EAN entregue no diário
+(alocacoes), então processos e threads concorrentes nunca recebem o mesmo
+código. Um SKU que já recebeu EAN recebe o mesmo de novo (reexecuções e
+--resume não gastam a faixa).
+
+    python -m copysku.eans alocar 1000 > eans.txt
+    python -m copysku.eans status
+
+Nos scripts de kits, SKUs sem EAN na planilha recebem um da faixa (completar).
+"""
+import argparse
+import os
+import sqlite3
+import threading
+import time
+
+# ========== CONFIGURAÇÕES ==========
+# Padrão de ANY_EAN_PATH, lida ao criar o alocador
+EAN_PATH_PADRAO = os.path.join("~", ".copysku", "eans.sqlite")
+# Faixa reservada: "inicio-fim" com 12 dígitos cada (vazio = alocador desligado)
+FAIXA = os.getenv("ANY_EAN_FAIXA", "")
+# ===================================
+
+
+def digito_verificador(corpo):
+    """Dígito verificador EAN-13 dos 12 primeiros dígitos (pesos 1 e 3 alternados)."""
+    soma = sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(str(corpo)))
+    return (10 - soma % 10) % 10
+
+
+def ean13(corpo):
+    corpo = str(corpo).zfill(12)
+    return corpo + str(digito_verificador(corpo))
+
+
+def valido(ean):
+    """True se 'ean' tem 13 dígitos e o verificador confere."""
+    ean = str(ean or "").strip()
+    return len(ean) == 13 and ean.isdigit() and int(ean[-1]) == digito_verificador(ean[:12])
+
+
+def ler_faixa(texto=FAIXA):
+    """'789123400000-789123499999' -> (inicio, fim) como inteiros; ValueError se inválida."""
+    partes = [p.strip() for p in str(texto or "").split("-")]
+    if len(partes) != 2 or not all(p.isdigit() and len(p) == 12 for p in partes):
+        raise ValueError(f"Faixa de EAN inválida ou não configurada (ANY_EAN_FAIXA='{texto}'): "
+                         f"use inicio-fim com 12 dígitos cada")
+    inicio, fim = int(partes[0]), int(partes[1])
+    if fim < inicio:
+        raise ValueError(f"Faixa de EAN invertida: {texto}")
+    return inicio, fim
+
+
+class AlocadorEan:
+    """Cursor por faixa (faixas) e diário de cada EAN entregue (alocacoes)."""
+
+    def __init__(self, faixa=None, caminho=None):
+        # lidas na hora: o .env dos scripts é carregado depois do import
+        faixa = faixa or os.getenv("ANY_EAN_FAIXA", FAIXA)
+        caminho = caminho or os.path.expanduser(os.getenv("ANY_EAN_PATH", EAN_PATH_PADRAO))
+        self.caminho = caminho
+        self.faixa = faixa
+        self.inicio, self.fim = ler_faixa(faixa)
+        self._lock = threading.Lock()
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        # isolation_level=None: a alocação abre a própria transação (BEGIN IMMEDIATE)
+        self._db = sqlite3.connect(caminho, timeout=30, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS faixas (
+                faixa TEXT PRIMARY KEY,
+                proximo INTEGER NOT NULL
+            )""")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS alocacoes (
+                ean TEXT PRIMARY KEY,
+                faixa TEXT NOT NULL,
+                sku TEXT,
+                origem TEXT,
+                alocado_em REAL NOT NULL
+            )""")
+        self._db.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_alocacoes_sku ON alocacoes (sku) WHERE sku IS NOT NULL")
+
+    def alocar(self, quantidade=1, skus=None, origem=None):
+        """
+        Entrega 'quantidade' EANs novos (ou um por SKU de 'skus', reaproveitando os
+        que o SKU já recebeu). Retorna a lista na ordem pedida.
+        RuntimeError se a faixa não comporta o pedido.
+        """
+        if skus is not None:
+            skus = [str(s) for s in skus]
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                eans = self._alocar(quantidade, skus, origem)
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return eans
+
+    def _alocar(self, quantidade, skus, origem):
+        existentes = {}
+        if skus is not None:
+            for i in range(0, len(skus), 500):
+                lote = skus[i:i + 500]
+                existentes.update(self._db.execute(
+                    f"SELECT sku, ean FROM alocacoes WHERE sku IN ({','.join('?' * len(lote))})", lote).fetchall())
+            novos_skus = list(dict.fromkeys(s for s in skus if s not in existentes))
+            quantidade = len(novos_skus)
+        else:
+            novos_skus = [None] * quantidade
+
+        linha = self._db.execute("SELECT proximo FROM faixas WHERE faixa = ?", (self.faixa,)).fetchone()
+        proximo = linha[0] if linha else self.inicio
+        if proximo + quantidade - 1 > self.fim:
+            raise RuntimeError(f"Faixa de EAN esgotada: pedidos {quantidade}, restam {max(0, self.fim - proximo + 1)}")
+        agora = time.time()
+        novos = [ean13(proximo + i) for i in range(quantidade)]
+        self._db.executemany("INSERT INTO alocacoes VALUES (?, ?, ?, ?, ?)",
+                             [(ean, self.faixa, sku, origem, agora) for ean, sku in zip(novos, novos_skus)])
+        self._db.execute("INSERT OR REPLACE INTO faixas VALUES (?, ?)", (self.faixa, proximo + quantidade))
+
+        if skus is None:
+            return novos
+        existentes.update(zip(novos_skus, novos))
+        return [existentes[s] for s in skus]
+
+    def para_skus(self, skus, origem=None):
+        """{sku: ean} — atalho de alocar(skus=...)."""
+        skus = [str(s) for s in skus]
+        return dict(zip(skus, self.alocar(skus=skus, origem=origem)))
+
+    def status(self):
+        """(usados, restantes) da faixa configurada."""
+        with self._lock:
+            linha = self._db.execute("SELECT proximo FROM faixas WHERE faixa = ?", (self.faixa,)).fetchone()
+        proximo = linha[0] if linha else self.inicio
+        return proximo - self.inicio, self.fim - proximo + 1
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+_alocador = None
+_alocador_lock = threading.Lock()
+
+
+def configurado():
+    """True se ANY_EAN_FAIXA está definida (os scripts só alocam com faixa configurada)."""
+    return bool(os.getenv("ANY_EAN_FAIXA", FAIXA))
+
+
+def get_alocador():
+    global _alocador
+    with _alocador_lock:
+        if _alocador is None:
+            _alocador = AlocadorEan()
+    return _alocador
+
+
+def completar(skus, eans_informados, origem=None):
+    """
+    EAN de cada SKU, na mesma ordem: o informado na planilha (mesma posição) ou,
+    se faltar, um alocado da faixa numa única chamada. Sem faixa configurada o
+    SKU fica sem EAN ("") — nunca repete o EAN de outro SKU.
+    """
+    eans = [str(eans_informados[i]) if i < len(eans_informados) and eans_informados[i] else ""
+            for i in range(len(skus))]
+    faltando = [sku for sku, ean in zip(skus, eans) if not ean]
+    if not faltando:
+        return eans
+    if not configurado():
+        print(f"⚠️  {len(faltando)} SKU(s) sem EAN na planilha ({', '.join(map(str, faltando[:5]))}"
+              f"{'...' if len(faltando) > 5 else ''}) — configure ANY_EAN_FAIXA para alocar automaticamente")
+        return eans
+    alocados = get_alocador().para_skus(faltando, origem=origem)
+    return [ean or alocados[str(sku)] for sku, ean in zip(skus, eans)]
+
+
+def main():
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Alocador de EAN-13 da faixa reservada (ANY_EAN_FAIXA)")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    p_alocar = sub.add_parser("alocar", help="entrega N EANs novos, um por linha")
+    p_alocar.add_argument("quantidade", type=int)
+    p_alocar.add_argument("--origem", help="anotação gravada no diário (ex.: nome da planilha)")
+    sub.add_parser("status", help="mostra quantos EANs da faixa já foram usados")
+    args = parser.parse_args()
+
+    try:
+        alocador = get_alocador()
+    except ValueError as e:
+        print(f"❌ {e}")
+        return
+    if args.comando == "alocar":
+        try:
+            print("\n".join(alocador.alocar(args.quantidade, origem=args.origem)))
+        except RuntimeError as e:
+            print(f"❌ {e}")
+        return
+    usados, restantes = alocador.status()
+    print(f"📦 Faixa {alocador.faixa}: {usados} EANs alocados, {restantes} livres ({alocador.caminho})")
+
+
+if __name__ == "__main__":
+    main()
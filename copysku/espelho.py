@@ -0,0 +1,255 @@
+"""
+Espelho local do catálogo de uma conta (SQLite, produtos em JSON comprimido).
+
+Montado uma vez paginando /v2/products; depois cada sincronização só regrava
+os produtos cuja modificationDate mudou desde a última. Se a API aceitar um
+filtro de data na listagem (ANY_ESPELHO_PARAM_DESDE, ex.: modifiedSince no
+stand-in), só as páginas alteradas vêm pela rede; sem ele a listagem é lida
+inteira, mas nada que não mudou é regravado.
+
+    python -m copysku.espelho --conta ANY_1              # monta ou atualiza
+    python -m copysku.espelho --conta ANY_1 --completo   # refaz e remove os que sumiram
+
+Com --espelho, os scripts de clonagem e de kits leem o produto de origem
+daqui; produtos que ainda não estão no espelho caem no GET e são gravados.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from copysku import cache, client
+from copysku.cache import conta_do_token
+
+# ========== CONFIGURAÇÕES ==========
+# ANY_ESPELHO_* são lidas no uso, não no import
+ESPELHO_PATH_PADRAO = os.path.join("~", ".copysku", "espelho.sqlite")
+API_URL_GET = "/v2/products/{id}"
+# Produtos gravados entre commits durante a sincronização
+LOTE_COMMIT = 500
+# ===================================
+
+
+def param_desde():
+    """Parâmetro de data aceito por GET /v2/products (ANY_ESPELHO_PARAM_DESDE; vazio = filtra só localmente)."""
+    return os.getenv("ANY_ESPELHO_PARAM_DESDE", "")
+
+
+class Espelho:
+    """
+    Tabela produtos(conta, product_id) com o JSON comprimido e a modificationDate,
+    mais o registro da última sincronização de cada conta.
+    """
+
+    def __init__(self, caminho=None):
+        caminho = caminho or os.path.expanduser(os.getenv("ANY_ESPELHO_PATH", ESPELHO_PATH_PADRAO))
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        self._db = sqlite3.connect(caminho, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS produtos (
+                conta TEXT NOT NULL,
+                product_id TEXT NOT NULL,
+                dados BLOB NOT NULL,
+                modification_date TEXT,
+                visto_em REAL NOT NULL,
+                PRIMARY KEY (conta, product_id)
+            )""")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS sincronizacoes (
+                conta TEXT PRIMARY KEY,
+                ultima_modificacao TEXT,
+                sincronizado_em REAL NOT NULL,
+                produtos INTEGER NOT NULL
+            )""")
+        self._db.commit()
+
+    def get(self, conta, product_id):
+        """Produto espelhado (dict novo a cada chamada) ou None."""
+        with self._lock:
+            linha = self._db.execute("SELECT dados FROM produtos WHERE conta = ? AND product_id = ?",
+                                     (conta, str(product_id))).fetchone()
+        if linha is None:
+            return None
+        return json.loads(zlib.decompress(linha[0]).decode("utf-8"))
+
+    def put(self, conta, produto, visto_em=None, commit=True):
+        dados = zlib.compress(json.dumps(produto, ensure_ascii=False).encode("utf-8"))
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO produtos VALUES (?, ?, ?, ?, ?)",
+                             (conta, str(produto.get("id")), dados, produto.get("modificationDate"),
+                              visto_em or time.time()))
+            if commit:
+                self._db.commit()
+
+    def contar(self, conta):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM produtos WHERE conta = ?", (conta,)).fetchone()[0]
+
+    def ultima_sincronizacao(self, conta):
+        """(maior modificationDate vista, epoch da sincronização) ou None se a conta nunca foi espelhada."""
+        with self._lock:
+            return self._db.execute("SELECT ultima_modificacao, sincronizado_em FROM sincronizacoes WHERE conta = ?",
+                                    (conta,)).fetchone()
+
+    def sincronizar(self, token, completo=False, ao_gravar=None):
+        """
+        Traz para o espelho o que mudou desde a última sincronização (ou tudo, se
+        for a primeira ou completo=True). Com completo=True os produtos que não
+        vieram na listagem são removidos. ao_gravar(produto) é chamado para cada
+        produto novo ou alterado. Retorna (lidos, gravados, removidos).
+        """
+        conta = conta_do_token(token)
+        headers = client.headers_da_conta(token)
+        anterior = None if completo else self.ultima_sincronizacao(conta)
+        params = {}
+        desde = param_desde()
+        if anterior and anterior[0] and desde:
+            params[desde] = anterior[0]
+
+        with self._lock:
+            conhecidas = dict(self._db.execute(
+                "SELECT product_id, modification_date FROM produtos WHERE conta = ?", (conta,)).fetchall())
+
+        inicio = time.time()
+        ultima = anterior[0] if anterior else None
+        lidos = gravados = 0
+        for produto in client.paginar(client.API_URL_PRODUCTS, headers, params):
+            lidos += 1
+            product_id = str(produto.get("id"))
+            data = produto.get("modificationDate")
+            if data and (ultima is None or data > ultima):
+                ultima = data
+            # sem data não dá para saber se mudou: regrava
+            if completo or product_id not in conhecidas or not data or data != conhecidas[product_id]:
+                self.put(conta, produto, visto_em=inicio, commit=False)
+                gravados += 1
+                if ao_gravar is not None:
+                    ao_gravar(produto)
+            if lidos % LOTE_COMMIT == 0:
+                with self._lock:
+                    self._db.commit()
+                print(f"   ... {lidos} produtos lidos / {gravados} gravados")
+
+        removidos = 0
+        with self._lock:
+            if completo:
+                removidos = self._db.execute("DELETE FROM produtos WHERE conta = ? AND visto_em < ?",
+                                             (conta, inicio)).rowcount
+            self._db.execute("INSERT OR REPLACE INTO sincronizacoes VALUES (?, ?, ?, ?)",
+                             (conta, ultima, inicio,
+                              self._db.execute("SELECT COUNT(*) FROM produtos WHERE conta = ?",
+                                               (conta,)).fetchone()[0]))
+            self._db.commit()
+        return lidos, gravados, removidos
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+_espelho = None
+_espelho_lock = threading.Lock()
+# None: segue ANY_ESPELHO=1, que liga a leitura pelo espelho sem --espelho (ex.: workers da fila)
+_habilitado = None
+
+
+def configurar(habilitado=True):
+    """habilitado=True: obter/buscar_produto leem primeiro do espelho."""
+    global _habilitado
+    _habilitado = habilitado
+
+
+def habilitado():
+    if _habilitado is not None:
+        return _habilitado
+    return os.getenv("ANY_ESPELHO", "") == "1"
+
+
+def get_espelho():
+    global _espelho
+    with _espelho_lock:
+        if _espelho is None:
+            _espelho = Espelho()
+    return _espelho
+
+
+def obter(token, product_id):
+    """Produto de origem do espelho, ou None se o espelho está desligado ou não o tem."""
+    if not habilitado():
+        return None
+    return get_espelho().get(conta_do_token(token), product_id)
+
+
+def guardar(token, produto):
+    """Grava no espelho um produto buscado por GET (só com o espelho ligado)."""
+    if habilitado() and isinstance(produto, dict) and produto.get("id") is not None:
+        get_espelho().put(conta_do_token(token), produto)
+
+
+def buscar_produto(token, product_id):
+    """
+    Espelho primeiro, GET /v2/products/{id} se faltar.
+    Retorna (http_code, produto) ou (http_code, texto do erro).
+    """
+    produto = obter(token, product_id)
+    if produto is not None:
+        return 200, produto
+    response = client.get(API_URL_GET.format(id=product_id), headers=client.headers_da_conta(token))
+    if response.status_code != 200:
+        return response.status_code, response.text
+    produto = response.json()
+    guardar(token, produto)
+    return 200, produto
+
+
+def main():
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Monta ou atualiza o espelho local do catálogo de uma conta AnyMarket")
+    parser.add_argument("--conta", default="ANY_1", help="variável de ambiente com o token (ANY_1, ANY_2, REPLETA)")
+    parser.add_argument("--completo", action="store_true",
+                        help="relê e regrava tudo e remove do espelho os produtos que não existem mais")
+    parser.add_argument("--sem-indice", action="store_true",
+                        help="não atualiza o índice local de SKUs com os produtos alterados")
+    args = parser.parse_args()
+
+    token = os.getenv(args.conta)
+    if not token:
+        print(f"❌ Variável {args.conta} não definida")
+        return
+    espelho = get_espelho()
+    conta = conta_do_token(token)
+    anterior = espelho.ultima_sincronizacao(conta)
+    if args.completo or anterior is None:
+        print(f"=== ESPELHANDO O CATÁLOGO DA CONTA {args.conta} (completo) ===")
+    else:
+        print(f"=== ATUALIZANDO O ESPELHO DA CONTA {args.conta} (alterados desde {anterior[0]}) ===")
+
+    indice = None
+    if not args.sem_indice:
+        from copysku.sku_index import get_indice
+
+        indice = get_indice()
+
+    def ao_gravar(produto):
+        # produto alterado: a cópia no cache de produtos (--cache) deixa de valer
+        cache.invalidar(token, produto.get("id"))
+        if indice is not None:
+            indice.gravar_produto(conta, produto)
+
+    inicio = time.perf_counter()
+    lidos, gravados, removidos = espelho.sincronizar(token, completo=args.completo, ao_gravar=ao_gravar)
+    print(f"✅ {lidos} produtos lidos, {gravados} gravados, {removidos} removidos "
+          f"em {time.perf_counter() - inicio:.1f}s — {espelho.contar(conta)} no espelho ({espelho.caminho})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Fan-out: busca o produto de origem uma vez e publica em várias contas destino.
+
+O GET vai uma vez só à conta de origem; o payload de cada destino sai do seu
+perfil (copysku/perfis.py) e os POSTs rodam ao mesmo tempo, cada um no
+limitador de taxa da sua conta. O resultado vem separado por destino.
+"""
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from copysku import categorias, client, espelho, marcas, perfis
+
+# ========== CONFIGURAÇÕES ==========
+# destino -> variável de ambiente com o token, perfil e estoque padrão
+DESTINOS = {
+    "any2": {"token": "ANY_2", "perfil": "ANY_2", "estoque": 26730},
+    "repleta": {"token": "REPLETA", "perfil": "REPLETA", "estoque": 45479},
+}
+# ===================================
+
+
+def montar_payloads(produto, destinos, novo_sku, novo_ean, estoques=None, token_origem=None):
+    """
+    destino -> payload, cada um com o perfil e o estoque do seu destino (a origem não é alterada).
+    Com token_origem, categoria e marca são traduzidas para as de cada destino
+    (copysku/categorias.py e copysku/marcas.py).
+    """
+    estoques = estoques or {}
+    payloads = {}
+    for destino in destinos:
+        config = DESTINOS[destino]
+        categoria = marca = None
+        if token_origem is not None:
+            token_destino = os.getenv(config["token"])
+            categoria = categorias.mapear(token_origem, token_destino, produto.get("category"))
+            marca = marcas.resolver(token_origem, token_destino, produto.get("brand"))
+        payloads[destino] = perfis.transformar(config["perfil"], produto, novo_sku=novo_sku, novo_ean=novo_ean,
+                                               estoque=estoques.get(destino) or config["estoque"],
+                                               categoria=categoria, marca=marca)
+    return payloads
+
+
+def _postar(destino, payload, novo_sku):
+    headers = client.headers_da_conta(os.getenv(DESTINOS[destino]["token"]))
+    try:
+        # retries com conciliação: timeout depois de gravado não duplica o produto
+        return client.criar_produto(headers, json.dumps(payload), novo_sku)
+    except Exception as ex:
+        # falha de um destino não derruba os outros
+        return "", str(ex)
+
+
+def publicar(payloads, novo_sku):
+    """POST de cada payload no seu destino, em paralelo. Retorna destino -> (http_code, json ou texto)."""
+    if len(payloads) == 1:
+        destino, payload = next(iter(payloads.items()))
+        return {destino: _postar(destino, payload, novo_sku)}
+    with ThreadPoolExecutor(max_workers=len(payloads)) as pool:
+        futuros = {destino: pool.submit(_postar, destino, payload, novo_sku) for destino, payload in payloads.items()}
+        return {destino: futuro.result() for destino, futuro in futuros.items()}
+
+
+def clonar_para_destinos(token_origem, id_prod_hub, destinos, novo_sku, novo_ean, estoques=None, mostrar_json=False):
+    """
+    Um GET na origem (ou o espelho local, se ligado) e um POST por destino. Retorna destino -> (http_code, texto);
+    se o GET falhar, todos os destinos recebem o erro do GET.
+    """
+    code, produto = espelho.buscar_produto(token_origem, id_prod_hub)
+    if code != 200:
+        print("❌ Erro ao buscar produto:", code, produto)
+        return {destino: (code, produto) for destino in destinos}
+
+    payloads = montar_payloads(produto, destinos, novo_sku, novo_ean, estoques, token_origem=token_origem)
+    if mostrar_json:
+        for destino, payload in payloads.items():
+            print(f"\n✅ JSON FINAL ENVIADO ({destino}):")
+            print(json.dumps(payload, indent=2, ensure_ascii=False))
+
+    resultados = publicar(payloads, novo_sku)
+    # impressão só depois dos POSTs: as threads do fan-out não escrevem no stdout da linha
+    for destino, (code, texto) in resultados.items():
+        if code in (200, 201):
+            print(f"✅ [{destino}] Produto {novo_sku} criado com sucesso!")
+        else:
+            print(f"❌ [{destino}] Erro ao criar novo produto:", code, texto)
+    return resultados
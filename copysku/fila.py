@@ -0,0 +1,372 @@
+"""
+Fila local de tarefas (SQLite) drenada por um pool de processos.
+
+    python -m copysku.fila enfileirar kit-sheet kits.xlsx --modo componentes
+    python -m copysku.fila enfileirar simple produtos.csv --destino repleta
+    python -m copysku.fila trabalhar --processos 4 --ate-esvaziar
+    python -m copysku.fila status [--falhas]
+    python -m copysku.fila reenfileirar
+
+Cada linha de planilha vira uma tarefa PENDENTE. Cada processo do pool carrega
+o script do tipo da tarefa uma vez só (sessões HTTP, cache e índice ficam
+quentes) e pega tarefas da fila uma a uma. A taxa de requisições configurada
+(ANY_RATE/ANY_RATE_MAX) é dividida entre os processos, então um pool único
+substitui vários scripts competindo pelo mesmo limite da conta.
+"""
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+
+from copysku import journal
+from copysku.batch import ler_linhas
+from copysku.cli import SCRIPTS
+
+# ========== CONFIGURAÇÕES ==========
+# Padrão de ANY_QUEUE_PATH, lida ao abrir a fila
+FILA_PATH_PADRAO = os.path.join("~", ".copysku", "fila.sqlite")
+# Tarefa EXECUTANDO sem conclusão depois disso é de um processo que morreu: volta para PENDENTE
+LEASE_SEGUNDOS = 600
+# Espera entre consultas quando a fila está vazia
+ESPERA_VAZIA = 1.0
+# Tamanho máximo da mensagem de erro guardada na tarefa
+MAX_ERRO = 300
+# ===================================
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PENDENTE, EXECUTANDO, SUCESSO, FALHA = "PENDENTE", "EXECUTANDO", "SUCESSO", "FALHA"
+
+
+# ===================== TIPOS DE TAREFA =====================
+# tipo -> (colunas obrigatórias, executor(namespace do script, linha))
+
+def _simple_any1(ns, l):
+    return ns["clonar_produto"](l["id_prod_hub"], l["novo_sku"], l["novo_ean"], mostrar_json=False)
+
+
+def _simple_estoque(ns, l):
+    return ns["clonar_produto"](l["id_prod_hub"], l["novo_sku"], l["novo_ean"], l["estoque"], mostrar_json=False)
+
+
+def _simple_multi(ns, l):
+    from copysku import fanout
+
+    destinos = sorted(fanout.DESTINOS)
+    estoques = {d: l.get(f"estoque_{d}") for d in destinos}
+    return ns["clonar_produto"](l["id_prod_hub"], l["novo_sku"], l["novo_ean"], destinos, estoques, mostrar_json=False)
+
+
+def _variations_sufixo(ns, l):
+    from copysku import variacoes
+
+    return ns["clonar_produto_com_variacoes"](l["id_prod_hub"], l["novo_sku"], l.get("novo_ean", ""),
+                                              variacoes.por_sufixo(l["novo_sku"]), mostrar_json=False)
+
+
+def _kit_itens(ns, l):
+    return ns["process_row"](l["id_prod_hub"], l["novo_sku"], l.get("novo_ean", ""), l.get("sku_composicao", ""))
+
+
+def _kit_componentes(ns, l):
+    return ns["clonar_produto_como_kit"](l["id_prod_hub"], l["novo_sku"], l["novo_ean"], l["sku_composicao"])
+
+
+BASICAS = ["id_prod_hub", "novo_sku", "novo_ean"]
+TIPOS = {
+    "simple:any1": (BASICAS, _simple_any1),
+    "simple:any2": (BASICAS + ["estoque"], _simple_estoque),
+    "simple:repleta": (BASICAS + ["estoque"], _simple_estoque),
+    "simple:multi": (BASICAS, _simple_multi),
+    # variações na fila usam a regra de sufixo (novo_sku + A, B, C...)
+    "variations:any1": (["id_prod_hub", "novo_sku"], _variations_sufixo),
+    "variations:any2": (["id_prod_hub", "novo_sku"], _variations_sufixo),
+    "variations:repleta": (["id_prod_hub", "novo_sku"], _variations_sufixo),
+    "kit-sheet:itens": (BASICAS + ["sku_composicao"], _kit_itens),
+    "kit-sheet:componentes": (BASICAS + ["sku_composicao"], _kit_componentes),
+}
+
+
+def _resultado(retorno):
+    """Normaliza o retorno dos scripts: bool, (http_code, texto) ou dict destino -> (http_code, texto)."""
+    from copysku.resultlog import _novo_id
+
+    if isinstance(retorno, bool) or retorno is None:
+        return (SUCESSO if retorno else FALHA), None, None, None
+    if isinstance(retorno, dict):
+        codigos = {d: c for d, (c, _) in retorno.items()}
+        ok = all(c in (200, 201) for c in codigos.values())
+        ids = {d: _novo_id(t) for d, (c, t) in retorno.items() if c in (200, 201)}
+        erros = "; ".join(f"{d}: {str(t)[:MAX_ERRO]}" for d, (c, t) in retorno.items() if c not in (200, 201))
+        return (SUCESSO if ok else FALHA), json.dumps(codigos), json.dumps(ids) if ids else None, erros or None
+    code, texto = retorno
+    if code in (200, 201):
+        novo_id = _novo_id(texto)
+        return SUCESSO, code, None if novo_id is None else str(novo_id), None
+    texto = texto if isinstance(texto, str) else json.dumps(texto, ensure_ascii=False)
+    return FALHA, code, None, texto[:MAX_ERRO]
+
+
+# ===================== FILA =====================
+
+def caminho_fila():
+    return os.path.expanduser(os.getenv("ANY_QUEUE_PATH", FILA_PATH_PADRAO))
+
+
+class Fila:
+    """Tabela tarefas em SQLite (WAL); vários processos leem e gravam ao mesmo tempo."""
+
+    def __init__(self, caminho=None):
+        caminho = caminho or caminho_fila()
+        self._lock = threading.Lock()
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        # isolation_level=None: as transações são abertas à mão (BEGIN IMMEDIATE ao pegar tarefa)
+        self._db = sqlite3.connect(caminho, timeout=30, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS tarefas (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                tipo TEXT NOT NULL,
+                dados TEXT NOT NULL,
+                origem TEXT,
+                linha INTEGER,
+                status TEXT NOT NULL,
+                worker TEXT,
+                http_code TEXT,
+                novo_id TEXT,
+                erro TEXT,
+                criado_em REAL NOT NULL,
+                atualizado_em REAL NOT NULL
+            )""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_tarefas_status ON tarefas (status, id)")
+
+    def enfileirar(self, tipo, linhas, origem=None):
+        """linhas: iterável de (n, dict). Retorna o nº de tarefas criadas."""
+        agora = time.time()
+        with self._lock:
+            # tudo ou nada: uma planilha que falha no meio da leitura não deixa tarefas pela metade
+            self._db.execute("BEGIN")
+            try:
+                cursor = self._db.executemany(
+                    "INSERT INTO tarefas (tipo, dados, origem, linha, status, criado_em, atualizado_em) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    ((tipo, json.dumps(linha, ensure_ascii=False), origem, n, PENDENTE, agora, agora)
+                     for n, linha in linhas))
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return cursor.rowcount
+
+    def pegar(self, worker):
+        """Marca a próxima tarefa PENDENTE como EXECUTANDO por este worker e a devolve (ou None)."""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                r = self._db.execute(
+                    "SELECT id, tipo, dados, linha FROM tarefas WHERE status = ? ORDER BY id LIMIT 1",
+                    (PENDENTE,)).fetchone()
+                if r is not None:
+                    self._db.execute("UPDATE tarefas SET status = ?, worker = ?, atualizado_em = ? WHERE id = ?",
+                                     (EXECUTANDO, worker, time.time(), r[0]))
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        if r is None:
+            return None
+        return {"id": r[0], "tipo": r[1], "linha": json.loads(r[2]), "n": r[3]}
+
+    def concluir(self, tarefa_id, status, http_code=None, novo_id=None, erro=None):
+        with self._lock:
+            self._db.execute("UPDATE tarefas SET status = ?, http_code = ?, novo_id = ?, erro = ?, atualizado_em = ? "
+                             "WHERE id = ?", (status, None if http_code is None else str(http_code), novo_id, erro,
+                                              time.time(), tarefa_id))
+
+    def recuperar_orfas(self, lease=LEASE_SEGUNDOS):
+        """Tarefas EXECUTANDO há mais que o lease voltam para PENDENTE. Retorna quantas."""
+        with self._lock:
+            cursor = self._db.execute("UPDATE tarefas SET status = ?, worker = NULL WHERE status = ? AND atualizado_em < ?",
+                                      (PENDENTE, EXECUTANDO, time.time() - lease))
+        return cursor.rowcount
+
+    def reenfileirar_falhas(self):
+        with self._lock:
+            cursor = self._db.execute("UPDATE tarefas SET status = ?, worker = NULL, erro = NULL, atualizado_em = ? "
+                                      "WHERE status = ?", (PENDENTE, time.time(), FALHA))
+        return cursor.rowcount
+
+    def contagem(self):
+        with self._lock:
+            return dict(self._db.execute("SELECT status, COUNT(*) FROM tarefas GROUP BY status").fetchall())
+
+    def listar(self, status, limite=20):
+        with self._lock:
+            return self._db.execute(
+                "SELECT id, tipo, origem, linha, worker, http_code, erro, atualizado_em FROM tarefas "
+                "WHERE status = ? ORDER BY id DESC LIMIT ?", (status, limite)).fetchall()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+# ===================== WORKERS =====================
+
+def trabalhar(ate_esvaziar=False, nome=None):
+    """Laço de um processo worker: pega, executa e conclui tarefas até a fila esvaziar (ou para sempre)."""
+    nome = nome or f"{socket.gethostname()}:{os.getpid()}"
+    fila = Fila()
+    fila.recuperar_orfas()
+    # script de cada tipo carregado uma vez por processo (conexões e caches ficam quentes)
+    scripts = {}
+    feitas = 0
+    try:
+        while True:
+            tarefa = fila.pegar(nome)
+            if tarefa is None:
+                if ate_esvaziar:
+                    break
+                time.sleep(ESPERA_VAZIA)
+                continue
+
+            tipo, linha = tarefa["tipo"], tarefa["linha"]
+            print(f"\n[{nome}] tarefa {tarefa['id']} ({tipo}) id_prod_hub={linha.get('id_prod_hub')} "
+                  f"novo_sku={linha.get('novo_sku')}")
+            try:
+                if tipo not in scripts:
+                    comando, opcao = tipo.split(":")
+                    import runpy
+
+                    scripts[tipo] = runpy.run_path(SCRIPTS[comando][opcao], run_name="copysku_fila")
+                # os scripts de kit consultam o diário pela linha atual (sem diário aberto é no-op)
+                with journal.linha(tarefa["n"]):
+                    retorno = TIPOS[tipo][1](scripts[tipo], linha)
+                status, http_code, novo_id, erro = _resultado(retorno)
+            except Exception as ex:
+                print("❌ Erro inesperado:", ex)
+                status, http_code, novo_id, erro = FALHA, None, None, str(ex)[:MAX_ERRO]
+            fila.concluir(tarefa["id"], status, http_code, novo_id, erro)
+            feitas += 1
+            sys.stdout.flush()
+    finally:
+        for ns in scripts.values():
+            if "close_logs" in ns:
+                ns["close_logs"]()
+        fila.close()
+    return feitas
+
+
+def iniciar_pool(processos, ate_esvaziar=False, pasta_logs=None):
+    """
+    Sobe N processos worker (python -m copysku.fila trabalhar --filho) com a taxa
+    por conta dividida entre eles, mostra o andamento e espera todos terminarem.
+    """
+    from copysku import ratelimit
+
+    pasta_logs = pasta_logs or os.path.dirname(caminho_fila())
+    os.makedirs(pasta_logs, exist_ok=True)
+    env = dict(os.environ)
+    env["ANY_RATE"] = str(ratelimit.ler_taxa_inicial() / processos)
+    env["ANY_RATE_MAX"] = str(ratelimit.ler_taxa_max() / processos)
+    env["PYTHONIOENCODING"] = "utf-8"
+
+    filhos = []
+    for i in range(processos):
+        log = open(os.path.join(pasta_logs, f"worker-{i + 1}.log"), "a", encoding="utf-8")
+        comando = [sys.executable, "-m", "copysku.fila", "trabalhar", "--filho"]
+        if ate_esvaziar:
+            comando.append("--ate-esvaziar")
+        filhos.append((subprocess.Popen(comando, cwd=os.getcwd(), env=dict(env, PYTHONPATH=RAIZ),
+                                        stdout=log, stderr=subprocess.STDOUT), log))
+    print(f"🚀 {processos} worker(s) iniciados — logs em {pasta_logs}")
+
+    fila = Fila()
+    try:
+        while any(p.poll() is None for p, _ in filhos):
+            time.sleep(5)
+            print("   " + _linha_contagem(fila.contagem()))
+    except KeyboardInterrupt:
+        print("⏹️  Interrompido — parando os workers (as tarefas em execução voltam para a fila pelo lease)")
+        for p, _ in filhos:
+            p.terminate()
+    finally:
+        for p, log in filhos:
+            p.wait()
+            log.close()
+    print("✅ " + _linha_contagem(fila.contagem()))
+    fila.close()
+
+
+def _linha_contagem(contagem):
+    return " | ".join(f"{s}: {contagem.get(s, 0)}" for s in (PENDENTE, EXECUTANDO, SUCESSO, FALHA))
+
+
+# ===================== LINHA DE COMANDO =====================
+
+def main():
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Fila local de tarefas de clonagem/kits AnyMarket")
+    sub = parser.add_subparsers(dest="acao")
+    sub.required = True
+
+    p = sub.add_parser("enfileirar", help="cria uma tarefa por linha da planilha")
+    p.add_argument("comando", choices=sorted({t.split(":")[0] for t in TIPOS}))
+    p.add_argument("planilha", help="CSV/XLSX ('-' lê da entrada padrão)")
+    p.add_argument("--destino", help="simple/variations: any1, any2, repleta ou multi")
+    p.add_argument("--modo", help="kit-sheet: itens ou componentes")
+
+    p = sub.add_parser("trabalhar", help="drena a fila com um pool de processos")
+    p.add_argument("--processos", type=int, default=2, help="processos worker (padrão: %(default)s)")
+    p.add_argument("--ate-esvaziar", action="store_true", help="termina quando não houver mais tarefas pendentes")
+    p.add_argument("--filho", action="store_true", help=argparse.SUPPRESS)
+
+    p = sub.add_parser("status", help="tarefas pendentes/em execução/com falha")
+    p.add_argument("--falhas", action="store_true", help="lista as últimas tarefas com falha")
+
+    sub.add_parser("reenfileirar", help="volta as tarefas com falha para PENDENTE")
+    args = parser.parse_args()
+
+    if args.acao == "enfileirar":
+        opcao = args.modo or args.destino or ("itens" if args.comando == "kit-sheet" else "any1")
+        tipo = f"{args.comando}:{opcao}"
+        if tipo not in TIPOS:
+            print(f"❌ Tipo de tarefa inválido: {tipo} (válidos: {', '.join(sorted(TIPOS))})")
+            return
+        try:
+            linhas = ler_linhas(args.planilha, TIPOS[tipo][0])
+        except (OSError, ValueError) as e:
+            print(f"❌ {e}")
+            return
+        fila = Fila()
+        n = fila.enfileirar(tipo, enumerate(linhas, start=1), origem=os.path.abspath(args.planilha))
+        print(f"✅ {n} tarefa(s) {tipo} enfileiradas — {_linha_contagem(fila.contagem())}")
+    elif args.acao == "trabalhar":
+        if args.filho or args.processos <= 1:
+            feitas = trabalhar(ate_esvaziar=args.ate_esvaziar)
+            print(f"✅ {feitas} tarefa(s) processadas")
+        else:
+            iniciar_pool(args.processos, ate_esvaziar=args.ate_esvaziar)
+    elif args.acao == "status":
+        fila = Fila()
+        print(_linha_contagem(fila.contagem()))
+        for id_, tipo, origem, linha, worker, *_ in fila.listar(EXECUTANDO):
+            print(f"   ▶️  {id_} {tipo} linha {linha} de {os.path.basename(origem or '-')} em {worker}")
+        if args.falhas:
+            for id_, tipo, origem, linha, worker, http_code, erro, _ in fila.listar(FALHA):
+                print(f"   ❌ {id_} {tipo} linha {linha} de {os.path.basename(origem or '-')}: HTTP {http_code} {erro or ''}")
+    elif args.acao == "reenfileirar":
+        print(f"🔁 {Fila().reenfileirar_falhas()} tarefa(s) de volta para a fila")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+from copysku import client
+from copysku.cache import conta_do_token
+
+
+def normalizar(texto):
+    """'  Marca  Ação ' -> 'marca acao' (sem acento, sem maiúsculas, espaços simples)."""
+    texto = unicodedata.normalize("NFKD", str(texto or ""))
+    texto = "".join(c for c in texto if not unicodedata.combining(c)).casefold()
+    return re.sub(r"\s+", " ", texto).strip()
+
+
+class IndiceContas:
+    """
+    Base dos índices por conta gravados em SQLite (categorias, marcas):
+    TABELA(conta, id, ...) com os itens de cada conta, listas(conta, atualizado_em)
+    para o TTL e mapeamento(conta_origem, conta_destino, id_origem) -> id_destino.
+
+    A subclasse define TABELA, COLUNAS (colunas além de conta e id), API_URL,
+    linhas(itens da API) -> [(id, ...)] e montar([(id, ...)]) -> objeto em memória.
+    """
+
+    TABELA = None
+    COLUNAS = None
+    API_URL = None
+
+    def __init__(self, caminho, ttl):
+        self.caminho = caminho
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._carga_lock = threading.Lock()
+        self._memoria = {}
+        self._recarregadas = set()
+        self._avisadas = set()
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        self._db = sqlite3.connect(caminho, check_same_thread=False)
+        self._db.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.TABELA} (
+                conta TEXT NOT NULL,
+                id INTEGER NOT NULL,
+                {self.COLUNAS},
+                PRIMARY KEY (conta, id)
+            )""")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS listas (
+                conta TEXT PRIMARY KEY,
+                atualizado_em REAL NOT NULL
+            )""")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS mapeamento (
+                conta_origem TEXT NOT NULL,
+                conta_destino TEXT NOT NULL,
+                id_origem INTEGER NOT NULL,
+                id_destino INTEGER NOT NULL,
+                criterio TEXT,
+                PRIMARY KEY (conta_origem, conta_destino, id_origem)
+            )""")
+        self._db.commit()
+
+    def linhas(self, itens):
+        raise NotImplementedError
+
+    def montar(self, linhas):
+        raise NotImplementedError
+
+    def atualizar(self, token, forcar=False):
+        """
+        Baixa todos os itens da conta se nunca foram baixados, passaram do TTL ou
+        forcar=True, e apaga os mapeamentos que apontavam para itens que sumiram.
+        Retorna o nº de itens baixados (0 se a lista gravada ainda vale).
+        """
+        conta = conta_do_token(token)
+        with self._lock:
+            linha = self._db.execute("SELECT atualizado_em FROM listas WHERE conta = ?", (conta,)).fetchone()
+        if not forcar and linha is not None and time.time() - linha[0] < self.ttl:
+            return 0
+
+        linhas = self.linhas(client.paginar(self.API_URL, client.headers_da_conta(token)))
+        marcadores = ", ".join("?" * (len(linhas[0]) + 1)) if linhas else ""
+        with self._lock:
+            self._db.execute(f"DELETE FROM {self.TABELA} WHERE conta = ?", (conta,))
+            if linhas:
+                self._db.executemany(f"INSERT OR REPLACE INTO {self.TABELA} VALUES ({marcadores})",
+                                     [(conta,) + tuple(l) for l in linhas])
+            # mapeamentos para itens que sumiram do destino são refeitos na próxima resolução
+            self._db.execute(f"DELETE FROM mapeamento WHERE conta_destino = ? AND id_destino NOT IN "
+                             f"(SELECT id FROM {self.TABELA} WHERE conta = ?)", (conta, conta))
+            self._db.execute("INSERT OR REPLACE INTO listas VALUES (?, ?)", (conta, time.time()))
+            self._db.commit()
+            self._memoria.pop(conta, None)
+        return len(linhas)
+
+    def carregar(self, token):
+        """Itens da conta em memória (montar), baixados se ainda não existem ou venceram."""
+        conta = conta_do_token(token)
+        with self._lock:
+            if conta in self._memoria:
+                return self._memoria[conta]
+        # uma carga por vez: as threads do lote esperam a primeira baixar a lista
+        with self._carga_lock:
+            self.atualizar(token)
+            with self._lock:
+                if conta not in self._memoria:
+                    linhas = self._db.execute(f"SELECT * FROM {self.TABELA} WHERE conta = ? ORDER BY id",
+                                              (conta,)).fetchall()
+                    self._memoria[conta] = self.montar([l[1:] for l in linhas])
+                return self._memoria[conta]
+
+    def recarregar_uma_vez(self, token):
+        """Baixa de novo a lista da conta, no máximo uma vez por execução (item criado depois da carga)."""
+        conta = conta_do_token(token)
+        with self._carga_lock:
+            if conta in self._recarregadas:
+                return
+            self._recarregadas.add(conta)
+            self.atualizar(token, forcar=True)
+
+    def gravar_item(self, token, linha):
+        """Grava um item criado agora (id, ...) sem baixar a lista inteira de novo."""
+        conta = conta_do_token(token)
+        with self._lock:
+            self._db.execute(f"INSERT OR REPLACE INTO {self.TABELA} VALUES ({', '.join('?' * (len(linha) + 1))})",
+                             (conta,) + tuple(linha))
+            self._db.commit()
+            self._memoria.pop(conta, None)
+
+    def mapeado(self, conta_origem, conta_destino, id_origem):
+        with self._lock:
+            linha = self._db.execute(
+                "SELECT id_destino FROM mapeamento WHERE conta_origem = ? AND conta_destino = ? AND id_origem = ?",
+                (conta_origem, conta_destino, int(id_origem))).fetchone()
+        return linha[0] if linha else None
+
+    def gravar_mapeamento(self, conta_origem, conta_destino, id_origem, id_destino, criterio=None):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO mapeamento VALUES (?, ?, ?, ?, ?)",
+                             (conta_origem, conta_destino, int(id_origem), int(id_destino), criterio))
+            self._db.commit()
+
+    def avisar_uma_vez(self, chave, mensagem):
+        if chave not in self._avisadas:
+            self._avisadas.add(chave)
+            print(mensagem)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,147 @@
+import contextlib
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+# ========== CONFIGURAÇÕES ==========
+# Padrão de ANY_JOURNAL_PATH, lida ao abrir o diário
+JOURNAL_PATH_PADRAO = os.path.join("~", ".copysku", "diario.sqlite")
+# ===================================
+
+
+def hash_planilha(caminho):
+    """sha256 do conteúdo da planilha (lido em blocos, sem carregar o arquivo inteiro)."""
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+class Diario:
+    """
+    Diário de execução em SQLite: uma entrada por (hash da planilha, linha,
+    novo_sku) com a última etapa alcançada e o resultado. Cada registro é
+    gravado na hora, então um processo interrompido deixa o estado de todas
+    as linhas já tocadas.
+    """
+
+    def __init__(self, caminho=None):
+        caminho = caminho or os.path.expanduser(os.getenv("ANY_JOURNAL_PATH", JOURNAL_PATH_PADRAO))
+        self._lock = threading.Lock()
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        self._db = sqlite3.connect(caminho, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                planilha TEXT NOT NULL,
+                linha INTEGER NOT NULL,
+                novo_sku TEXT NOT NULL,
+                etapa TEXT NOT NULL,
+                status TEXT,
+                http_code TEXT,
+                atualizado_em REAL NOT NULL,
+                PRIMARY KEY (planilha, linha, novo_sku)
+            )""")
+        self._db.commit()
+
+    def status(self, planilha, linha, novo_sku):
+        with self._lock:
+            r = self._db.execute("SELECT status FROM jobs WHERE planilha = ? AND linha = ? AND novo_sku = ?",
+                                 (planilha, linha, str(novo_sku))).fetchone()
+        return r[0] if r else None
+
+    def registrar(self, planilha, linha, novo_sku, etapa, status=None, http_code=None):
+        with self._lock:
+            self._db.execute("""
+                INSERT INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (planilha, linha, novo_sku) DO UPDATE SET
+                    etapa = excluded.etapa,
+                    status = excluded.status,
+                    http_code = COALESCE(excluded.http_code, jobs.http_code),
+                    atualizado_em = excluded.atualizado_em""",
+                             (planilha, linha, str(novo_sku), etapa, status,
+                              None if http_code in (None, "") else str(http_code), time.time()))
+            self._db.commit()
+
+    def limpar(self, planilha):
+        with self._lock:
+            self._db.execute("DELETE FROM jobs WHERE planilha = ?", (planilha,))
+            self._db.commit()
+
+    def post_interrompido(self, planilha):
+        """(linha, novo_sku) que pararam na etapa POST sem resultado (processo caiu durante o envio)."""
+        with self._lock:
+            return set(self._db.execute(
+                "SELECT linha, novo_sku FROM jobs WHERE planilha = ? AND etapa = 'POST' AND status IS NULL",
+                (planilha,)).fetchall())
+
+    def contagem(self, planilha):
+        with self._lock:
+            linhas = self._db.execute(
+                "SELECT COALESCE(status, etapa), COUNT(*) FROM jobs WHERE planilha = ? GROUP BY 1",
+                (planilha,)).fetchall()
+        return dict(linhas)
+
+
+# Diário ativo da execução + linha que cada thread está processando.
+# Sem diário ativo todas as funções abaixo viram no-op.
+_diario = None
+_planilha = None
+_post_interrompido = set()
+_local = threading.local()
+
+
+def abrir(caminho_planilha, retomar=False):
+    """
+    Ativa o diário para a planilha. Sem retomar, as entradas anteriores dessa
+    mesma planilha são descartadas (execução do zero). Planilha lida da
+    entrada padrão ('-') não tem conteúdo fixo para identificar: roda sem diário.
+    """
+    global _diario, _planilha, _post_interrompido
+    if caminho_planilha == "-":
+        if retomar:
+            print("⚠️  Planilha pela entrada padrão: --resume indisponível, todas as linhas serão processadas")
+        return {}
+    _diario = Diario()
+    _planilha = hash_planilha(caminho_planilha)
+    if not retomar:
+        _diario.limpar(_planilha)
+    _post_interrompido = _diario.post_interrompido(_planilha)
+    return _diario.contagem(_planilha)
+
+
+@contextlib.contextmanager
+def linha(numero):
+    _local.linha = numero
+    try:
+        yield
+    finally:
+        _local.linha = None
+
+
+def concluido(novo_sku):
+    """True se (linha atual, novo_sku) já terminou com sucesso numa execução anterior."""
+    if _diario is None:
+        return False
+    return _diario.status(_planilha, getattr(_local, "linha", None), novo_sku) == "SUCCESS"
+
+
+def post_interrompido(novo_sku):
+    """
+    True se na execução anterior (linha atual, novo_sku) parou no meio do POST:
+    o produto pode ter sido criado, então é preciso conferir antes de reenviar.
+    """
+    if _diario is None:
+        return False
+    return (getattr(_local, "linha", None), str(novo_sku)) in _post_interrompido
+
+
+def registrar(novo_sku, etapa, status=None, http_code=None):
+    if _diario is None:
+        return
+    _diario.registrar(_planilha, getattr(_local, "linha", None), novo_sku, etapa, status, http_code)
@@ -0,0 +1,179 @@
+"""
+Marcas entre contas: a marca de origem vira a de mesmo nome no destino,
+criada uma vez se ainda não existir.
+"""
+import argparse
+import json
+import os
+import threading
+
+from copysku import client, indice_contas
+from copysku.cache import conta_do_token
+from copysku.indice_contas import normalizar
+
+# ========== CONFIGURAÇÕES ==========
+# Padrões de ANY_MARCAS_PATH / ANY_MARCAS_TTL, lidas ao criar o índice
+MARCAS_PATH_PADRAO = os.path.join("~", ".copysku", "marcas.sqlite")
+API_URL_BRANDS = "/v2/brands"
+# Idade máxima da lista de marcas gravada antes de baixar de novo (segundos)
+TTL_PADRAO = 24 * 3600
+# ===================================
+
+
+def criar_faltantes():
+    """ANY_MARCAS_CRIAR=0: marca sem par no destino fica de fora em vez de ser criada."""
+    return os.getenv("ANY_MARCAS_CRIAR", "1") != "0"
+
+
+class IndiceMarcas(indice_contas.IndiceContas):
+    """Marcas de cada conta em marcas(conta, id, nome, nome_normalizado) e o mapeamento entre contas."""
+
+    TABELA = "marcas"
+    COLUNAS = "nome TEXT, nome_normalizado TEXT"
+    API_URL = API_URL_BRANDS
+
+    def __init__(self, caminho=None, ttl=None):
+        caminho = caminho or os.path.expanduser(os.getenv("ANY_MARCAS_PATH", MARCAS_PATH_PADRAO))
+        ttl = int(os.getenv("ANY_MARCAS_TTL", TTL_PADRAO)) if ttl is None else ttl
+        super().__init__(caminho, ttl)
+        self._criacao_lock = threading.Lock()
+
+    def linhas(self, itens):
+        return [(int(m["id"]), m.get("name"), normalizar(m.get("name"))) for m in itens if m.get("id") is not None]
+
+    def montar(self, linhas):
+        # nomes repetidos na conta: vale o menor id
+        por_nome = {}
+        for id_marca, _nome, nome_normalizado in linhas:
+            por_nome.setdefault(nome_normalizado, int(id_marca))
+        return {"por_nome": por_nome, "por_id": {int(i): nome for i, nome, _ in linhas}}
+
+    def por_nome(self, token):
+        """nome normalizado -> id das marcas da conta (em memória depois da primeira carga)."""
+        return self.carregar(token)["por_nome"]
+
+    def nome_da_marca(self, token, id_marca):
+        """Nome de uma marca da conta pelo id (a lista da conta é baixada se preciso)."""
+        return self.carregar(token)["por_id"].get(int(id_marca))
+
+    def criar(self, token, nome):
+        """
+        POST /v2/brands com o nome. Retorna o id criado ou None. Uma resposta
+        perdida é conciliada relendo as marcas do destino antes de reenviar.
+        """
+        chave = normalizar(nome)
+
+        def _conferir():
+            self.atualizar(token, forcar=True)
+            id_marca = self.por_nome(token).get(chave)
+            return {"id": id_marca} if id_marca is not None else None
+
+        code, data = client.get_json_with_retries(API_URL_BRANDS, headers=client.headers_da_conta(token),
+                                                  method="POST", data=json.dumps({"name": nome}),
+                                                  conferir=_conferir)
+        if code not in (200, 201) or not isinstance(data, dict) or data.get("id") is None:
+            print(f"❌ Erro ao criar a marca '{nome}' no destino: HTTP {code} {data}")
+            return None
+        nome_criado = data.get("name") or nome
+        self.gravar_item(token, (int(data["id"]), nome_criado, normalizar(nome_criado)))
+        print(f"✅ Marca '{nome}' criada no destino (id {data['id']})")
+        return int(data["id"])
+
+    def resolver(self, token_origem, token_destino, marca, criar=None):
+        """
+        marca: o objeto 'brand' do produto de origem ({id, name}).
+        Retorna o id da marca de mesmo nome no destino (criada se faltar e criar=True) ou None.
+        criar=None segue ANY_MARCAS_CRIAR.
+        """
+        if criar is None:
+            criar = criar_faltantes()
+        if not isinstance(marca, dict) or marca.get("id") is None:
+            return None
+        id_origem = int(marca["id"])
+        conta_origem, conta_destino = conta_do_token(token_origem), conta_do_token(token_destino)
+        if conta_origem == conta_destino:
+            return id_origem
+        id_destino = self.mapeado(conta_origem, conta_destino, id_origem)
+        if id_destino is not None:
+            return id_destino
+
+        nome = marca.get("name") or self.nome_da_marca(token_origem, id_origem)
+        if not nome:
+            return None
+        chave = normalizar(nome)
+        criterio = "nome"
+        id_destino = self.por_nome(token_destino).get(chave)
+        if id_destino is None:
+            # uma criação por marca: as outras threads esperam e reaproveitam o id
+            with self._criacao_lock:
+                # a marca pode ter sido cadastrada no destino depois da última carga
+                self.recarregar_uma_vez(token_destino)
+                id_destino = self.por_nome(token_destino).get(chave)
+                if id_destino is None and criar:
+                    id_destino, criterio = self.criar(token_destino, nome), "criada"
+        if id_destino is None:
+            self.avisar_uma_vez(chave, f"⚠️  Marca '{nome}' sem par no destino — produto vai sem marca")
+            return None
+        self.gravar_mapeamento(conta_origem, conta_destino, id_origem, id_destino, criterio)
+        return id_destino
+
+
+_indice = None
+_indice_lock = threading.Lock()
+
+
+def get_indice():
+    global _indice
+    with _indice_lock:
+        if _indice is None:
+            _indice = IndiceMarcas()
+    return _indice
+
+
+def resolver(token_origem, token_destino, marca):
+    """
+    Atalho para get_indice().resolver(...): id da marca no destino ou None.
+    Falha ao consultar as marcas não derruba a clonagem: o produto vai sem marca.
+    """
+    try:
+        return get_indice().resolver(token_origem, token_destino, marca)
+    except Exception as ex:
+        print(f"⚠️  Não foi possível resolver a marca ({ex}) — produto vai sem marca")
+        return None
+
+
+def main():
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Marcas e mapeamento de marcas entre contas AnyMarket")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    p_atualizar = sub.add_parser("atualizar", help="baixa de novo as marcas da conta")
+    p_atualizar.add_argument("--conta", default="ANY_2", help="variável de ambiente com o token")
+    p_mapear = sub.add_parser("mapear", help="mapeia todas as marcas da origem e lista as sem par")
+    p_mapear.add_argument("--origem", default="ANY_1", help="variável de ambiente com o token da origem")
+    p_mapear.add_argument("--destino", default="ANY_2", help="variável de ambiente com o token do destino")
+    p_mapear.add_argument("--criar", action="store_true", help="cria no destino as marcas que faltam")
+    args = parser.parse_args()
+
+    indice = get_indice()
+    if args.comando == "atualizar":
+        token = os.getenv(args.conta)
+        if not token:
+            print(f"❌ Variável {args.conta} não definida")
+            return
+        print(f"✅ {indice.atualizar(token, forcar=True)} marcas da conta {args.conta} em {indice.caminho}")
+        return
+
+    token_origem, token_destino = os.getenv(args.origem), os.getenv(args.destino)
+    if not token_origem or not token_destino:
+        print(f"❌ Variáveis {args.origem}/{args.destino} não definidas")
+        return
+    origem = indice.por_nome(token_origem)
+    sem_par = sum(1 for id_origem in origem.values()
+                  if indice.resolver(token_origem, token_destino, {"id": id_origem}, criar=args.criar) is None)
+    print(f"✅ {len(origem) - sem_par} de {len(origem)} marcas mapeadas; {sem_par} sem par")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import contextlib
+import json
+import math
+import threading
+import time
+from collections import Counter, defaultdict
+
+_lock = threading.Lock()
+_latencias = defaultdict(list)
+_status = Counter()
+_retries = Counter()
+
+
+@contextlib.contextmanager
+def etapa(nome):
+    """Cronometra um trecho: with metrics.etapa("post"): ..."""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        registrar_latencia(nome, time.perf_counter() - inicio)
+
+
+def registrar_latencia(nome, segundos):
+    with _lock:
+        _latencias[nome].append(segundos)
+
+
+def registrar_status(http_code):
+    with _lock:
+        _status[str(http_code)] += 1
+
+
+def registrar_retry(motivo):
+    with _lock:
+        _retries[str(motivo)] += 1
+
+
+def _percentil(ordenados, p):
+    if not ordenados:
+        return 0.0
+    # nearest-rank
+    i = min(len(ordenados) - 1, max(0, math.ceil(p / 100.0 * len(ordenados)) - 1))
+    return ordenados[i]
+
+
+def resumo():
+    """Resumo da execução em dict (serializável em JSON); latências em ms."""
+    from copysku import ratelimit
+
+    with _lock:
+        etapas = {}
+        for nome, amostras in _latencias.items():
+            ordenados = sorted(amostras)
+            etapas[nome] = {
+                "n": len(ordenados),
+                "p50_ms": round(_percentil(ordenados, 50) * 1000, 1),
+                "p95_ms": round(_percentil(ordenados, 95) * 1000, 1),
+                "p99_ms": round(_percentil(ordenados, 99) * 1000, 1),
+                "max_ms": round(ordenados[-1] * 1000, 1),
+                "total_s": round(sum(ordenados), 2),
+            }
+        dados = {"etapas": etapas, "http_status": dict(_status), "retries": dict(_retries)}
+    dados["requisicoes"] = ratelimit.resumo()
+    return dados
+
+
+def imprimir_resumo():
+    dados = resumo()
+    print("\n📊 Latência por etapa (ms):")
+    print(f"   {'etapa':16} {'n':>7} {'p50':>9} {'p95':>9} {'p99':>9} {'total s':>9}")
+    for nome, e in sorted(dados["etapas"].items(), key=lambda kv: -kv[1]["total_s"]):
+        print(f"   {nome:16} {e['n']:>7} {e['p50_ms']:>9} {e['p95_ms']:>9} {e['p99_ms']:>9} {e['total_s']:>9}")
+    print("   HTTP:", ", ".join(f"{k}={v}" for k, v in sorted(dados["http_status"].items())) or "-")
+    print("   Retries:", ", ".join(f"{k}={v}" for k, v in sorted(dados["retries"].items())) or "0")
+    r = dados["requisicoes"]
+    print(f"   {r['requisicoes']} requisições — {r['req_por_segundo']:.2f} req/s ({r['respostas_429']} respostas 429)")
+
+
+def salvar_json(caminho):
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(resumo(), f, indent=2, ensure_ascii=False)
@@ -0,0 +1,198 @@
+"""
+Perfis de destino declarados como dados e compilados numa transformação de passada única.
+
+Cada perfil diz o que sai, o que entra fixo e o que vem de parâmetro:
+
+    remover              campos do produto que não vão para o POST
+    fixos                campos do produto com valor fixo (ex.: hasVariations)
+    categoria_padrao     id da categoria do destino quando o parâmetro 'categoria'
+                         (resolvido por copysku/categorias.py) não vem ou é None
+    traduzir_marca       'brand' vira o parâmetro 'marca' (id no destino, resolvido por
+                         copysku/marcas.py); sem ele o produto vai sem marca
+    sku_principal        campo do objeto 'sku' -> nome do parâmetro (criado se não existir)
+    sku_principal_fixos  campos fixos do objeto 'sku'
+    skus                 campo de cada item de 'skus' -> nome do parâmetro (mesmo valor em todos)
+    skus_remover         campos removidos de cada item de 'skus'
+    skus_fixos           campos fixos de cada item de 'skus'
+    achatar_variacoes    converte 'variations' de cada SKU para o formato do POST
+    copiar_skus          False quando quem chama monta os SKUs (kits)
+
+A transformação monta um payload novo: o produto de origem nunca é alterado
+e não é copiado em profundidade. Os objetos aninhados que não mudam (imagens,
+características, descrição) são compartilhados com a origem; 'sku', cada item
+de 'skus' e os valores fixos são sempre objetos novos. Assim um mesmo produto
+buscado pode virar vários payloads de destino.
+
+    transformar = perfis.compilar("ANY_2")
+    payload = transformar(produto, novo_sku="X1", novo_ean="789...", estoque=26730,
+                          categoria=categorias.mapear(token_origem, token_destino, produto.get("category")),
+                          marca=marcas.resolver(token_origem, token_destino, produto.get("brand")))
+"""
+from copysku.variacoes import achatar_variacoes
+
+# ========== CONFIGURAÇÕES ==========
+CAMPOS_SISTEMA = ("id", "creationDate", "modificationDate", "dataSource")
+CAMPOS_SKUS_VARIACAO = ("id", "idVariation", "stockLocalId")
+
+# Categoria de cada conta destino quando a de origem não tem par no mapeamento
+CATEGORIA_ANY_2 = 1465880
+CATEGORIA_REPLETA = 3598455
+
+PERFIS = {
+    # Clone simples na mesma conta (main.py)
+    "ANY_1": {
+        "remover": CAMPOS_SISTEMA + ("stockLocalId",),
+        "sku_principal": {"partnerId": "novo_sku", "ean": "novo_ean"},
+        "skus": {"partnerId": "novo_sku", "ean": "novo_ean"},
+    },
+    "ANY_2": {
+        "remover": CAMPOS_SISTEMA + ("stockLocalId",),
+        "traduzir_marca": True,
+        "categoria_padrao": CATEGORIA_ANY_2,
+        "sku_principal": {"partnerId": "novo_sku", "ean": "novo_ean", "stockLocalId": "estoque"},
+        "skus": {"partnerId": "novo_sku", "ean": "novo_ean", "stockLocalId": "estoque"},
+    },
+    "REPLETA": {
+        "remover": CAMPOS_SISTEMA + ("stockLocalId",),
+        "traduzir_marca": True,
+        "categoria_padrao": CATEGORIA_REPLETA,
+        "sku_principal": {"partnerId": "novo_sku", "ean": "novo_ean", "stockLocalId": "estoque"},
+        "sku_principal_fixos": {"priceFactor": 1},
+        "skus": {"partnerId": "novo_sku", "ean": "novo_ean", "stockLocalId": "estoque"},
+    },
+    # Clone com variações: SKU/EAN de cada variação vêm do callback por_sku
+    "ANY_1_VARIACOES": {
+        "remover": CAMPOS_SISTEMA,
+        "fixos": {"hasVariations": True},
+        "sku_principal": {"partnerId": "novo_sku", "ean": "novo_ean"},
+        "skus_remover": CAMPOS_SKUS_VARIACAO,
+        "achatar_variacoes": True,
+    },
+    "ANY_2_VARIACOES": {
+        "remover": CAMPOS_SISTEMA,
+        "traduzir_marca": True,
+        "fixos": {"hasVariations": True},
+        "categoria_padrao": CATEGORIA_ANY_2,
+        "sku_principal": {"partnerId": "novo_sku", "ean": "novo_ean"},
+        "skus_remover": CAMPOS_SKUS_VARIACAO,
+        "achatar_variacoes": True,
+    },
+    "REPLETA_VARIACOES": {
+        "remover": CAMPOS_SISTEMA,
+        "traduzir_marca": True,
+        "fixos": {"hasVariations": True},
+        "categoria_padrao": CATEGORIA_REPLETA,
+        "sku_principal": {"partnerId": "novo_sku", "ean": "novo_ean"},
+        "sku_principal_fixos": {"priceFactor": 1},
+        "skus_remover": CAMPOS_SKUS_VARIACAO,
+        "achatar_variacoes": True,
+    },
+    # Kit simples interativo (COPY SIMPLE P KIT/main.py)
+    "KIT_SIMPLES": {
+        "remover": CAMPOS_SISTEMA + ("stockLocalId",),
+        "fixos": {"type": "KIT"},
+        "sku_principal": {"partnerId": "novo_sku", "ean": "novo_ean"},
+        "copiar_skus": False,
+    },
+    # Base dos kits em lote (COPY SIMPLE P KIT): os SKUs e componentes são montados por quem chama
+    "KIT": {
+        "remover": CAMPOS_SISTEMA + ("stockLocalId", "partnerId", "allowAutomaticSkuMarketplaceCreation",
+                                     "calculatedPrice", "isProductActive", "additionalStocks", "kitItens",
+                                     "kitComponents"),
+        "fixos": {"type": "KIT"},
+        "copiar_skus": False,
+    },
+}
+# ===================================
+
+_compilados = {}
+
+
+def _novo(valor):
+    # valores fixos mutáveis não podem ser compartilhados entre payloads
+    if isinstance(valor, dict):
+        return dict(valor)
+    if isinstance(valor, list):
+        return list(valor)
+    return valor
+
+
+def compilar(perfil):
+    """
+    Devolve transformar(produto, por_sku=None, **parametros) -> payload novo.
+
+    por_sku(i, sku_origem) -> dict opcional com campos daquele SKU (ex.: partnerId/ean
+    de cada variação). Parâmetros citados no perfil e não informados ficam de fora.
+    """
+    if isinstance(perfil, str):
+        if perfil not in _compilados:
+            _compilados[perfil] = compilar(PERFIS[perfil])
+        return _compilados[perfil]
+
+    # tudo que dá para decidir antes do primeiro produto fica pronto aqui
+    remover = frozenset(perfil.get("remover", ())) | {"sku", "skus"}
+    fixos = tuple(perfil.get("fixos", {}).items())
+    categoria_padrao = perfil.get("categoria_padrao")
+    traduzir_marca = perfil.get("traduzir_marca", False)
+    sku_principal = tuple(perfil.get("sku_principal", {}).items())
+    sku_principal_fixos = tuple(perfil.get("sku_principal_fixos", {}).items())
+    skus_params = tuple(perfil.get("skus", {}).items())
+    skus_remover = frozenset(perfil.get("skus_remover", ()))
+    skus_fixos = tuple(perfil.get("skus_fixos", {}).items())
+    achatar = perfil.get("achatar_variacoes", False)
+    copiar_skus = perfil.get("copiar_skus", True)
+    tem_sku_principal = bool(sku_principal or sku_principal_fixos)
+
+    def transformar(produto, por_sku=None, **parametros):
+        payload = {k: v for k, v in produto.items() if k not in remover}
+        for campo, valor in fixos:
+            payload[campo] = _novo(valor)
+        categoria = parametros.get("categoria") or categoria_padrao
+        if categoria is not None:
+            payload["category"] = {"id": categoria}
+        if traduzir_marca:
+            # id da marca na origem não vale no destino
+            marca = parametros.get("marca")
+            if marca is None:
+                payload.pop("brand", None)
+            else:
+                payload["brand"] = {"id": marca}
+
+        sku = produto.get("sku")
+        if tem_sku_principal or "sku" in produto:
+            sku = dict(sku) if isinstance(sku, dict) else {}
+            for campo, nome in sku_principal:
+                if nome in parametros:
+                    sku[campo] = parametros[nome]
+            for campo, valor in sku_principal_fixos:
+                sku[campo] = _novo(valor)
+            payload["sku"] = sku
+
+        skus = produto.get("skus")
+        if copiar_skus and isinstance(skus, list):
+            comuns = [(campo, parametros[nome]) for campo, nome in skus_params if nome in parametros]
+            novos = []
+            for i, item in enumerate(skus):
+                novo = {k: v for k, v in item.items() if k not in skus_remover}
+                if achatar and "variations" in item:
+                    achatadas = achatar_variacoes(item["variations"])
+                    if achatadas:
+                        novo["variations"] = achatadas
+                for campo, valor in skus_fixos:
+                    novo[campo] = _novo(valor)
+                for campo, valor in comuns:
+                    novo[campo] = valor
+                if por_sku is not None:
+                    novo.update(por_sku(i, item) or {})
+                novos.append(novo)
+            payload["skus"] = novos
+        elif copiar_skus and skus is not None:
+            payload["skus"] = skus
+        return payload
+
+    return transformar
+
+
+def transformar(perfil, produto, por_sku=None, **parametros):
+    """Atalho para compilar(perfil)(produto, ...)."""
+    return compilar(perfil)(produto, por_sku=por_sku, **parametros)
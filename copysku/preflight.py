@@ -0,0 +1,109 @@
+"""
+Pre-flight de duplicidade: antes de qualquer POST, confere todos os
+partnerIds/EANs planejados do lote contra o índice local da conta destino
+(copysku.sku_index) e contra as outras linhas da própria planilha.
+Linhas em conflito são rejeitadas sem ir à rede.
+"""
+from collections import defaultdict
+
+from copysku import sku_index
+from copysku.cache import conta_do_token
+from copysku.sku_index import get_indice
+
+
+def sku_e_ean(linha):
+    """Extrator padrão: uma linha planeja um SKU (novo_sku) e um EAN (novo_ean)."""
+    return [linha.get("novo_sku")], [linha.get("novo_ean")]
+
+
+def preparar_indices(tokens):
+    """
+    Monta o índice das contas destino que nunca foram indexadas e remonta os que
+    passaram da validade (SKUs criados por outros fora destes scripts).
+    """
+    indice = get_indice()
+    validade = sku_index.validade()
+    for token in tokens:
+        idade = indice.idade(conta_do_token(token))
+        if idade is None:
+            print("🔎 Índice da conta destino ainda não montado — paginando o catálogo...")
+        elif idade > validade:
+            print(f"🔎 Índice da conta destino montado há {idade / 3600:.1f} h — paginando o catálogo de novo...")
+        else:
+            continue
+        print(f"✅ {indice.construir(token)} SKUs indexados")
+
+
+def verificar(itens, tokens, planejados=sku_e_ean):
+    """
+    itens: lista de (n, linha). tokens: contas destino.
+    planejados(linha) -> (lista de SKUs, lista de EANs) que a linha vai criar.
+    Retorna {n: motivo} das linhas rejeitadas.
+    """
+    por_sku = defaultdict(list)
+    por_ean = defaultdict(list)
+    for n, linha in itens:
+        skus, eans = planejados(linha)
+        for sku in skus:
+            if sku not in (None, ""):
+                por_sku[str(sku)].append(n)
+        for ean in eans:
+            if ean not in (None, ""):
+                por_ean[str(ean)].append(n)
+
+    motivos = defaultdict(list)
+    for rotulo, ocorrencias in (("SKU", por_sku), ("EAN", por_ean)):
+        for valor, linhas in ocorrencias.items():
+            if len(linhas) > 1:
+                for n in sorted(set(linhas)):
+                    motivos[n].append(f"{rotulo} {valor} repetido na planilha (linhas {', '.join(map(str, linhas))})")
+
+    indice = get_indice()
+    for token in tokens:
+        existentes_sku, existentes_ean = indice.existentes(conta_do_token(token), por_sku, por_ean)
+        for sku, product_id in existentes_sku.items():
+            for n in sorted(set(por_sku[sku])):
+                motivos[n].append(f"SKU {sku} já existe no destino (produto {product_id})")
+        for ean, partner_id in existentes_ean.items():
+            for n in sorted(set(por_ean[ean])):
+                motivos[n].append(f"EAN {ean} já usado no destino pelo SKU {partner_id}")
+
+    return {n: "; ".join(m) for n, m in motivos.items()}
+
+
+def imprimir_rejeitadas(rejeitadas):
+    if not rejeitadas:
+        print("✅ Pre-flight: nenhum SKU/EAN em conflito")
+        return
+    print(f"🛑 Pre-flight: {len(rejeitadas)} linha(s) rejeitada(s) antes de qualquer POST:")
+    for n in sorted(rejeitadas):
+        print(f"   [{n}] {rejeitadas[n]}")
+
+
+def conferir(itens, tokens, planejados=sku_e_ean):
+    """Prepara os índices, confere o lote e imprime as rejeitadas. Retorna {n: motivo}."""
+    preparar_indices(tokens)
+    rejeitadas = verificar(itens, tokens, planejados)
+    imprimir_rejeitadas(rejeitadas)
+    return rejeitadas
+
+
+def para_lote(tokens, planejados=sku_e_ean):
+    """Callback preflight para batch.clonar_lote."""
+    return lambda itens: conferir(itens, tokens, planejados)
+
+
+def aplicar(itens, tokens, planejados=sku_e_ean, ao_rejeitar=None):
+    """
+    Para os scripts com laço próprio (kits): devolve só as linhas aprovadas;
+    ao_rejeitar(n, linha, motivo) registra cada rejeitada.
+    """
+    rejeitadas = conferir(itens, tokens, planejados)
+    aprovadas = []
+    for n, linha in itens:
+        if n in rejeitadas:
+            if ao_rejeitar is not None:
+                ao_rejeitar(n, linha, rejeitadas[n])
+        else:
+            aprovadas.append((n, linha))
+    return aprovadas
@@ -0,0 +1,151 @@
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+# ========== CONFIGURAÇÕES ==========
+# Taxa inicial (requisições/segundo) por gumgaToken; ajustada durante a execução.
+# ANY_RATE / ANY_RATE_MAX sobrescrevem os padrões (lidos ao criar o limitador, depois do .env)
+TAXA_INICIAL_PADRAO = 3.0
+TAXA_MIN = 0.2
+TAXA_MAX_PADRAO = 20.0
+# Rajada máxima permitida (tamanho do balde)
+CAPACIDADE = 5
+# Aumento aditivo a cada resposta OK / redução multiplicativa a cada 429
+INCREMENTO = 0.05
+FATOR_REDUCAO = 0.5
+# 429s da mesma rajada (vários workers) contam como uma redução só
+JANELA_REDUCAO_SEC = 2.0
+# ===================================
+
+
+def ler_taxa_inicial():
+    return float(os.getenv("ANY_RATE", str(TAXA_INICIAL_PADRAO)))
+
+
+def ler_taxa_max():
+    return float(os.getenv("ANY_RATE_MAX", str(TAXA_MAX_PADRAO)))
+
+
+def _segundos_ate(valor, agora_epoch):
+    """Converte Retry-After / X-RateLimit-Reset (segundos, epoch ou data HTTP) em segundos de espera."""
+    if valor in (None, ""):
+        return None
+    try:
+        n = float(valor)
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(valor).timestamp() - agora_epoch)
+        except (TypeError, ValueError):
+            return None
+    # valores muito grandes são timestamps (epoch em segundos ou milissegundos)
+    if n > 1e12:
+        n = n / 1000.0
+    if n > 1e9:
+        return max(0.0, n - agora_epoch)
+    return max(0.0, n)
+
+
+class LimitadorAdaptativo:
+    """
+    Token bucket de uma conta. Toda requisição chama adquirir() antes de sair
+    e registrar() com a resposta; a taxa sobe devagar enquanto a API responde
+    bem e cai pela metade a cada 429 (respeitando Retry-After), no máximo uma
+    vez por JANELA_REDUCAO_SEC.
+    """
+
+    def __init__(self, taxa=None, capacidade=CAPACIDADE, taxa_max=None):
+        self.taxa = taxa if taxa is not None else ler_taxa_inicial()
+        self.taxa_max = taxa_max if taxa_max is not None else ler_taxa_max()
+        self.capacidade = capacidade
+        self.tokens = float(capacidade)
+        self.ultimo = time.monotonic()
+        self.pausado_ate = 0.0
+        self.reduzido_em = None
+        self.inicio = None
+        self.total = 0
+        self.total_429 = 0
+        self._lock = threading.Lock()
+
+    def _repor(self, agora):
+        self.tokens = min(self.capacidade, self.tokens + (agora - self.ultimo) * self.taxa)
+        self.ultimo = agora
+
+    def adquirir(self):
+        while True:
+            with self._lock:
+                agora = time.monotonic()
+                if self.inicio is None:
+                    self.inicio = agora
+                self._repor(agora)
+                espera = self.pausado_ate - agora
+                if espera <= 0:
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        self.total += 1
+                        return
+                    espera = (1 - self.tokens) / self.taxa
+            time.sleep(espera)
+
+    def registrar(self, status_code, headers=None):
+        headers = headers or {}
+        agora = time.monotonic()
+        agora_epoch = time.time()
+        with self._lock:
+            if status_code == 429:
+                self.total_429 += 1
+                if self.reduzido_em is None or agora - self.reduzido_em >= JANELA_REDUCAO_SEC:
+                    self.taxa = max(TAXA_MIN, self.taxa * FATOR_REDUCAO)
+                    self.reduzido_em = agora
+                self.tokens = 0.0
+                espera = _segundos_ate(headers.get("Retry-After"), agora_epoch)
+                if espera:
+                    self.pausado_ate = max(self.pausado_ate, agora + espera)
+            elif status_code < 500:
+                self.taxa = min(self.taxa_max, self.taxa + INCREMENTO)
+
+            # Cabeçalhos de quota, quando a API os envia
+            restante = headers.get("X-RateLimit-Remaining")
+            reset = _segundos_ate(headers.get("X-RateLimit-Reset"), agora_epoch)
+            if restante is not None and reset:
+                try:
+                    restante = float(restante)
+                except ValueError:
+                    return
+                if restante <= 0:
+                    self.pausado_ate = max(self.pausado_ate, agora + reset)
+                else:
+                    self.taxa = max(TAXA_MIN, min(self.taxa, restante / reset))
+
+    def throughput(self):
+        """Requisições por segundo desde a primeira requisição."""
+        if self.inicio is None:
+            return 0.0
+        decorrido = time.monotonic() - self.inicio
+        return self.total / decorrido if decorrido > 0 else 0.0
+
+
+_limitadores = {}
+_lock = threading.Lock()
+
+
+def get_limitador(token):
+    """Retorna o limitador compartilhado da conta dona do token."""
+    with _lock:
+        limitador = _limitadores.get(token)
+        if limitador is None:
+            limitador = LimitadorAdaptativo()
+            _limitadores[token] = limitador
+    return limitador
+
+
+def resumo():
+    """Totais da execução: requisições, 429 recebidos e requisições/segundo."""
+    with _lock:
+        limitadores = list(_limitadores.values())
+    total = sum(l.total for l in limitadores)
+    total_429 = sum(l.total_429 for l in limitadores)
+    inicios = [l.inicio for l in limitadores if l.inicio is not None]
+    decorrido = time.monotonic() - min(inicios) if inicios else 0.0
+    rps = total / decorrido if decorrido > 0 else 0.0
+    return {"requisicoes": total, "respostas_429": total_429, "req_por_segundo": rps}
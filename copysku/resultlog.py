@@ -0,0 +1,100 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+
+# ========== CONFIGURAÇÕES ==========
+# Linhas acumuladas em memória antes de cada escrita no arquivo
+BUFFER_LINHAS = 50
+# Tamanho máximo da mensagem de erro mantida na própria linha do log
+MAX_ERRO = 300
+# ===================================
+
+
+def _novo_id(corpo):
+    """id do produto criado, extraído da resposta do POST (quando é JSON)."""
+    if isinstance(corpo, dict):
+        return corpo.get("id")
+    if not isinstance(corpo, str) or not corpo.startswith("{"):
+        return None
+    try:
+        return json.loads(corpo).get("id")
+    except ValueError:
+        return None
+
+
+class ArmazemCorpos:
+    """
+    Guarda corpos de resposta comprimidos, endereçados pelo sha256 do
+    conteúdo (<pasta>/ab/abcdef....json.gz). Corpos repetidos ocupam espaço uma vez só.
+    """
+
+    def __init__(self, pasta):
+        self.pasta = pasta
+
+    def guardar(self, corpo):
+        texto = corpo if isinstance(corpo, str) else json.dumps(corpo, ensure_ascii=False)
+        dados = texto.encode("utf-8")
+        chave = hashlib.sha256(dados).hexdigest()
+        caminho = os.path.join(self.pasta, chave[:2], chave + ".json.gz")
+        if not os.path.exists(caminho):
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+            temporario = caminho + ".tmp"
+            with gzip.open(temporario, "wb") as f:
+                f.write(dados)
+            os.replace(temporario, caminho)
+        return chave
+
+    def ler(self, chave):
+        with gzip.open(os.path.join(self.pasta, chave[:2], chave + ".json.gz"), "rb") as f:
+            return f.read().decode("utf-8")
+
+
+class LogCompacto:
+    """
+    Log de resultados em JSONL, uma linha curta por item
+    (id, sku, status, http_code, latência, id do produto novo).
+    As linhas ficam em buffer e são gravadas em blocos; o corpo completo
+    da resposta só é guardado se houver um ArmazemCorpos configurado.
+    """
+
+    def __init__(self, caminho, pasta_corpos=None, buffer_linhas=BUFFER_LINHAS):
+        self.caminho = caminho
+        self.corpos = ArmazemCorpos(pasta_corpos) if pasta_corpos else None
+        self.buffer_linhas = buffer_linhas
+        self._buffer = []
+        self._lock = threading.Lock()
+
+    def escrever(self, registro, corpo=None, latencia=None):
+        registro = dict(registro)
+        sucesso = registro.get("status") == "SUCCESS"
+        if latencia is not None:
+            registro["latencia_ms"] = round(latencia * 1000)
+        if sucesso:
+            registro["novo_id"] = _novo_id(corpo)
+        elif corpo:
+            texto = corpo if isinstance(corpo, str) else json.dumps(corpo, ensure_ascii=False)
+            registro["erro"] = texto[:MAX_ERRO]
+        if self.corpos is not None and corpo:
+            registro["corpo"] = self.corpos.guardar(corpo)
+
+        linha = json.dumps(registro, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            self._buffer.append(linha)
+            if len(self._buffer) >= self.buffer_linhas:
+                self._descarregar()
+
+    def _descarregar(self):
+        if not self._buffer:
+            return
+        with open(self.caminho, mode="a", encoding="utf-8") as f:
+            f.writelines(self._buffer)
+        self._buffer = []
+
+    def flush(self):
+        with self._lock:
+            self._descarregar()
+
+    def close(self):
+        self.flush()
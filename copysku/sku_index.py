@@ -0,0 +1,192 @@
+import argparse
+import os
+import sqlite3
+import threading
+import time
+
+from copysku import client
+from copysku.cache import conta_do_token
+
+# ========== CONFIGURAÇÕES ==========
+# Padrão de ANY_SKU_INDEX_PATH, lida ao abrir o índice
+INDEX_PATH_PADRAO = os.path.join("~", ".copysku", "skus.sqlite")
+# Valores por consulta IN (...) — abaixo do limite de variáveis do SQLite
+LOTE_CONSULTA = 500
+# Idade máxima do índice antes do pre-flight paginar o catálogo de novo (segundos; ANY_SKU_INDEX_TTL)
+TTL_PADRAO = 6 * 3600
+# ===================================
+
+
+class IndiceSkus:
+    """
+    Tabela local partnerId -> (idSku, productId, ean, stockLocalId) por conta.
+    Montada uma vez paginando o catálogo inteiro; depois cada resolução de
+    componente de kit vira uma consulta local.
+    """
+
+    def __init__(self, caminho=None):
+        caminho = caminho or os.path.expanduser(os.getenv("ANY_SKU_INDEX_PATH", INDEX_PATH_PADRAO))
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        self._db = sqlite3.connect(caminho, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS skus (
+                conta TEXT NOT NULL,
+                partner_id TEXT NOT NULL,
+                id_sku INTEGER,
+                product_id INTEGER,
+                ean TEXT,
+                stock_local_id INTEGER,
+                PRIMARY KEY (conta, partner_id)
+            )""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_skus_ean ON skus (conta, ean)")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS construcoes (
+                conta TEXT PRIMARY KEY,
+                construido_em REAL NOT NULL
+            )""")
+        self._db.commit()
+
+    def buscar(self, conta, partner_id):
+        with self._lock:
+            linha = self._db.execute(
+                "SELECT id_sku, product_id, ean, stock_local_id FROM skus WHERE conta = ? AND partner_id = ?",
+                (conta, str(partner_id))).fetchone()
+        if linha is None:
+            return None
+        return {"idSku": linha[0], "productId": linha[1], "ean": linha[2], "stockLocalId": linha[3]}
+
+    def idade(self, conta):
+        """Segundos desde a última construção completa do índice da conta, ou None se nunca foi montado."""
+        with self._lock:
+            linha = self._db.execute("SELECT construido_em FROM construcoes WHERE conta = ?", (conta,)).fetchone()
+        return None if linha is None else time.time() - linha[0]
+
+    def contar(self, conta):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM skus WHERE conta = ?", (conta,)).fetchone()[0]
+
+    def existentes(self, conta, partner_ids=(), eans=()):
+        """
+        Consulta em lote: retorna ({partnerId: productId}, {ean: partnerId})
+        só com os partnerIds/EANs que já existem na conta.
+        """
+        por_partner, por_ean = {}, {}
+        for coluna, valores, destino in (("partner_id", partner_ids, por_partner), ("ean", eans, por_ean)):
+            valores = sorted({str(v) for v in valores if v not in (None, "")})
+            for i in range(0, len(valores), LOTE_CONSULTA):
+                lote = valores[i:i + LOTE_CONSULTA]
+                sql = (f"SELECT partner_id, product_id, ean FROM skus "
+                       f"WHERE conta = ? AND {coluna} IN ({','.join('?' * len(lote))})")
+                with self._lock:
+                    linhas = self._db.execute(sql, [conta] + lote).fetchall()
+                for partner_id, product_id, ean in linhas:
+                    if coluna == "partner_id":
+                        destino[partner_id] = product_id
+                    else:
+                        destino[ean] = partner_id
+        return por_partner, por_ean
+
+    def gravar_produto(self, conta, produto, commit=True, tabela="skus"):
+        """Grava (ou atualiza) todos os SKUs de um produto retornado pela API."""
+        linhas = []
+        for sku in produto.get("skus") or []:
+            if sku.get("partnerId") in (None, ""):
+                continue
+            linhas.append((conta, str(sku.get("partnerId")), sku.get("id"), produto.get("id"),
+                           sku.get("ean"), sku.get("stockLocalId")))
+        with self._lock:
+            self._db.executemany(f"INSERT OR REPLACE INTO {tabela} VALUES (?, ?, ?, ?, ?, ?)", linhas)
+            if commit:
+                self._db.commit()
+        return len(linhas)
+
+    def construir(self, token):
+        """
+        Pagina todo o catálogo da conta e reconstrói o índice. Retorna o nº de SKUs.
+        As páginas vão para uma tabela temporária e só substituem o índice da conta
+        no fim: uma paginação interrompida deixa o índice anterior intacto.
+        """
+        conta = conta_do_token(token)
+        headers = client.headers_da_conta(token)
+        total = 0
+        inicio = time.time()
+        with self._lock:
+            self._db.execute("DROP TABLE IF EXISTS temp.skus_novos")
+            self._db.execute("CREATE TEMP TABLE skus_novos AS SELECT * FROM skus WHERE 0")
+            self._db.execute("CREATE UNIQUE INDEX temp.idx_skus_novos ON skus_novos (conta, partner_id)")
+        try:
+            for n, produto in enumerate(client.paginar(client.API_URL_PRODUCTS, headers), start=1):
+                total += self.gravar_produto(conta, produto, commit=False, tabela="temp.skus_novos")
+                if n % 1000 == 0:
+                    print(f"   ... {n} produtos / {total} SKUs indexados")
+            with self._lock:
+                self._db.execute("DELETE FROM skus WHERE conta = ?", (conta,))
+                self._db.execute("INSERT OR REPLACE INTO skus SELECT * FROM temp.skus_novos")
+                self._db.execute("INSERT OR REPLACE INTO construcoes VALUES (?, ?)", (conta, inicio))
+                self._db.commit()
+        except BaseException:
+            with self._lock:
+                self._db.rollback()
+            raise
+        finally:
+            with self._lock:
+                self._db.execute("DROP TABLE IF EXISTS temp.skus_novos")
+        return total
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+_indice = None
+_indice_lock = threading.Lock()
+
+
+def get_indice():
+    global _indice
+    with _indice_lock:
+        if _indice is None:
+            _indice = IndiceSkus()
+    return _indice
+
+
+def validade():
+    return int(os.getenv("ANY_SKU_INDEX_TTL", TTL_PADRAO))
+
+
+def registrar_criado(token, produto):
+    """
+    Grava no índice os SKUs de um produto recém-criado na conta, para o pre-flight
+    das próximas execuções já o ver sem esperar a próxima paginação.
+    """
+    if not isinstance(produto, dict) or not produto.get("skus"):
+        return
+    try:
+        get_indice().gravar_produto(conta_do_token(token), produto)
+    except sqlite3.Error as ex:
+        print(f"⚠️  Produto criado, mas não gravado no índice de SKUs ({ex})")
+
+
+def main():
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Monta o índice local partnerId -> idSku de uma conta AnyMarket")
+    parser.add_argument("--conta", default="ANY_1", help="variável de ambiente com o token (ANY_1, ANY_2, REPLETA)")
+    args = parser.parse_args()
+
+    token = os.getenv(args.conta)
+    if not token:
+        print(f"❌ Variável {args.conta} não definida")
+        return
+    print(f"=== INDEXANDO SKUs DA CONTA {args.conta} ===")
+    total = get_indice().construir(token)
+    print(f"✅ {total} SKUs indexados em {get_indice().caminho}")
+
+
+if __name__ == "__main__":
+    main()
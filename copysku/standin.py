@@ -0,0 +1,339 @@
+"""
+Servidor local que imita a API AnyMarket para testes de carga offline.
+
+    python -m copysku.standin --porta 8080 --produtos 2000 --latencia-ms 80 --taxa-429 0.05
+    ANY_BASE_URL=http://127.0.0.1:8080 python -m copysku kit-sheet kits.xlsx --workers 8
+
+Rotas: GET /v2/products/{id}, GET /v2/products (?sku=, modifiedSince=, offset, limit),
+POST /v2/products, GET /v2/stocks (?sku=, stockLocalId=, offset, limit),
+GET /v2/categories (árvore com 'children', ids diferentes por conta) e
+GET/POST /v2/brands (marcas separadas por conta).
+O catálogo é sintético ou lido de um JSONL gravado (um produto por linha); cada
+gumgaToken começa com uma cópia dele e só vê os produtos que ele mesmo criou.
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+STOCK_LOCAL_PADRAO = 45479
+# Árvore de categorias: mesmos caminhos em toda conta, ids diferentes por gumgaToken
+CATEGORIAS = [("Casa", ["Cozinha", "Banheiro"]), ("Eletrônicos", ["Celulares", "Acessórios"]), ("Moda", ["Calçados"])]
+FOLHAS = [f"{raiz}/{folha}" for raiz, folhas in CATEGORIAS for folha in folhas]
+# Marcas que toda conta já tem; os produtos sintéticos usam também marcas que faltam no destino
+MARCAS_INICIAIS = ["Marca Teste", "Genérica"]
+MARCAS_PRODUTOS = MARCAS_INICIAIS + ["Marca Nova"]
+
+
+def arvore_categorias(token):
+    base = 1000 * (int(hashlib.sha256(str(token).encode("utf-8")).hexdigest()[:6], 16) % 900 + 100)
+    arvore = []
+    for i, (raiz, folhas) in enumerate(CATEGORIAS):
+        id_raiz = base + 100 * (i + 1)
+        arvore.append({"id": id_raiz, "name": raiz, "path": raiz,
+                       "children": [{"id": id_raiz + j + 1, "name": folha, "path": f"{raiz}/{folha}", "children": []}
+                                    for j, folha in enumerate(folhas)]})
+    return arvore
+
+
+class Catalogo:
+    """Produtos e estoques em memória, com índice por partnerId."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.produtos = {}
+        self.por_partner = {}
+        self.estoques = []
+        self.marcas = {}
+        self.contas = {}
+        self._proximo_id = 100000000
+
+    def da_conta(self, token):
+        """Catálogo de uma conta (gumgaToken): começa como cópia deste e recebe os POSTs dela."""
+        with self._lock:
+            conta = self.contas.get(token)
+            if conta is None:
+                conta = Catalogo()
+                conta.produtos = dict(self.produtos)
+                conta.por_partner = dict(self.por_partner)
+                conta.estoques = list(self.estoques)
+                # faixa de ids própria por conta
+                conta._proximo_id = self._proximo_id + 10_000_000 * (len(self.contas) + 1)
+                self.contas[token] = conta
+            return conta
+
+    def _novo_id(self):
+        self._proximo_id += 1
+        return self._proximo_id
+
+    def adicionar(self, produto):
+        with self._lock:
+            return self._adicionar(produto)
+
+    def _adicionar(self, produto):
+        produto = dict(produto)
+        produto["id"] = produto.get("id") or self._novo_id()
+        self._proximo_id = max(self._proximo_id, int(produto["id"]))
+        for sku in produto.get("skus") or []:
+            sku["id"] = sku.get("id") or self._novo_id()
+            self._proximo_id = max(self._proximo_id, int(sku["id"]))
+            self.por_partner[str(sku.get("partnerId"))] = produto["id"]
+        produto.setdefault("modificationDate", time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()))
+        self.produtos[produto["id"]] = produto
+        return produto
+
+    def marcas_da_conta(self, token):
+        """Cada conta começa com as marcas de MARCAS_INICIAIS (ids próprios); POST /v2/brands acrescenta."""
+        with self._lock:
+            if token not in self.marcas:
+                self.marcas[token] = [{"id": self._novo_id(), "name": nome} for nome in MARCAS_INICIAIS]
+            return list(self.marcas[token])
+
+    def criar_marca(self, token, nome):
+        self.marcas_da_conta(token)
+        with self._lock:
+            if any(m["name"].casefold() == str(nome).casefold() for m in self.marcas[token]):
+                return None, f"Marca {nome} já cadastrada"
+            marca = {"id": self._novo_id(), "name": nome}
+            self.marcas[token].append(marca)
+            return marca, None
+
+    def criar(self, produto):
+        """POST: rejeita partnerId já existente (como a API real) e devolve o produto criado."""
+        with self._lock:
+            for sku in produto.get("skus") or []:
+                if str(sku.get("partnerId")) in self.por_partner:
+                    return None, f"SKU {sku.get('partnerId')} já cadastrado"
+            produto = dict(produto)
+            produto.pop("id", None)
+            produto["creationDate"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+            return self._adicionar(produto), None
+
+    @classmethod
+    def sintetico(cls, n, semente=42):
+        rnd = random.Random(semente)
+        cat = cls()
+        descricao = "<p>" + "Descrição de teste com bastante HTML. " * 200 + "</p>"
+        for i in range(n):
+            n_skus = rnd.choice([1, 1, 1, 3, 6])
+            skus = []
+            for j in range(n_skus):
+                sku = {"partnerId": f"SYN{i:06d}{'' if n_skus == 1 else chr(65 + j)}",
+                       "ean": f"789{i:07d}{j:02d}0", "title": f"Produto {i}", "price": round(rnd.uniform(10, 500), 2),
+                       "sellPrice": 0, "amount": rnd.randint(0, 50), "stockLocalId": STOCK_LOCAL_PADRAO}
+                if n_skus > 1:
+                    sku["variations"] = [{"type": {"id": 1, "name": "Cor"}, "description": f"Cor {j}"}]
+                skus.append(sku)
+            produto = cat.adicionar({
+                "title": f"Produto sintético {i}", "description": descricao,
+                "category": {"id": 1465880 + i % len(FOLHAS), "name": FOLHAS[i % len(FOLHAS)].split("/")[-1],
+                             "path": FOLHAS[i % len(FOLHAS)]},
+                "brand": {"id": 1 + i % len(MARCAS_PRODUTOS), "name": MARCAS_PRODUTOS[i % len(MARCAS_PRODUTOS)]},
+                "hasVariations": n_skus > 1, "type": "VARIATION" if n_skus > 1 else "SIMPLE",
+                "images": [{"url": f"https://img.example/{i}/{k}.jpg", "main": k == 0} for k in range(5)],
+                "characteristics": [{"name": f"Atributo {k}", "value": str(k)} for k in range(10)],
+                "skus": skus,
+            })
+            for sku in produto["skus"]:
+                cat.estoques.append({"sku": {"id": sku["id"], "partnerId": sku["partnerId"]},
+                                     "stockLocal": {"id": STOCK_LOCAL_PADRAO}, "price": sku["price"],
+                                     "amount": sku["amount"]})
+        return cat
+
+    @classmethod
+    def de_arquivo(cls, caminho):
+        cat = cls()
+        with open(caminho, encoding="utf-8") as f:
+            for linha in f:
+                if linha.strip():
+                    produto = cat.adicionar(json.loads(linha))
+                    for sku in produto.get("skus") or []:
+                        cat.estoques.append({"sku": {"id": sku["id"], "partnerId": sku.get("partnerId")},
+                                             "stockLocal": {"id": sku.get("stockLocalId") or STOCK_LOCAL_PADRAO},
+                                             "price": sku.get("price") or 0, "amount": sku.get("amount") or 0})
+        return cat
+
+
+class Falhas:
+    """
+    Latência configurável, 429 aleatórios com Retry-After, rajadas de 5xx e
+    POSTs gravados cuja resposta se perde (conexão fechada sem resposta).
+    """
+
+    def __init__(self, latencia_ms=0, jitter_ms=0, taxa_429=0.0, retry_after=1, rajada_a_cada=0, rajada_tamanho=0,
+                 taxa_resposta_perdida=0.0):
+        self.latencia_ms = latencia_ms
+        self.jitter_ms = jitter_ms
+        self.taxa_429 = taxa_429
+        self.retry_after = retry_after
+        self.rajada_a_cada = rajada_a_cada
+        self.rajada_tamanho = rajada_tamanho
+        self.taxa_resposta_perdida = taxa_resposta_perdida
+        self._contador = 0
+        self._lock = threading.Lock()
+
+    def proxima(self):
+        """Dorme a latência simulada e diz se a requisição deve falhar (status, headers) ou None."""
+        atraso = self.latencia_ms + random.uniform(-self.jitter_ms, self.jitter_ms)
+        if atraso > 0:
+            time.sleep(atraso / 1000.0)
+        with self._lock:
+            self._contador += 1
+            n = self._contador
+        if self.rajada_a_cada and n % self.rajada_a_cada >= self.rajada_a_cada - self.rajada_tamanho:
+            return 503, {}
+        if self.taxa_429 and random.random() < self.taxa_429:
+            return 429, {"Retry-After": str(self.retry_after)}
+        return None
+
+    def perder_resposta(self):
+        return bool(self.taxa_resposta_perdida) and random.random() < self.taxa_resposta_perdida
+
+
+def _pagina(itens, params):
+    offset = int(params.get("offset", ["0"])[0])
+    limit = int(params.get("limit", ["50"])[0])
+    total = len(itens)
+    return {"content": itens[offset:offset + limit],
+            "page": {"size": limit, "totalElements": total, "number": offset // max(limit, 1),
+                     "totalPages": (total + limit - 1) // max(limit, 1)}}
+
+
+def criar_handler(catalogo, falhas):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, formato, *args):
+            pass
+
+        def _responder(self, status, corpo=None, headers=None):
+            dados = json.dumps(corpo if corpo is not None else {}, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(dados)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(dados)
+
+        def _falhou(self):
+            falha = falhas.proxima()
+            if falha:
+                status, headers = falha
+                self._responder(status, {"message": "falha simulada"}, headers)
+                return True
+            return False
+
+        def do_GET(self):
+            if self._falhou():
+                return
+            url = urlparse(self.path)
+            params = parse_qs(url.query)
+            partes = [p for p in url.path.split("/") if p]
+            conta = catalogo.da_conta(self.headers.get("gumgaToken"))
+
+            if partes[:2] == ["v2", "products"] and len(partes) == 3:
+                produto = conta.produtos.get(int(partes[2])) if partes[2].isdigit() else None
+                if produto is None:
+                    return self._responder(404, {"message": "Produto não encontrado"})
+                return self._responder(200, produto)
+
+            if partes == ["v2", "products"]:
+                if "sku" in params:
+                    pid = conta.por_partner.get(params["sku"][0])
+                    itens = [conta.produtos[pid]] if pid else []
+                else:
+                    itens = list(conta.produtos.values())
+                if "modifiedSince" in params:
+                    # ANY_ESPELHO_PARAM_DESDE=modifiedSince: sincronização delta do espelho
+                    desde = params["modifiedSince"][0]
+                    itens = [p for p in itens if str(p.get("modificationDate") or "") >= desde]
+                return self._responder(200, _pagina(itens, params))
+
+            if partes == ["v2", "categories"]:
+                return self._responder(200, _pagina(arvore_categorias(self.headers.get("gumgaToken")), params))
+
+            if partes == ["v2", "brands"]:
+                return self._responder(200, _pagina(catalogo.marcas_da_conta(self.headers.get("gumgaToken")), params))
+
+            if partes == ["v2", "stocks"]:
+                itens = conta.estoques
+                if "sku" in params:
+                    itens = [e for e in itens if str(e["sku"]["partnerId"]) == params["sku"][0]]
+                if "stockLocalId" in params:
+                    itens = [e for e in itens if str(e["stockLocal"]["id"]) == params["stockLocalId"][0]]
+                return self._responder(200, _pagina(itens, params))
+
+            self._responder(404, {"message": "rota não implementada"})
+
+        def do_POST(self):
+            tamanho = int(self.headers.get("Content-Length") or 0)
+            corpo = self.rfile.read(tamanho)
+            if self._falhou():
+                return
+            rota = urlparse(self.path).path.rstrip("/")
+            if rota not in ("/v2/products", "/v2/brands"):
+                return self._responder(404, {"message": "rota não implementada"})
+            try:
+                produto = json.loads(corpo or b"{}")
+            except ValueError:
+                return self._responder(400, {"message": "JSON inválido"})
+            if rota == "/v2/brands":
+                marca, erro = catalogo.criar_marca(self.headers.get("gumgaToken"), produto.get("name"))
+                if erro:
+                    return self._responder(422, {"message": erro})
+                return self._responder(201, marca)
+            criado, erro = catalogo.da_conta(self.headers.get("gumgaToken")).criar(produto)
+            if erro:
+                return self._responder(422, {"message": erro})
+            if falhas.perder_resposta():
+                # produto gravado, mas o cliente não recebe a resposta (como num timeout)
+                self.close_connection = True
+                return
+            self._responder(201, criado)
+
+    return Handler
+
+
+def iniciar(catalogo, falhas, porta=8080, host="127.0.0.1"):
+    """Sobe o servidor numa thread e o devolve (servidor.shutdown() para parar)."""
+    servidor = ThreadingHTTPServer((host, porta), criar_handler(catalogo, falhas))
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local que imita a API AnyMarket")
+    parser.add_argument("--porta", type=int, default=8080)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--produtos", type=int, default=1000, help="tamanho do catálogo sintético")
+    parser.add_argument("--catalogo", help="JSONL com produtos gravados (substitui o sintético)")
+    parser.add_argument("--latencia-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--taxa-429", type=float, default=0.0, help="fração de requisições respondidas com 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="segundos no header Retry-After dos 429")
+    parser.add_argument("--rajada-5xx-a-cada", type=int, default=0, help="a cada N requisições começa uma rajada de 503")
+    parser.add_argument("--rajada-5xx-tamanho", type=int, default=0, help="quantas requisições seguidas a rajada derruba")
+    parser.add_argument("--taxa-resposta-perdida", type=float, default=0.0,
+                        help="fração de POSTs gravados cuja resposta não é enviada (testa a conciliação)")
+    args = parser.parse_args()
+
+    catalogo = Catalogo.de_arquivo(args.catalogo) if args.catalogo else Catalogo.sintetico(args.produtos)
+    falhas = Falhas(args.latencia_ms, args.jitter_ms, args.taxa_429, args.retry_after,
+                    args.rajada_5xx_a_cada, args.rajada_5xx_tamanho, args.taxa_resposta_perdida)
+    servidor = ThreadingHTTPServer((args.host, args.porta), criar_handler(catalogo, falhas))
+    print(f"=== AnyMarket local em http://{args.host}:{args.porta} ({len(catalogo.produtos)} produtos) ===")
+    print(f"Use: ANY_BASE_URL=http://{args.host}:{args.porta}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import gzip
+import json
+import os
+import time
+
+from copysku import client
+from copysku.cache import conta_do_token
+
+# ========== CONFIGURAÇÕES ==========
+API_URL_STOCKS = "/v2/stocks"
+# Padrões de ANY_SNAPSHOT_DIR / ANY_SNAPSHOT_TTL, lidas a cada obter_snapshot
+SNAPSHOT_DIR_PADRAO = os.path.join("~", ".copysku")
+# Depois desse tempo o snapshot gravado em disco é baixado de novo
+VALIDADE_PADRAO = 3600
+# ===================================
+
+
+def _partner_do_registro(registro):
+    sku = registro.get("sku")
+    if isinstance(sku, dict):
+        return sku.get("partnerId")
+    return registro.get("partnerId") or sku
+
+
+class SnapshotEstoque:
+    """
+    Todos os registros de estoque de um stockLocalId, em colunas
+    (partnerId, preço, quantidade) com índice partnerId -> linha.
+    """
+
+    def __init__(self, stock_local_id, gerado_em=None):
+        self.stock_local_id = stock_local_id
+        self.gerado_em = gerado_em or time.time()
+        self.partner_ids = []
+        self.precos = []
+        self.quantidades = []
+        self._linha = {}
+
+    def adicionar(self, partner_id, preco, quantidade):
+        self._linha[str(partner_id)] = len(self.partner_ids)
+        self.partner_ids.append(str(partner_id))
+        self.precos.append(preco)
+        self.quantidades.append(quantidade)
+
+    def preco(self, partner_id):
+        """Preço do SKU no snapshot, ou None se o SKU não tem estoque neste local."""
+        i = self._linha.get(str(partner_id))
+        return None if i is None else self.precos[i]
+
+    def idade_segundos(self):
+        return time.time() - self.gerado_em
+
+    def __len__(self):
+        return len(self.partner_ids)
+
+    def salvar(self, caminho):
+        dados = {"stockLocalId": self.stock_local_id, "geradoEm": self.gerado_em,
+                 "partnerIds": self.partner_ids, "precos": self.precos, "quantidades": self.quantidades}
+        with gzip.open(caminho, "wt", encoding="utf-8") as f:
+            json.dump(dados, f)
+
+    @classmethod
+    def carregar(cls, caminho):
+        with gzip.open(caminho, "rt", encoding="utf-8") as f:
+            dados = json.load(f)
+        snap = cls(dados["stockLocalId"], dados["geradoEm"])
+        for partner_id, preco, quantidade in zip(dados["partnerIds"], dados["precos"], dados["quantidades"]):
+            snap.adicionar(partner_id, preco, quantidade)
+        return snap
+
+
+def baixar_snapshot(token, stock_local_id):
+    """Pagina /v2/stocks do stockLocalId inteiro e monta o snapshot em memória."""
+    snap = SnapshotEstoque(stock_local_id)
+    headers = client.headers_da_conta(token)
+    for registro in client.paginar(API_URL_STOCKS, headers, params={"stockLocalId": stock_local_id}):
+        stock_local = registro.get("stockLocal") or {}
+        if stock_local and str(stock_local.get("id")) != str(stock_local_id):
+            continue
+        partner_id = _partner_do_registro(registro)
+        if partner_id in (None, ""):
+            continue
+        snap.adicionar(partner_id, float(registro.get("price") or 0), registro.get("amount"))
+    return snap
+
+
+def obter_snapshot(token, stock_local_id, forcar=False):
+    """
+    Retorna o snapshot do disco se ainda estiver dentro da validade;
+    senão (ou com forcar=True) baixa de novo e grava.
+    """
+    pasta = os.path.expanduser(os.getenv("ANY_SNAPSHOT_DIR", SNAPSHOT_DIR_PADRAO))
+    os.makedirs(pasta, exist_ok=True)
+    caminho = os.path.join(pasta, f"estoque_{conta_do_token(token)}_{stock_local_id}.json.gz")
+    if not forcar and os.path.exists(caminho):
+        snap = SnapshotEstoque.carregar(caminho)
+        if snap.idade_segundos() <= int(os.getenv("ANY_SNAPSHOT_TTL", VALIDADE_PADRAO)):
+            return snap
+    snap = baixar_snapshot(token, stock_local_id)
+    snap.salvar(caminho)
+    return snap
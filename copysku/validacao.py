@@ -0,0 +1,239 @@
+"""
+Validação da planilha de kits inteira, antes de qualquer requisição.
+
+A planilha é lida de uma vez num DataFrame e cada regra é uma operação de
+coluna (sem laço por linha), então 100 mil linhas levam segundos:
+
+    - valores 'nan'/'None' gravados como texto
+    - id_prod_hub / novo_sku vazios, sku_composicao vazia (main-planilha.py)
+    - listas que não se separam (',' e '/' misturados, item vazio)
+    - nº de EANs diferente do nº de SKUs da linha
+    - EAN não numérico, com tamanho inválido ou dígito verificador errado
+    - SKU ou EAN repetido na planilha
+
+O resultado é um relatório por linha (linha, severidade, coluna, mensagem);
+linhas com ERRO não devem ir para a rede, AVISO é só informativo.
+
+    python -m copysku.validacao kits.xlsx --modo variations --relatorio validacao.csv
+"""
+import argparse
+import os
+import sys
+
+from copysku import eans
+
+# ========== CONFIGURAÇÕES ==========
+COLUNAS = ["id_prod_hub", "novo_sku", "novo_ean", "sku_composicao"]
+# Textos que indicam célula vazia exportada por outra ferramenta
+VALORES_NULOS = ("nan", "none", "null", "nat", "#n/a")
+TAMANHOS_EAN = (8, 12, 13, 14)
+ERRO = "ERRO"
+AVISO = "AVISO"
+# Linhas do relatório mostradas no terminal (o arquivo traz todas)
+LIMITE_IMPRESSAO = 50
+# ===================================
+
+# modo -> (colunas com listas 'A,B' ou 'A/B', sku_composicao obrigatória)
+MODOS = {
+    "variations": (("novo_sku", "novo_ean", "sku_composicao"), False),  # COPY SIMPLE P KIT/variations.py
+    "planilha": ((), True),                                             # COPY SIMPLE P KIT/main-planilha.py
+}
+
+
+def ler_planilha(caminho):
+    """
+    DataFrame com todas as colunas como texto ('' nas vazias), sem as linhas
+    totalmente vazias e com o índice = nº da linha como em batch.ler_linhas (1, 2, ...).
+    """
+    import pandas as pd
+
+    excel = caminho.lower().endswith((".xlsx", ".xlsm", ".xls"))
+    if excel:
+        df = pd.read_excel(caminho, dtype=str, keep_default_na=False)
+    else:
+        with open(caminho, encoding="utf-8-sig") as f:
+            cabecalho = f.readline()
+        sep = ";" if cabecalho.count(";") > cabecalho.count(",") else ","
+        df = pd.read_csv(caminho, dtype=str, keep_default_na=False, sep=sep, encoding="utf-8-sig")
+    # colunas sem título ficam de fora, como em batch.ler_linhas
+    df = df[[c for c in df.columns if str(c).strip() and not str(c).startswith("Unnamed:")]].fillna("")
+    df.columns = [str(c).strip() for c in df.columns]
+    for coluna in df.columns:
+        df[coluna] = df[coluna].astype(str).str.strip()
+        if excel:
+            # números do Excel lidos como texto: '7891234000001.0' -> '7891234000001'
+            df[coluna] = df[coluna].str.replace(r"^(\d+)\.0$", r"\1", regex=True)
+    df = df[(df != "").any(axis=1)].reset_index(drop=True)
+    df.index = df.index + 1
+    return df
+
+
+def _explodir(coluna, listas):
+    """Série (índice = linha) com um item por valor da célula."""
+    if not listas:
+        itens = coluna[coluna != ""]
+        return itens
+    itens = coluna[coluna != ""].str.split(r"\s*[,/]\s*", regex=True).explode().str.strip()
+    return itens[itens != ""]
+
+
+def _digitos_verificadores_ok(codigos):
+    """Série de GTINs só com dígitos e tamanho válido -> Série bool (dígito verificador confere)."""
+    import numpy as np
+    import pandas as pd
+
+    if codigos.empty:
+        return pd.Series(True, index=codigos.index)
+    # todos alinhados à direita em 14 dígitos: pesos 3,1,3,... da esquerda nos 13 primeiros
+    matriz = np.frombuffer("".join(codigos.str.zfill(14)).encode("ascii"), dtype=np.uint8).reshape(-1, 14) - 48
+    pesos = np.array([3, 1] * 6 + [3], dtype=np.int64)
+    esperado = (10 - (matriz[:, :13] @ pesos) % 10) % 10
+    return pd.Series(esperado == matriz[:, 13], index=codigos.index)
+
+
+def validar(df, modo="variations"):
+    """
+    Aplica as regras a todas as linhas. Retorna um DataFrame
+    (linha, severidade, coluna, mensagem) ordenado pela linha.
+    """
+    import pandas as pd
+
+    colunas_lista, composicao_obrigatoria = MODOS[modo]
+    partes = []
+
+    def marcar(mascara, coluna, mensagem, severidade=ERRO):
+        linhas = mascara.index[mascara.to_numpy()]
+        if len(linhas) == 0:
+            return
+        if not isinstance(mensagem, str):
+            mensagem = mensagem.to_numpy()[mascara.to_numpy()]
+        partes.append(pd.DataFrame({"linha": linhas, "severidade": severidade, "coluna": coluna,
+                                    "mensagem": mensagem}))
+
+    faltando = [c for c in COLUNAS if c not in df.columns]
+    if faltando:
+        raise ValueError(f"Coluna obrigatória ausente: {', '.join(faltando)}")
+
+    valores = {}
+    for coluna in COLUNAS:
+        texto = df[coluna]
+        nulo = texto.str.lower().isin(VALORES_NULOS)
+        marcar(nulo, coluna, "valor nulo ('nan'/'None') gravado como texto")
+        valores[coluna] = texto.mask(nulo, "")
+
+    marcar(df["id_prod_hub"] == "", "id_prod_hub", "id_prod_hub vazio")
+    marcar(df["novo_sku"] == "", "novo_sku", "novo_sku vazio")
+    if composicao_obrigatoria:
+        # em variations.py a composição vazia é válida: o kit simples usa o SKU do produto de origem
+        marcar(df["sku_composicao"] == "", "sku_composicao", "sku_composicao vazia")
+
+    quantidades = {}
+    for coluna in ("novo_sku", "novo_ean", "sku_composicao"):
+        texto = valores[coluna]
+        preenchido = texto != ""
+        if coluna in colunas_lista:
+            marcar(texto.str.contains(",", regex=False) & texto.str.contains("/", regex=False), coluna,
+                   "lista com separadores ',' e '/' misturados")
+            marcar(preenchido & texto.str.contains(r"(?:^|[,/])\s*(?:[,/]|$)", regex=True), coluna,
+                   "lista com item vazio (separador sobrando)")
+            quantidades[coluna] = texto.str.count(r"[,/]").where(preenchido, -1) + 1
+        else:
+            marcar(texto.str.contains(r"[,/]", regex=True), coluna, "mais de um valor numa célula de valor único")
+            quantidades[coluna] = preenchido.astype(int)
+
+    n_skus, n_eans = quantidades["novo_sku"], quantidades["novo_ean"]
+    texto_qtd = " (" + n_eans.astype(str) + ") que SKUs (" + n_skus.astype(str) + ")"
+    marcar((n_eans > n_skus) & (n_skus > 0), "novo_ean", "mais EANs" + texto_qtd)
+    # EAN vazio conta como faltando, como numa lista mais curta que a de SKUs. É só AVISO, como em
+    # eans.completar: com a faixa os que faltam são alocados, sem ela o SKU vai sem EAN
+    faltam = (n_eans < n_skus) & (n_skus > 0)
+    if eans.configurado():
+        marcar(faltam, "novo_ean", "menos EANs" + texto_qtd + ": os que faltam vêm da faixa reservada", AVISO)
+    else:
+        marcar(faltam, "novo_ean", "menos EANs" + texto_qtd + ": ANY_EAN_FAIXA não configurada, "
+               "os que faltam vão sem EAN", AVISO)
+
+    listas = bool(colunas_lista)
+    itens = {coluna: _explodir(valores[coluna], listas) for coluna in ("novo_sku", "novo_ean")}
+    codigos = itens["novo_ean"]
+    numerico = codigos.str.fullmatch(r"\d+")
+    marcar(~numerico, "novo_ean", "EAN " + codigos + " não numérico")
+    tamanho_ok = numerico & codigos.str.len().isin(TAMANHOS_EAN)
+    marcar(numerico & ~tamanho_ok, "novo_ean", "EAN " + codigos + " com " + codigos.str.len().astype(str) +
+           " dígitos (válidos: 8, 12, 13 ou 14)")
+    validos = codigos[tamanho_ok]
+    marcar(~_digitos_verificadores_ok(validos), "novo_ean", "EAN " + validos + " com dígito verificador inválido")
+
+    for coluna, rotulo in (("novo_sku", "SKU"), ("novo_ean", "EAN")):
+        tabela = pd.DataFrame({"linha": itens[coluna].index, "valor": itens[coluna].to_numpy()})
+        repetidos = tabela[tabela.duplicated("valor", keep=False)]
+        if repetidos.empty:
+            continue
+        linhas_por_valor = repetidos.groupby("valor")["linha"].agg(lambda s: ", ".join(map(str, sorted(set(s)))))
+        repetidos = repetidos.drop_duplicates()
+        mensagens = (rotulo + " " + repetidos["valor"] + " repetido na planilha (linhas " +
+                     repetidos["valor"].map(linhas_por_valor) + ")")
+        marcar(pd.Series(True, index=repetidos["linha"].to_numpy()), coluna,
+               pd.Series(mensagens.to_numpy(), index=repetidos["linha"].to_numpy()))
+
+    if not partes:
+        return pd.DataFrame(columns=["linha", "severidade", "coluna", "mensagem"])
+    return pd.concat(partes, ignore_index=True).sort_values("linha", kind="stable", ignore_index=True)
+
+
+def imprimir(relatorio, total_linhas, limite=LIMITE_IMPRESSAO):
+    erros = relatorio[relatorio["severidade"] == ERRO]
+    avisos = relatorio[relatorio["severidade"] == AVISO]
+    if relatorio.empty:
+        print(f"✅ Validação: {total_linhas} linhas sem problemas")
+        return
+    print(f"🔎 Validação: {erros['linha'].nunique()} linha(s) com erro e {avisos['linha'].nunique()} com aviso "
+          f"de {total_linhas}")
+    for r in relatorio.head(limite).itertuples(index=False):
+        marcador = "❌" if r.severidade == ERRO else "⚠️ "
+        print(f"   {marcador} [{r.linha}] {r.coluna}: {r.mensagem}")
+    if len(relatorio) > limite:
+        print(f"   ... mais {len(relatorio) - limite} ocorrência(s) (use --relatorio-validacao para o arquivo completo)")
+
+
+def conferir(caminho, modo="variations", relatorio=None):
+    """
+    Lê, valida, imprime e (opcionalmente) grava o relatório CSV.
+    Retorna {linha: mensagens} das linhas com ERRO.
+    """
+    df = ler_planilha(caminho)
+    resultado = validar(df, modo)
+    imprimir(resultado, len(df))
+    if relatorio:
+        resultado.to_csv(relatorio, index=False, encoding="utf-8-sig")
+        print(f"📄 Relatório de validação em {relatorio}")
+    erros = resultado[resultado["severidade"] == ERRO]
+    return erros.groupby("linha")["mensagem"].agg("; ".join).to_dict()
+
+
+def main():
+    from dotenv import load_dotenv
+
+    # ANY_EAN_FAIXA do .env decide se EAN faltando é erro ou aviso
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Valida a planilha de kits inteira sem ir à rede")
+    parser.add_argument("planilha")
+    parser.add_argument("--modo", choices=sorted(MODOS), default="variations",
+                        help="variations: listas por célula (COPY SIMPLE P KIT/variations.py); "
+                             "planilha: um valor por célula (main-planilha.py)")
+    parser.add_argument("--relatorio", metavar="CSV", help="grava todas as ocorrências neste CSV")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.planilha):
+        print(f"❌ Planilha não encontrada: {args.planilha}")
+        sys.exit(2)
+    try:
+        erros = conferir(args.planilha, args.modo, args.relatorio)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(2)
+    sys.exit(1 if erros else 0)
+
+
+if __name__ == "__main__":
+    main()
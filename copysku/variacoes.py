@@ -0,0 +1,65 @@
+from copysku.batch import ler_linhas
+
+
+def letter_suffix(idx):
+    """Gera sufixos A, B, C..."""
+    s = ""
+    n = idx + 1
+    while n > 0:
+        n, rem = divmod(n - 1, 26)
+        s = chr(65 + rem) + s
+    return s
+
+
+# As funções abaixo devolvem o callback usado por clonar_produto_com_variacoes
+# para obter (novo_sku, novo_ean) de cada variação sem input().
+
+def pedir_no_terminal():
+    """Comportamento original: pergunta SKU e EAN de cada variação."""
+    def _novos(i, sku_item):
+        novo_sku = input("Digite o novo SKU: ").strip()
+        novo_ean = input("Digite o novo EAN: ").strip()
+        return novo_sku, novo_ean
+    return _novos
+
+
+def carregar_mapeamento(caminho):
+    """
+    Lê o arquivo de mapeamento (CSV/XLSX) com as colunas
+    partnerId_origem, novo_sku e novo_ean (opcional).
+    """
+    mapa = {}
+    for linha in ler_linhas(caminho, ["partnerId_origem", "novo_sku"]):
+        mapa[linha["partnerId_origem"]] = (linha["novo_sku"], linha.get("novo_ean", ""))
+    return mapa
+
+
+def por_mapeamento(mapa):
+    """Cada variação recebe o SKU/EAN mapeado a partir do seu partnerId de origem."""
+    def _novos(i, sku_item):
+        origem = str(sku_item.get("partnerId"))
+        if origem not in mapa:
+            raise ValueError(f"Variação {origem} sem linha no arquivo de mapeamento")
+        return mapa[origem]
+    return _novos
+
+
+def por_sufixo(sku_base, eans=None):
+    """Cada variação recebe sku_base + A, B, C...; EANs opcionais na mesma ordem."""
+    eans = eans or []
+
+    def _novos(i, sku_item):
+        return f"{sku_base}{letter_suffix(i)}", (eans[i] if i < len(eans) else "")
+    return _novos
+
+
+def achatar_variacoes(variations):
+    """
+    Converte a lista devolvida pelo GET ([{'type': {'name': 'Cor'}, 'description': 'Azul'}])
+    no dict aceito pelo POST ({'Cor': 'Azul'}).
+    """
+    nova_variations = {}
+    for var in variations or []:
+        if isinstance(var, dict) and 'type' in var and 'description' in var:
+            nova_variations[var['type']['name']] = var['description']
+    return nova_variations
@@ -0,0 +1,63 @@
+import csv
+import os
+import subprocess
+import sys
+
+import pytest
+
+from copysku import eans, standin
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def api():
+    """Stand-in da API numa porta livre, com um catálogo sintético pequeno."""
+    catalogo = standin.Catalogo.sintetico(30)
+    servidor = standin.iniciar(catalogo, standin.Falhas(), porta=0)
+    yield catalogo, f"http://127.0.0.1:{servidor.server_address[1]}"
+    servidor.shutdown()
+
+
+def _fila(pasta, url, *argumentos):
+    # HOME temporário: fila, diário, índices e caches ficam fora de ~/.copysku
+    env = dict(os.environ, HOME=str(pasta), ANY_BASE_URL=url, ANY_1="t1", ANY_2="t2", REPLETA="t3",
+               PYTHONPATH=RAIZ, PYTHONIOENCODING="utf-8")
+    env.pop("ANY_EAN_FAIXA", None)
+    return subprocess.run([sys.executable, "-m", "copysku.fila", *argumentos], cwd=pasta, env=env,
+                          capture_output=True, text=True, timeout=120)
+
+
+def _planilha(caminho, colunas, linhas):
+    with open(caminho, "w", newline="", encoding="utf-8") as f:
+        escritor = csv.writer(f)
+        escritor.writerow(colunas)
+        escritor.writerows(linhas)
+    return str(caminho)
+
+
+def test_fila_drena_simples_variacoes_e_kits(api, tmp_path):
+    catalogo, url = api
+    simples = [p for p in catalogo.produtos.values() if p["type"] == "SIMPLE"]
+    variacao = next(p for p in catalogo.produtos.values() if p["type"] == "VARIATION")
+    componente = simples[1]["skus"][0]["partnerId"]
+    colunas = ["id_prod_hub", "novo_sku", "novo_ean", "sku_composicao"]
+
+    tarefas = [
+        ("simple", _planilha(tmp_path / "simples.csv", colunas[:3],
+                             [[simples[0]["id"], "FILA-S1", eans.ean13(789555000001)]])),
+        ("variations", _planilha(tmp_path / "variacoes.csv", colunas[:3], [[variacao["id"], "FILA-V1", ""]])),
+        ("kit-sheet", _planilha(tmp_path / "kits-itens.csv", colunas,
+                                [[simples[0]["id"], "FILA-K1", eans.ean13(789555000002), componente]]), "itens"),
+        ("kit-sheet", _planilha(tmp_path / "kits-componentes.csv", colunas,
+                                [[simples[0]["id"], "FILA-K2", eans.ean13(789555000003), componente]]), "componentes"),
+    ]
+    for comando, planilha, *modo in tarefas:
+        extra = ["--modo", modo[0]] if modo else []
+        r = _fila(tmp_path, url, "enfileirar", comando, planilha, *extra)
+        assert r.returncode == 0, r.stdout + r.stderr
+
+    r = _fila(tmp_path, url, "trabalhar", "--processos", "1", "--ate-esvaziar")
+    assert r.returncode == 0, r.stdout + r.stderr
+    status = _fila(tmp_path, url, "status", "--falhas").stdout
+    assert "SUCESSO: 4" in status and "FALHA: 0" in status, status + r.stdout
@@ -0,0 +1,38 @@
+import pandas as pd
+import pytest
+
+from copysku import eans, validacao
+
+# linha 1 sem EAN, linha 2 com menos EANs que SKUs
+PLANILHA = pd.DataFrame({
+    "id_prod_hub": ["1", "2"],
+    "novo_sku": ["K1", "K2A,K2B"],
+    "novo_ean": ["", eans.ean13(789555000010)],
+    "sku_composicao": ["", ""],
+}, index=[1, 2])
+
+
+@pytest.fixture(params=[False, True], ids=["sem-faixa", "com-faixa"])
+def faixa(request, monkeypatch, tmp_path):
+    monkeypatch.setattr(eans, "_alocador", None)
+    monkeypatch.setenv("ANY_EAN_PATH", str(tmp_path / "eans.sqlite"))
+    if request.param:
+        monkeypatch.setenv("ANY_EAN_FAIXA", "789123400000-789123499999")
+    else:
+        monkeypatch.delenv("ANY_EAN_FAIXA", raising=False)
+    return request.param
+
+
+def test_ean_faltando_e_aviso_como_em_completar(faixa):
+    """O validador prevê a execução: completar não recusa a linha, então o validador também não."""
+    relatorio = validacao.validar(PLANILHA.copy(), "variations")
+    ocorrencias = relatorio[relatorio["coluna"] == "novo_ean"]
+    assert sorted(ocorrencias["linha"]) == [1, 2]
+    assert set(ocorrencias["severidade"]) == {validacao.AVISO}
+
+    for _, linha in PLANILHA.iterrows():
+        skus = linha["novo_sku"].split(",")
+        informados = [e for e in linha["novo_ean"].split(",") if e]
+        completos = eans.completar(skus, informados, origem=linha["id_prod_hub"])
+        assert len(completos) == len(skus)
+        assert all(completos) == faixa